@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Check the figures against stored baselines at low resolution.
+
+Runs the graph scripts (generate_all_graphs.SCRIPTS) in parallel with
+their figures saved at a low dpi into a scratch folder (see
+softwood/figures.py), reduces every figure to a small grayscale
+thumbnail (softwood/snapshots.py) and compares it with its baseline in
+figure-baselines/. A figure fails when its thumbnail differs by more
+than the tolerances, when it has no baseline or when its script fails,
+so a refactor of the parsing or plotting code can be checked without
+looking at the images:
+
+    python check_figures.py                     # every script
+    python check_figures.py prices employment   # scripts whose path contains these
+    python check_figures.py --update            # accept the current figures as baselines
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from generate_all_graphs import SCRIPTS
+from softwood import figures, snapshots
+
+BASELINE_DIR = 'figure-baselines'
+MANIFEST = os.path.join(BASELINE_DIR, 'manifest.json')
+DPI = 40
+
+
+def render(script_path, folder, dpi):
+    """Run one script with its figures saved at dpi into folder; returns (script, error, seconds)."""
+    os.makedirs(folder, exist_ok=True)
+    env = dict(os.environ)
+    env[figures.DPI_ENV] = str(dpi)
+    env[figures.DIR_ENV] = folder
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, script_path], capture_output=True, text=True,
+                               cwd=os.getcwd(), env=env)
+    error = None
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ['exit code %d' % completed.returncode])[-1]
+    return script_path, error, time.perf_counter() - started
+
+
+def read_manifest():
+    try:
+        with open(MANIFEST, encoding='utf-8') as f:
+            return json.load(f)
+    except OSError:
+        return None
+
+
+def main():
+    """Check (or update) the figure baselines."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scripts', nargs='*', help='only run scripts whose path contains one of these')
+    parser.add_argument('--update', action='store_true', help='write the rendered figures as the new baselines')
+    parser.add_argument('--dpi', type=int, help=f'render resolution (default: the baselines\', else {DPI})')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='scripts to run at once')
+    parser.add_argument('--tolerance', type=float, default=0.001,
+                        help='largest mean thumbnail difference allowed (0-1, default 0.001)')
+    parser.add_argument('--max-pixel', type=float, default=0.05,
+                        help='largest single thumbnail pixel difference allowed (0-1, default 0.05)')
+    parser.add_argument('--hash-bits', type=int, default=2,
+                        help='largest difference-hash distance allowed (0-64, default 2)')
+    args = parser.parse_args()
+
+    manifest = read_manifest() or {}
+    dpi = args.dpi or manifest.get('dpi', DPI)
+    if manifest and dpi != manifest.get('dpi') and not args.update:
+        print(f"Warning: the baselines were rendered at {manifest['dpi']} dpi, not {dpi}")
+    selected = [(path, name) for path, name in SCRIPTS
+                if not args.scripts or any(pattern in path for pattern in args.scripts)]
+    if not selected:
+        parser.error(f"no script matches: {', '.join(args.scripts)}")
+
+    scratch = tempfile.mkdtemp(prefix='figures-')
+    started = time.perf_counter()
+    try:
+        folders = {path: os.path.join(scratch, os.path.splitext(os.path.basename(path))[0])
+                   for path, _ in selected}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+            runs = list(pool.map(lambda item: render(item[0], folders[item[0]], dpi), selected))
+
+        rows = []
+        failed = 0
+        rendered = {}
+        for script_path, error, seconds in runs:
+            if error:
+                rows.append((script_path, 'ERROR', error))
+                failed += 1
+                continue
+            for filename in sorted(os.listdir(folders[script_path])):
+                rendered[filename] = (script_path, snapshots.thumbnail(os.path.join(folders[script_path], filename)))
+
+        if args.update:
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            figures_list = dict(manifest.get('figures', {}))
+            for filename, (script_path, thumb) in rendered.items():
+                snapshots.write_thumbnail(os.path.join(BASELINE_DIR, filename), thumb)
+                figures_list[filename] = script_path
+                rows.append((filename, 'UPDATED', ''))
+            with open(MANIFEST, 'w', encoding='utf-8') as f:
+                json.dump({'dpi': dpi, 'thumbnail': list(snapshots.THUMBNAIL),
+                           'figures': dict(sorted(figures_list.items()))}, f, indent=2)
+                f.write('\n')
+        else:
+            expected = {filename for filename, script_path in manifest.get('figures', {}).items()
+                        if script_path in folders}
+            for filename in sorted(expected - set(rendered)):
+                rows.append((filename, 'MISSING', 'not rendered'))
+                failed += 1
+            for filename, (script_path, thumb) in sorted(rendered.items()):
+                baseline = os.path.join(BASELINE_DIR, filename)
+                if not os.path.exists(baseline):
+                    rows.append((filename, 'NEW', 'no baseline (run with --update)'))
+                    failed += 1
+                    continue
+                diff = snapshots.compare(snapshots.read_thumbnail(baseline), thumb)
+                ok = (diff.mean_diff <= args.tolerance and diff.max_diff <= args.max_pixel
+                      and diff.hash_bits <= args.hash_bits)
+                failed += not ok
+                rows.append((filename, 'ok' if ok else 'CHANGED',
+                             f"mean {diff.mean_diff:.4f}, max {diff.max_diff:.3f}, hash {diff.hash_bits} bits"))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    for name, status, detail in rows:
+        print(f"{status:<9}{name:<40}{detail}")
+    elapsed = time.perf_counter() - started
+    slowest = max(runs, key=lambda run: run[2])
+    print(f"\n{len(rendered)} figures from {len(selected)} scripts at {dpi} dpi in {elapsed:.1f}s "
+          f"({args.jobs} at once; slowest {slowest[0]} {slowest[2]:.1f}s)")
+    if args.update:
+        print(f"Baselines written to: {BASELINE_DIR}/")
+    if failed:
+        print(f"{failed} figure(s) failed")
+        sys.exit(1)
+    if not args.update:
+        print("All figures match their baselines")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Serve an interactive dashboard of the monthly and daily series.
+
+Builds a level-of-detail pyramid (softwood/downsample.py) of every series
+of the aligned monthly panel (softwood/panel.py) and of the daily
+weighted tariff rate (softwood/events.py), caches the pyramids with the
+panel's sources, and serves dashboard.html on a local port. The page
+selects series, pans and zooms; for every view it asks the server for
+about one point per pixel, which the server answers from the pyramids
+with LTTB or min-max downsampling, so the browser never receives the
+full arrays:
+
+    python dashboard.py                         # http://127.0.0.1:8050/
+    python dashboard.py --port 8000 --synthetic 10000000
+
+--synthetic N adds a random walk of N one-minute observations (10
+million is 19 years), to check that views stay fast on series far
+longer than the bundled ones.
+"""
+
+import argparse
+import http.server
+import json
+import os
+import time
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+from softwood import cache, downsample, events, panel
+
+PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard.html')
+LABELS = {
+    'lumber_production': 'Lumber production',
+    'lumber_price': 'Softwood lumber price index',
+    'steel_price': 'Fabricated steel price index',
+    'concrete_price': 'Ready-mixed concrete price index',
+    'housing_starts': 'Canadian housing starts',
+    'us_housing_starts': 'US housing starts',
+    'weighted_tariff': 'US weighted tariff rate (daily)',
+}
+UNITS = dict(panel.UNITS, weighted_tariff='percent')
+SELECTED = ('lumber_price', 'lumber_production', 'weighted_tariff')
+MAX_POINTS = 5000
+
+
+def build_pyramids():
+    """Return {name: levels} for every panel series and the daily tariff rate."""
+    frame = panel.monthly_panel()
+    series = {name: frame[name] for name in frame.columns}
+    # The last tariff period is open-ended; it runs to the day the pyramids are built
+    series['weighted_tariff'] = events.daily_tariff() * 100
+    return {name: downsample.pyramid(*downsample.as_xy(values)) for name, values in series.items()}
+
+
+def load_pyramids():
+    """Return the pyramids, from the cache unless a source has changed."""
+    sources = [os.path.join(panel.DATA_ROOT, path) for path in panel.SOURCES.values()] + [events.TARIFF_WEIGHTS]
+    frame = cache.cached('dashboard-pyramids', sources, lambda: downsample.to_frame(build_pyramids()),
+                         meta={'units': UNITS})
+    return downsample.from_frame(frame)
+
+
+def synthetic_walk(minutes, seed=0):
+    """Return the levels of a random walk of `minutes` one-minute observations ending today."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=minutes, freq='min')
+    values = 100 * np.exp(rng.normal(0, 0.001, minutes).cumsum())
+    return downsample.pyramid(*downsample.as_xy(pd.Series(values, index=dates)))
+
+
+def catalog(pyramids):
+    """Describe every series for the page: name, label, units, x range, points and levels."""
+    return [{'name': name, 'label': LABELS.get(name, name), 'units': UNITS.get(name, ''),
+             'start': float(levels[0].x[0]), 'end': float(levels[0].x[-1]),
+             'points': len(levels[0].x), 'levels': len(levels), 'selected': name in SELECTED}
+            for name, levels in pyramids.items() if len(levels[0].x)]
+
+
+def make_handler(pyramids):
+    """Return a request handler class serving the page and the JSON API over pyramids."""
+    listing = json.dumps(catalog(pyramids)).encode('utf-8')
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def send(self, body, content_type='application/json', status=200):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            if url.path in ('/', '/index.html'):
+                with open(PAGE, 'rb') as f:
+                    self.send(f.read(), 'text/html; charset=utf-8')
+            elif url.path == '/api/series':
+                self.send(listing)
+            elif url.path == '/api/data':
+                try:
+                    self.send(json.dumps(self.query(urllib.parse.parse_qs(url.query))).encode('utf-8'))
+                except (KeyError, ValueError) as exc:
+                    self.send(json.dumps({'error': exc.args[0]}).encode('utf-8'), status=400)
+            else:
+                self.send(b'{"error": "not found"}', status=404)
+
+        def query(self, params):
+            """Downsample the requested series to the requested window and width."""
+            start = float(params['start'][0]) if 'start' in params else None
+            end = float(params['end'][0]) if 'end' in params else None
+            points = min(int(params.get('points', ['1000'])[0]), MAX_POINTS)
+            method = params.get('method', ['lttb'])[0]
+            if method not in downsample.METHODS:
+                raise ValueError(f'Unknown method {method!r}')
+            answer = {}
+            for name in params.get('series', []):
+                if name not in pyramids:
+                    raise KeyError(f'Unknown series {name!r}')
+                x, y = downsample.query(pyramids[name], start, end, max(points, 3), method)
+                answer[name] = {'x': x.tolist(), 'y': y.tolist()}
+            return answer
+
+        def log_message(self, format, *args):
+            if self.server.verbose:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def main():
+    """Build or load the pyramids and serve the dashboard until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--synthetic', type=int, metavar='N', help='add a random walk of N one-minute observations')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    pyramids = load_pyramids()
+    if args.synthetic:
+        pyramids['synthetic'] = synthetic_walk(args.synthetic)
+        LABELS['synthetic'] = f'Synthetic random walk ({args.synthetic:,} minutes)'
+    for name, levels in pyramids.items():
+        print(f"  {LABELS.get(name, name):<50}{len(levels[0].x):>12,} points, {len(levels)} levels")
+    print(f"Pyramids ready in {time.perf_counter() - started:.1f}s")
+
+    server = http.server.ThreadingHTTPServer((args.host, args.port), make_handler(pyramids))
+    server.verbose = args.verbose
+    print(f"Serving the dashboard on http://{args.host}:{server.server_address[1]}/ (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
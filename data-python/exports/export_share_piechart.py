@@ -1,67 +1,70 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+import os
+import sys
 
-# Read the CSV file
-df = pd.read_csv('exports/raw-exports.csv', skiprows=3)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from softwood import figures, lazy, results
+from softwood.exports import destination_shares
+from softwood.instrument import stage
 
-# Filter out rows with missing country data
-df = df[df['Country'].notna()]
+spec = figures.FIGURES['export_share_piechart']
 
-# Remove footer rows
-df = df[df['Province'].notna()]
+with stage('load'):
+    # Totals by month x destination x province for every downloaded extract (cached)
+    totals = figures.load(spec['series'][0]['extracts'], 'extracts')
+    analytics = destination_shares(totals)
 
-# Convert Value to numeric
-df['Value ($)'] = pd.to_numeric(df['Value ($)'], errors='coerce')
-df = df.dropna(subset=['Value ($)'])
+with stage('clean'):
+    # Chart the most recent month in the extract
+    month = figures.period(spec, figures.data(spec))
+    month_label = month.strftime('%B %Y')
 
-# Classify exports as US or Rest of World
-df['Region'] = df['Country'].apply(lambda x: 'United States' if x == 'United States' else 'Rest of World')
+    # Total exports by region (United States vs Rest of World)
+    region_totals = analytics['value'].loc[month]
 
-# Calculate total exports by region
-region_totals = df.groupby('Region')['Value ($)'].sum()
+    # Calculate percentages
+    total = region_totals.sum()
+    percentages = (region_totals / total) * 100
 
-# Calculate percentages
-total = region_totals.sum()
-percentages = (region_totals / total) * 100
+if lazy.rendering():
+    with stage('plot'):
+        # Pie chart of the month's export value by destination
+        fig, ax = figures.plot(spec)
 
-# Create the pie chart
-fig, ax = plt.subplots(figsize=(10, 8))
+with stage('summary'):
+    # Print summary statistics
+    print("\n=== Canadian Softwood Lumber Export Share ===")
+    print(f"Period: {month_label}")
+    print(f"\nTotal Export Value: ${total:,.0f}")
+    print("\nExport Share by Destination:")
+    for region in region_totals.index:
+        value = region_totals[region]
+        pct = percentages[region]
+        print(f"  {region}: ${value:,.0f} ({pct:.1f}%)")
 
-# Define colors (grayscale)
-colors = ['#404040', '#BFBFBF']
+    print("\nVolume-Weighted Unit Price (dollars per cubic metre):")
+    for region, price in analytics['unit_price'].loc[month].items():
+        print(f"  {region}: ${price:,.0f}")
 
-# Create pie chart
-wedges, texts, autotexts = ax.pie(region_totals, 
-                                    labels=region_totals.index,
-                                    autopct='%1.1f%%',
-                                    startangle=90,
-                                    colors=colors,
-                                    textprops={'fontsize': 20, 'weight': 'bold'},
-                                    wedgeprops={'edgecolor': 'black', 'linewidth': 1.5})
+    print("\nShare of Export Value by Province:")
+    for province, pct in analytics['province_share'].loc[month].sort_values(ascending=False).items():
+        us_pct = analytics['province_us_share'].loc[month, province]
+        print(f"  {province}: {pct:.1f}% ({us_pct:.1f}% to the United States)")
 
-# Make percentage text white for better contrast
-for autotext in autotexts:
-    autotext.set_color('white')
-    autotext.set_fontsize(21)
-    autotext.set_weight('bold')
+    months = analytics['share'].index
+    if len(months) > 1:
+        print(f"\n=== United States Share by Month ({months[0].strftime('%B %Y')} to {months[-1].strftime('%B %Y')}) ===")
+        for m, pct in analytics['share']['United States'].items():
+            print(f"  {m.strftime('%B %Y')}: {pct:.1f}%")
 
-# Add title
-ax.set_title('Canadian Softwood Lumber Export Share by Destination\n(January 2017)', 
-             fontsize=24, fontweight='bold', pad=20)
+    results.stat('total_export_value', total, unit='dollars', period=str(month))
+    for region in region_totals.index:
+        results.stat(f'share_{region}', percentages[region], unit='percent', period=str(month))
+    results.stat('unit_price', analytics['unit_price'].loc[month].to_dict(), unit='dollars per cubic metre',
+                 period=str(month))
+    results.stat('monthly_us_share', {str(m): v for m, v in analytics['share']['United States'].items()},
+                 unit='percent')
 
-plt.tight_layout()
-
-# Print summary statistics
-print("\n=== Canadian Softwood Lumber Export Share ===")
-print(f"Period: January 2017")
-print(f"\nTotal Export Value: ${total:,.0f}")
-print("\nExport Share by Destination:")
-for region in region_totals.index:
-    value = region_totals[region]
-    pct = percentages[region]
-    print(f"  {region}: ${value:,.0f} ({pct:.1f}%)")
-
-# Save the plot to images folder
-plt.savefig('../images/export_share_piechart.png', dpi=300, bbox_inches='tight')
-plt.close()
+if lazy.rendering():
+    with stage('save'):
+        # Save the plot to images folder
+        figures.save(spec, fig)
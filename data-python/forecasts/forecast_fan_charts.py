@@ -0,0 +1,109 @@
+import os
+import sys
+
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from softwood import figures, forecast, lazy, panel, results
+from softwood.instrument import stage
+
+plt = lazy.module('matplotlib.pyplot')
+
+# Months projected forward, and months held out to compare the models
+HORIZON = 24
+HOLDOUT = 24
+
+# Series to project: (title, y-axis label, seasonally adjust first?)
+SERIES = {
+    'lumber_production': ('Lumber Production', 'Thousands of cubic metres', True),
+    'lumber_price': ('Softwood Lumber Price Index', 'Index (January 2020 = 100)', True),
+    'housing_starts': ('Canadian Housing Starts', 'Thousands (SAAR)', False),
+}
+MODEL_NAMES = {'arima': 'ARIMA', 'ets': 'Damped-trend ETS', 'regression': 'Regression on US starts'}
+
+with stage('load'):
+    # Read the aligned monthly panel
+    data = panel.monthly_panel(start='2003-01')
+
+with stage('forecast'):
+    # Every series x model, fitted on all the data and on the data before
+    # the holdout months, in one parallel batch (cached by data vintage)
+    jobs = {}
+    for name, (title, label, adjust) in SERIES.items():
+        series = data[name].dropna()
+        models = ['arima', 'ets'] + (['regression'] if name == 'lumber_production' else [])
+        for model in models:
+            exog = data['us_housing_starts'] if model == 'regression' else None
+            jobs[(name, model, 'full')] = dict(series=series, model=model, horizon=HORIZON, adjust=adjust, exog=exog)
+            # The holdout fit only sees US starts up to its cut, so it has to project them
+            # like a real forecast instead of using the months it is scored on
+            holdout_exog = exog.loc[:series.index[-HOLDOUT - 1]] if exog is not None else None
+            jobs[(name, model, 'holdout')] = dict(series=series.iloc[:-HOLDOUT], model=model, horizon=HOLDOUT,
+                                                  adjust=adjust, exog=holdout_exog)
+    forecasts = forecast.forecast_many(jobs)
+
+with stage('evaluate'):
+    # Mean absolute percentage error of each model's median over the holdout months
+    errors = {}
+    for (name, model, fit), frame in forecasts.items():
+        if fit == 'holdout':
+            actual = data[name].reindex(frame.index)
+            errors[(name, model)] = (np.abs(frame['median'] / actual - 1)).mean() * 100
+    best = {name: min((m for n, m in errors if n == name), key=lambda m: errors[(name, m)]) for name in SERIES}
+
+if lazy.rendering():
+    with stage('plot'):
+        # Create one fan chart per series for its best holdout model
+        fig, axes = plt.subplots(len(SERIES), 1, figsize=(16, 6 * len(SERIES)))
+
+        for ax, (name, (title, label, adjust)) in zip(axes, SERIES.items()):
+            history = data[name].dropna()
+            history = history[history.index >= pd.Period('2015-01', freq='M')]
+            frame = forecasts[(name, best[name], 'full')]
+            dates = frame.index.to_timestamp()
+
+            # Plot the history and the median forecast
+            ax.plot(history.index.to_timestamp(), history.to_numpy(), linewidth=1.5, color='black', alpha=0.8, label='Observed')
+            ax.plot(dates, frame['median'], linewidth=2, color='black', linestyle='--', label=f'Forecast ({MODEL_NAMES[best[name]]})')
+
+            # Shade the prediction intervals, darkest for the narrowest
+            for level, alpha in zip(sorted(forecast.LEVELS, reverse=True), (0.15, 0.25, 0.4)):
+                ax.fill_between(dates, frame[f'lower_{round(level * 100)}'], frame[f'upper_{round(level * 100)}'],
+                                color='#666666', alpha=alpha, linewidth=0, label=f'{round(level * 100)}% interval')
+
+            # Add title and labels
+            ax.set_title(f'{title}: {HORIZON}-Month Forecast', fontsize=22, fontweight='bold', pad=15)
+            ax.set_ylabel(label, fontsize=18)
+            ax.legend(loc='upper left', fontsize=14, framealpha=0.9)
+
+            # Format the axes
+            ax.grid(True, alpha=0.3, linestyle='--', color='gray')
+            ax.tick_params(axis='x', labelrotation=45)
+
+        axes[-1].set_xlabel('Year', fontsize=20)
+        plt.tight_layout()
+
+with stage('summary'):
+    # Print the holdout errors and the forecasts
+    print(f"=== Holdout Error (last {HOLDOUT} months, mean absolute % error of the median) ===")
+    for (name, model), error in errors.items():
+        marker = '  <- used' if best[name] == model else ''
+        print(f"{SERIES[name][0]} / {MODEL_NAMES[model]}: {error:.1f}%{marker}")
+
+    print(f"\n=== Forecasts (median, 80% interval; engine: {forecast.ENGINE}) ===")
+    for name in SERIES:
+        frame = forecasts[(name, best[name], 'full')]
+        for step in (12, HORIZON):
+            row = frame.iloc[step - 1]
+            print(f"{SERIES[name][0]}, {frame.index[step - 1].strftime('%B %Y')}: "
+                  f"{row['median']:,.1f} ({row['lower_80']:,.1f} to {row['upper_80']:,.1f})")
+        results.stat(f'{name}_forecast_{HORIZON}m', frame['median'].iloc[-1], period=frame.index[-1])
+        results.stat(f'{name}_forecast_model', best[name])
+
+if lazy.rendering():
+    with stage('save'):
+        # Save the plot to images folder
+        path = figures.savefig('../images/forecast_fan_charts.png')
+
+        print(f"\nGraph saved to: {path}")
@@ -1,108 +1,99 @@
+import os
+import sys
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-
-# Read the GDP data
-df = pd.read_csv('gdp/3610043403-eng.csv', skiprows=11)
-
-# Find the relevant industries
-industries_to_compare = {
-    'Construction': None,
-    'Agriculture, forestry, fishing and hunting': None
-}
-
-# Find row indices for each industry
-for idx, row in df.iterrows():
-    industry_name = str(row.iloc[0])
-    for key in industries_to_compare.keys():
-        if key in industry_name:
-            industries_to_compare[key] = idx
-            break
-
-print("Found industries:")
-for name, idx in industries_to_compare.items():
-    print(f"  {name}: row {idx}")
-
-# Extract 2024 data (most recent complete year)
-industry_names = []
-gdp_values = []
-
-for name, idx in industries_to_compare.items():
-    if idx is not None:
-        # Column for 2024 should be at position -2 (second to last, as 2025 might be incomplete)
-        value_2024 = df.iloc[idx, -2]  # 2024 column
-        if value_2024 not in ['.', '..', '']:
-            try:
-                gdp_float = float(value_2024.replace(',', ''))
-                industry_names.append(name)
-                gdp_values.append(gdp_float)
-            except (ValueError, AttributeError):
-                pass
-
-# Sort by GDP value (descending)
-sorted_data = sorted(zip(industry_names, gdp_values), key=lambda x: x[1], reverse=True)
-industry_names = [x[0] for x in sorted_data]
-gdp_values = [x[1] for x in sorted_data]
-
-# Create the bar chart
-fig, ax = plt.subplots(figsize=(14, 8))
-
-# Create bars
-bars = ax.barh(industry_names, gdp_values, color='black', edgecolor='black', linewidth=1)
-
-# Add value labels on the bars
-for i, (name, value) in enumerate(zip(industry_names, gdp_values)):
-    ax.text(value + 5000, i, f'${value:,.0f}M', 
-            va='center', fontsize=22, fontweight='bold')
-
-# Add title and labels
-ax.set_title('Canadian Industry GDP Comparison (2024)', 
-             fontsize=24, fontweight='bold', pad=20)
-ax.set_xlabel('GDP (millions of chained 2017 dollars)', fontsize=20)
-ax.set_ylabel('Industry', fontsize=20)
-
-# Extend x-axis to accommodate labels
-ax.set_xlim(0, max(gdp_values) * 1.15)
-
-# Format the axes
-ax.grid(True, alpha=0.3, linestyle='--', color='gray', axis='x')
-ax.set_axisbelow(True)
-
-# Format x-axis to show values in thousands
-ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1000:.0f}B'))
-
-plt.tight_layout()
-
-# Print summary statistics
-print("\n=== Canadian Industry GDP Comparison (2024) ===")
-print("\nGDP by Industry (millions of chained 2017 dollars):")
-for name, value in zip(industry_names, gdp_values):
-    print(f"  {name}: ${value:,.0f}M (${value/1000:.1f}B)")
-
-print(f"\nTotal GDP of selected industries: ${sum(gdp_values):,.0f}M (${sum(gdp_values)/1000:.1f}B)")
-
-# Get total GDP from the All industries row
-total_gdp_row = df[df.iloc[:, 0].str.contains('All industries  \[T001\]', na=False)]
-if not total_gdp_row.empty:
-    total_gdp_value = total_gdp_row.iloc[0, -2]
-    if isinstance(total_gdp_value, str):
-        total_gdp_2024 = float(total_gdp_value.replace(',', ''))
-    else:
-        total_gdp_2024 = float(total_gdp_value)
-    print(f"Total Canadian GDP (2024): ${total_gdp_2024:,.0f}M (${total_gdp_2024/1000:.1f}B)")
-    
-    print("\nShare of Total GDP:")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from softwood import figures, gdp, lazy, naics, results
+from softwood.instrument import stage
+
+spec = figures.FIGURES['industry_comparison']
+
+# Most recent complete year (the latest column may be a partial year)
+YEAR = int(spec['period'])
+
+with stage('load'):
+    # Read the GDP table with the shares, growth and sector ranks of every industry and year (cached)
+    gdp_table = figures.load(spec['series'][0]['gdp'], 'gdp')
+    year_column = pd.Period(str(YEAR), freq='Y')
+    years = gdp_table.values.columns
+    if year_column not in years:
+        raise KeyError(f"{YEAR} is not in the GDP table ({years.min()} to {years.max()})")
+
+with stage('clean'):
+    # Find the relevant industries by their NAICS codes
+    industries_to_compare = {series['name']: figures.row_label(series) for series in spec['series']}
+
+    print("Found industries:")
+    for name, label in industries_to_compare.items():
+        print(f"  {name}: [{gdp_table.codes[label]}]")
+
+    # The values for the selected year, sorted by GDP value (descending)
+    gdp_year = figures.data(spec).loc[year_column].dropna().sort_values(ascending=False)
+    industry_names = gdp_year.index.tolist()
+    gdp_values = gdp_year.tolist()
+
+if lazy.rendering():
+    with stage('plot'):
+        # Bar chart with the value of each industry next to its bar
+        fig, ax = figures.plot(spec)
+
+with stage('summary'):
+    # Print summary statistics
+    print(f"\n=== Canadian Industry GDP Comparison ({YEAR}) ===")
+    print("\nGDP by Industry (millions of chained 2017 dollars):")
     for name, value in zip(industry_names, gdp_values):
-        percentage = (value / total_gdp_2024) * 100
-        print(f"  {name}: {percentage:.2f}%")
-else:
-    print("Could not find total GDP")
-
-print("\n=== Key Comparisons ===")
-construction_gdp = gdp_values[industry_names.index('Construction')]
-forestry_gdp = gdp_values[industry_names.index('Agriculture, forestry, fishing and hunting')]
-print(f"Construction is {construction_gdp/forestry_gdp:.1f}x larger than Agriculture/Forestry/Fishing/Hunting")
-
-# Save the plot to images folder
-plt.savefig('../images/industry_comparison.png', dpi=300, bbox_inches='tight')
-plt.close()
+        print(f"  {name}: ${value:,.0f}M (${value/1000:.1f}B)")
+        results.stat(f'gdp_{name}', value, unit='millions of chained 2017 dollars', period=YEAR)
+
+    print(f"\nTotal GDP of selected industries: ${sum(gdp_values):,.0f}M (${sum(gdp_values)/1000:.1f}B)")
+
+    # Get total GDP from the All industries row
+    total_gdp = gdp.row(gdp_table.values, gdp_table.codes, 'T001')[year_column]
+    if pd.notna(total_gdp):
+        print(f"Total Canadian GDP ({YEAR}): ${total_gdp:,.0f}M (${total_gdp/1000:.1f}B)")
+
+        # Shares and ranks are looked up from the whole-table analytics
+        sector_count = int(naics.is_sector(gdp_table.codes).sum())
+        print("\nShare of Total GDP:")
+        for name in industry_names:
+            label = industries_to_compare[name]
+            print(f"  {name}: {gdp_table.shares.at[label, year_column]:.2f}%")
+
+        print(f"\nRank among the {sector_count} NAICS sectors (change on {YEAR - 1}):")
+        for name in industry_names:
+            label = industries_to_compare[name]
+            rank = gdp_table.ranks.at[label, year_column]
+            change = gdp_table.rank_changes.at[label, year_column]
+            growth = gdp_table.growth.at[label, year_column]
+            moved = 'unchanged' if change == 0 else f"{'down' if change > 0 else 'up'} {abs(change):.0f}"
+            print(f"  {name}: #{rank:.0f} ({moved}), real growth {growth:+.1f}%")
+            results.stat(f'gdp_rank_{name}', int(rank), period=YEAR)
+
+        # Each industry within its parent aggregate in the NAICS hierarchy
+        parent_shares = naics.parent_shares(gdp_table.tree, gdp_table.values)[year_column]
+        print("\nShare of Parent Aggregate:")
+        for name in industry_names:
+            label = industries_to_compare[name]
+            parent = gdp_table.tree.parent[gdp_table.codes[label]]
+            parent_label = gdp_table.codes.index[gdp_table.codes.to_numpy() == parent][0]
+            print(f"  {name}: {parent_shares[label]:.2f}% of {parent_label}")
+
+        # Chained dollars are not additive, so the sectors need not sum to the total
+        sector_sum = naics.rollup(gdp_table.tree, gdp_table.values, [naics.TOTAL]).at[naics.TOTAL, year_column]
+        print(f"\nSum of the sectors vs. All industries [T001]: {(sector_sum / total_gdp - 1) * 100:+.2f}% "
+              f"(chained dollars are not additive)")
+    else:
+        print("Could not find total GDP")
+
+    print("\n=== Key Comparisons ===")
+    gdp_by_industry = dict(zip(industry_names, gdp_values))
+    construction_gdp = gdp_by_industry['Construction']
+    forestry_gdp = gdp_by_industry['Agriculture, forestry, fishing and hunting']
+    print(f"Construction is {construction_gdp/forestry_gdp:.1f}x larger than Agriculture/Forestry/Fishing/Hunting")
+    results.stat('construction_to_forestry_ratio', construction_gdp / forestry_gdp, period=YEAR)
+
+if lazy.rendering():
+    with stage('save'):
+        # Save the plot to images folder
+        figures.save(spec, fig)
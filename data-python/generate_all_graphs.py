@@ -1,96 +1,438 @@
 #!/usr/bin/env python3
 """
 Script to generate all graphs for the economics paper.
-Runs all individual graph scripts and reports any errors.
+Runs all individual graph scripts and reports any errors. Every source
+table is first checked against its schema (softwood/schema.py), so a
+table that shifted in a refresh stops the run before any rendering.
+
+Each script writes a structured results sidecar (see softwood/results.py)
+with its outputs, key statistics, warnings and stage timings; these are
+merged into reports/run-manifest.json. The stage timings are
+aggregated into a JSON report and a folded-stack file that can be loaded
+into flamegraph.pl or speedscope. Use --profile to re-run the slowest
+script under cProfile or tracemalloc. --stats-only runs every script
+headless (softwood/lazy.py): the figures are neither drawn nor saved and
+matplotlib is never imported, for a quick check of the statistics.
+
+The figures that have a declarative spec (softwood/figures.py) are
+drawn first, together, by one figures.render() call in this process;
+their scripts then run headless in the same process, so the tables and
+transforms the figures and the summaries share are read and computed
+once. The other scripts run in their own processes.
 """
 
+import argparse
+import contextlib
+import io
+import json
+import runpy
 import subprocess
 import sys
 import os
+import tempfile
+import time
+import traceback
+
+from softwood import figures, instrument, lazy, results, schema, statcan
+
+REPORT_DIR = 'reports'
+
+# List of all graph scripts to run
+SCRIPTS = [
+    ("employment/employment.py", "Employment Graph"),
+    ("exports/export_share_piechart.py", "Export Share Pie Chart"),
+    ("exports/export_value_graph.py", "Export Value Graph"),
+    ("exports/housing_exports_comparison.py", "Housing vs Exports Comparison"),
+    ("gdp/forestry_gdp.py", "Forestry GDP Graph"),
+    ("gdp/industry_comparison.py", "Industry Comparison Graph"),
+    ("lumber-output/lumber_output_graph.py", "Lumber Output Graph"),
+    ("lumber-output/productivity_analysis.py", "Productivity Analysis Graph"),
+    ("prices/lumber_price_graph.py", "Lumber Price Graph"),
+    ("prices/material_comparison.py", "Material Comparison Graph"),
+    ("sawmill-revenue/sawmill_revenue_graph.py", "Sawmill Revenue Graph"),
+    ("tariffs/tariff_timeline.py", "Tariff Timeline Graph"),
+    ("tariffs/event_study.py", "Tariff Event Study"),
+    ("forecasts/forecast_fan_charts.py", "Forecast Fan Charts"),
+    ("model/tariff_scenarios.py", "Model Tariff Scenarios"),
+    ("model/subsidy_cap.py", "Model Subsidy Cap"),
+    ("model/regional_scenarios.py", "Model Regional Scenarios"),
+    ("canada-housing-starts/housing_starts_graph.py", "Canadian Housing Starts Graph")
+]
 
-def run_script(script_path, script_name):
-    """Run a Python script and capture output."""
+
+def run_script(script_path, script_name, env=None):
+    """Run a Python script and capture output.
+
+    Returns (success, result) where result is the script's structured
+    results sidecar (see softwood/results.py) with the run status added.
+    """
+    fd, results_path = tempfile.mkstemp(suffix='.json', prefix='results-')
+    os.close(fd)
+    child_env = dict(os.environ if env is None else env)
+    child_env[results.RESULTS_ENV] = results_path
+
+    result = {'name': script_name, 'path': script_path, 'status': 'exception',
+              'outputs': [], 'stats': {}, 'warnings': [], 'timings': None}
     try:
         print(f"\n{'='*50}")
         print(f"Running: {script_name}")
         print(f"{'='*50}")
-        
-        result = subprocess.run([sys.executable, script_path], 
-                              capture_output=True, 
-                              text=True, 
-                              cwd=os.getcwd())
-        
-        if result.returncode == 0:
-            print(f"✓ SUCCESS: {script_name}")
-            if result.stdout.strip():
+
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, script_path],
+                              capture_output=True,
+                              text=True,
+                              cwd=os.getcwd(),
+                              env=child_env)
+        elapsed = time.perf_counter() - started
+
+        result.update(read_sidecar(results_path) or {})
+        result['name'] = script_name
+        result['path'] = script_path
+        result['returncode'] = completed.returncode
+        result['process_wall_s'] = round(elapsed, 6)
+
+        if completed.returncode == 0:
+            result['status'] = 'success'
+            print(f"✓ SUCCESS: {script_name} ({elapsed:.2f}s)")
+            if completed.stdout.strip():
                 print("Output:")
-                print(result.stdout)
+                print(completed.stdout)
         else:
+            result['status'] = 'error'
+            result['error'] = completed.stderr.strip().splitlines()[-1:] or None
             print(f"✗ ERROR: {script_name}")
             print("Error output:")
-            print(result.stderr)
-            return False
-            
+            print(completed.stderr)
+            return False, result
+
     except Exception as e:
+        result['error'] = str(e)
         print(f"✗ EXCEPTION: {script_name} - {str(e)}")
-        return False
-    
-    return True
+        return False, result
+    finally:
+        if os.path.exists(results_path):
+            os.remove(results_path)
+
+    return True, result
+
+
+def figure_names(script_path):
+    """Return the names of the figure specs in figures.FIGURES whose summary a script prints."""
+    return figures.script_figures(os.path.splitext(os.path.basename(script_path))[0])
+
+
+def render_figures(names):
+    """Draw and save the spec'd figures in one figures.render() call.
+
+    Returns None, or the error message if the rendering fails.
+    """
+    print(f"\n{'='*50}")
+    print(f"Rendering {len(names)} spec'd figures")
+    print(f"{'='*50}")
+    started = time.perf_counter()
+    try:
+        figures.render(names)
+    except Exception as e:
+        print(f"✗ EXCEPTION: rendering the figures - {str(e)}")
+        return str(e)
+    print(f"✓ SUCCESS: {', '.join(names)} ({time.perf_counter() - started:.2f}s)")
+    return None
+
+
+def run_summary(script_path, script_name):
+    """Run a script whose figures have specs headless, in this process.
+
+    Its figures.load() and figures.data() calls find the sources and
+    transforms already read and computed for the figures (and for the
+    scripts run before it). Returns (success, result) like run_script().
+    """
+    result = {'name': script_name, 'path': script_path, 'status': 'exception',
+              'outputs': [], 'stats': {}, 'warnings': [], 'timings': None}
+    print(f"\n{'='*50}")
+    print(f"Running: {script_name}")
+    print(f"{'='*50}")
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    argv, path, stats_only = sys.argv, list(sys.path), os.environ.get(lazy.STATS_ONLY_ENV)
+    sys.argv = [script_path]
+    os.environ[lazy.STATS_ONLY_ENV] = '1'
+    results.reset()
+    instrument.reset()
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            runpy.run_path(script_path, run_name='__main__')
+        returncode = 0
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception:
+        stderr.write(traceback.format_exc())
+        returncode = 1
+    finally:
+        elapsed = time.perf_counter() - started
+        result.update(results.collect())
+        sys.argv, sys.path[:] = argv, path
+        if stats_only is None:
+            del os.environ[lazy.STATS_ONLY_ENV]
+        else:
+            os.environ[lazy.STATS_ONLY_ENV] = stats_only
+
+    result['name'] = script_name
+    result['path'] = script_path
+    result['returncode'] = returncode
+    result['process_wall_s'] = round(elapsed, 6)
+    if returncode != 0:
+        result['status'] = 'error'
+        result['error'] = stderr.getvalue().strip().splitlines()[-1:] or None
+        print(f"✗ ERROR: {script_name}")
+        print("Error output:")
+        print(stderr.getvalue())
+        return False, result
+
+    result['status'] = 'success'
+    print(f"✓ SUCCESS: {script_name} ({elapsed:.2f}s)")
+    if stdout.getvalue().strip():
+        print("Output:")
+        print(stdout.getvalue())
+    return True, result
+
+
+def read_sidecar(path):
+    """Load the JSON sidecar written by a child script, if any."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return None
+    if not content.strip():
+        return None
+    return json.loads(content)
+
+
+def stage_reports_from(run_results):
+    """Extract the per-script stage reports from structured run results."""
+    reports = []
+    for res in run_results:
+        timings = dict(res.get('timings') or {'stages': []})
+        timings['name'] = res['name']
+        timings['path'] = res['path']
+        if 'process_wall_s' in res:
+            timings['process_wall_s'] = res['process_wall_s']
+        reports.append(timings)
+    return reports
+
+
+def write_manifest(run_results, manifest_path):
+    """Merge every script's results into one run manifest."""
+    os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+    manifest = {
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'stats_only': lazy.stats_only(),
+        'succeeded': sum(1 for r in run_results if r['status'] == 'success'),
+        'failed': sum(1 for r in run_results if r['status'] != 'success'),
+        'outputs': [dict(o, script=r['name']) for r in run_results for o in r['outputs']],
+        'warnings': [f"{r['name']}: {w}" for r in run_results for w in r['warnings']],
+        'scripts': {r['name']: r for r in run_results},
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def folded_stacks(stage_reports):
+    """Convert stage reports into folded-stack lines (microseconds of wall time).
+
+    Nested stages are reported with their own time only, so the widths in a
+    flame graph add up to the script's total.
+    """
+    lines = []
+    for rep in stage_reports:
+        root = rep['name'].replace(';', ',').replace(' ', '_')
+        child_time = {}
+        for st in rep['stages']:
+            parent = st['path'].rsplit(';', 1)[0] if ';' in st['path'] else None
+            child_time[parent] = child_time.get(parent, 0.0) + st['wall_s']
+        for st in rep['stages']:
+            self_time = st['wall_s'] - child_time.get(st['path'], 0.0)
+            lines.append(f"{root};{st['path']} {max(int(self_time * 1e6), 0)}")
+        total = rep.get('process_wall_s', rep.get('wall_s', 0.0))
+        unstaged = total - child_time.get(None, 0.0)
+        lines.append(f"{root};(other) {max(int(unstaged * 1e6), 0)}")
+    return lines
+
+
+def write_report(stage_reports, report_path):
+    """Write the aggregated JSON report and its folded-stack companion."""
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    report = {
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'total_wall_s': round(sum(r.get('process_wall_s', 0.0) for r in stage_reports), 6),
+        'scripts': stage_reports,
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    folded_path = os.path.splitext(report_path)[0] + '.folded'
+    with open(folded_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(folded_stacks(stage_reports)) + '\n')
+    return folded_path
+
+
+def print_stage_summary(stage_reports, limit=10):
+    """Print the slowest scripts and stages."""
+    print(f"\n{'='*60}")
+    print("TIMING SUMMARY")
+    print(f"{'='*60}")
+    ordered = sorted(stage_reports, key=lambda r: r.get('process_wall_s', 0.0), reverse=True)
+    for rep in ordered:
+        rss = rep.get('peak_rss_mb')
+        rss_str = f", peak RSS {rss:,.0f} MB" if rss is not None else ''
+        print(f"  {rep['name']}: {rep.get('process_wall_s', 0.0):.2f}s wall{rss_str}")
+
+    all_stages = [(rep['name'], st) for rep in stage_reports for st in rep['stages']]
+    all_stages.sort(key=lambda item: item[1]['wall_s'], reverse=True)
+    print(f"\nSlowest stages:")
+    for name, st in all_stages[:limit]:
+        print(f"  {name} / {st['path']}: {st['wall_s']:.2f}s wall, {st['cpu_s']:.2f}s CPU")
+
+
+def profile_script(script_path, script_name, mode):
+    """Re-run one script with cProfile or tracemalloc capture enabled."""
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    base = os.path.splitext(os.path.basename(script_path))[0]
+    suffix = '.prof' if mode == 'cprofile' else '-tracemalloc.txt'
+    out_path = os.path.join(REPORT_DIR, base + suffix)
+
+    env = dict(os.environ)
+    env[instrument.CAPTURE_ENV] = mode
+    env[instrument.CAPTURE_OUT_ENV] = os.path.abspath(out_path)
+    print(f"\nProfiling slowest script ({script_name}) with {mode}...")
+    ok, _ = run_script(script_path, script_name, env=env)
+    if ok:
+        print(f"Profile written to: {out_path}")
+
+
+def check_tables():
+    """Check every source table against its schema before any script runs.
+
+    Returns a list of error messages (empty if every table passes).
+    """
+    errors = []
+    for table_id, table_schema in schema.SCHEMAS.items():
+        try:
+            if 'columns' in table_schema:
+                schema.check_series(table_schema['path'], table_id)
+            else:
+                statcan.validate(table_schema['path'], table_id=table_id)
+        except (schema.SchemaError, OSError) as e:
+            errors.append(str(e))
+    return errors
+
 
 def main():
     """Generate all graphs for the economics paper."""
-    
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--report', default=os.path.join(REPORT_DIR, 'stage-report.json'),
+                        help='where to write the aggregated timing report')
+    parser.add_argument('--manifest', default=os.path.join(REPORT_DIR, 'run-manifest.json'),
+                        help='where to write the merged run results')
+    parser.add_argument('--profile', choices=['cprofile', 'tracemalloc'],
+                        help='re-run the slowest script with this capture mode')
+    parser.add_argument('--stats-only', action='store_true',
+                        help='compute and record the statistics without drawing the figures')
+    args = parser.parse_args()
+    if args.stats_only:
+        # Inherited by every script run below
+        os.environ[lazy.STATS_ONLY_ENV] = '1'
+
     print("Starting graph generation for economics paper...")
     print(f"Working directory: {os.getcwd()}")
-    
-    # List of all graph scripts to run
-    scripts = [
-        ("employment/employment.py", "Employment Graph"),
-        ("exports/export_share_piechart.py", "Export Share Pie Chart"),
-        ("exports/export_value_graph.py", "Export Value Graph"),
-        ("exports/housing_exports_comparison.py", "Housing vs Exports Comparison"),
-        ("gdp/forestry_gdp.py", "Forestry GDP Graph"),
-        ("gdp/industry_comparison.py", "Industry Comparison Graph"),
-        ("lumber-output/lumber_output_graph.py", "Lumber Output Graph"),
-        ("lumber-output/productivity_analysis.py", "Productivity Analysis Graph"),
-        ("prices/lumber_price_graph.py", "Lumber Price Graph"),
-        ("prices/material_comparison.py", "Material Comparison Graph"),
-        ("sawmill-revenue/sawmill_revenue_graph.py", "Sawmill Revenue Graph"),
-        ("tariffs/tariff_timeline.py", "Tariff Timeline Graph"),
-        ("canada-housing-starts/housing_starts_graph.py", "Canadian Housing Starts Graph")
-    ]
-    
+
+    # Abort before rendering anything if a refreshed table has shifted
+    errors = check_tables()
+    if errors:
+        print(f"\n✗ SCHEMA CHECK FAILED ({len(errors)} table(s)):")
+        for error in errors:
+            print(f"  - {error}")
+        sys.exit(1)
+    print(f"Schema check passed ({len(schema.SCHEMAS)} tables)")
+
     # Track results
     successful = []
     failed = []
-    
-    # Run each script
-    for script_path, script_name in scripts:
-        if run_script(script_path, script_name):
-            successful.append(script_name)
+    run_results = []
+
+    # Draw the spec'd figures together, then run their scripts' summaries in this
+    # process and every other script in its own
+    spec_names = {script_path: figure_names(script_path) for script_path, _ in SCRIPTS}
+    render_error = None
+    if lazy.rendering():
+        render_error = render_figures([name for names in spec_names.values() for name in names])
+    for script_path, script_name in SCRIPTS:
+        names = spec_names[script_path]
+        if not names:
+            _, result = run_script(script_path, script_name)
         else:
-            failed.append(script_name)
-    
+            ok, result = run_summary(script_path, script_name)
+            if ok and lazy.rendering():
+                if render_error is None:
+                    result['outputs'] += [{'path': figures.FIGURES[name]['output'], 'kind': 'figure'}
+                                          for name in names]
+                else:
+                    result['status'] = 'error'
+                    result['error'] = [f'figure: {render_error}']
+        run_results.append(result)
+
+    for result in run_results:
+        if result['status'] == 'success':
+            successful.append(result['name'])
+        else:
+            failed.append(result['name'])
+
     # Print summary
     print(f"\n{'='*60}")
     print("GRAPH GENERATION SUMMARY")
     print(f"{'='*60}")
-    
-    print(f"\n✓ SUCCESSFUL ({len(successful)}/{len(scripts)}):")
+
+    print(f"\n✓ SUCCESSFUL ({len(successful)}/{len(SCRIPTS)}):")
     for name in successful:
         print(f"  - {name}")
-    
+
     if failed:
-        print(f"\n✗ FAILED ({len(failed)}/{len(scripts)}):")
+        print(f"\n✗ FAILED ({len(failed)}/{len(SCRIPTS)}):")
         for name in failed:
             print(f"  - {name}")
-    
-    print(f"\nAll generated images saved to: ../images/")
-    
-    if len(successful) == len(scripts):
+
+    warnings = [(r['name'], w) for r in run_results for w in r['warnings']]
+    if warnings:
+        print(f"\n⚠️  WARNINGS ({len(warnings)}):")
+        for name, warning in warnings:
+            print(f"  - {name}: {warning}")
+
+    if lazy.rendering():
+        print(f"\nAll generated images saved to: ../images/")
+    else:
+        print(f"\nStats-only run: no images were drawn")
+
+    write_manifest(run_results, args.manifest)
+    print(f"Run manifest saved to: {args.manifest}")
+
+    stage_reports = stage_reports_from(run_results)
+    if stage_reports:
+        print_stage_summary(stage_reports)
+        folded_path = write_report(stage_reports, args.report)
+        print(f"\nTiming report saved to: {args.report} (flame graph input: {folded_path})")
+
+        if args.profile:
+            slowest = max(stage_reports, key=lambda r: r.get('process_wall_s', 0.0))
+            profile_script(slowest['path'], slowest['name'], args.profile)
+
+    if len(successful) == len(SCRIPTS):
         print("\n🎉 All graphs generated successfully!")
     else:
         print(f"\n⚠️  {len(failed)} graph(s) had errors.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,135 +1,89 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from datetime import datetime
-
-# Read the older dataset (2003-2018) - header is at row 10
-df_old = pd.read_csv('lumber-output/1610004501-eng.csv', skiprows=9)
-
-# Read the newer dataset (2014-2025) - header is at row 10
-df_new = pd.read_csv('lumber-output/1610001701-eng.csv', skiprows=9)
-
-# Get the date columns from headers
-old_date_columns = [col for col in df_old.columns[1:] if col.strip() and not col.startswith('Unnamed')]
-new_date_columns = [col for col in df_new.columns[1:] if col.strip() and not col.startswith('Unnamed')]
-
-# Skip the units row and get production data
-df_old = df_old.iloc[1:]  # Skip "Cubic metres" row
-df_new = df_new.iloc[1:]  # Skip "Cubic metres" row
-
-# Extract production data for total softwood and hardwood
-old_production_row = df_old[df_old.iloc[:, 0].str.contains('Total softwood and hardwood, production', na=False, regex=False)]
-new_production_row = df_new[df_new.iloc[:, 0].str.contains('Total softwood and hardwood, production', na=False, regex=False)]
-
-# Parse dates and extract data
-def parse_data(date_columns, data_row):
-    """Parse date columns and extract corresponding values"""
-    dates = []
-    values = []
-    
-    for col in date_columns:
-        try:
-            # Parse the date string (format: "Month Year")
-            date_obj = pd.to_datetime(col, format='%B %Y')
-            
-            # Get the value for this column
-            if len(data_row) > 0 and col in data_row.columns:
-                val = data_row[col].values[0]
-                
-                # Clean the value (remove quality indicators and convert to float)
-                if pd.notna(val) and str(val).strip() and str(val) != '..':
-                    val_str = str(val).replace('r', '').replace('A', '').replace('B', '').replace('C', '') \
-                                     .replace('D', '').replace('E', '').replace('F', '').strip()
-                    try:
-                        value = float(val_str.replace(',', ''))
-                        dates.append(date_obj)
-                        values.append(value)
-                    except:
-                        pass
-        except:
-            continue
-    
-    return dates, values
-
-# Parse old data
-old_dates, old_values = parse_data(old_date_columns, old_production_row)
-
-# Parse new data
-new_dates, new_values = parse_data(new_date_columns, new_production_row)
-
-# Combine the datasets, prioritizing newer data
-# Create a dictionary to store date -> value mapping
-combined_data = {}
-
-# Add old data first
-for date, value in zip(old_dates, old_values):
-    if pd.notna(value):
-        combined_data[date] = value
-
-# Overwrite with new data (this prioritizes newer file)
-for date, value in zip(new_dates, new_values):
-    if pd.notna(value):
-        combined_data[date] = value
+import calendar
+import os
+import sys
 
-# Filter data from 2003 onwards
-start_date = pd.to_datetime('2003-01-01')
-filtered_data = {date: value for date, value in combined_data.items() if date >= start_date}
-
-# Sort by date
-sorted_dates = sorted(filtered_data.keys())
-sorted_values = [filtered_data[date] for date in sorted_dates]
-
-# Convert to thousands of cubic metres (values are already in thousands)
-# Create the plot
-fig, ax = plt.subplots(figsize=(16, 8))
-
-# Plot the data
-ax.plot(sorted_dates, sorted_values, linewidth=1.5, color='black', alpha=0.8)
-
-# Add vertical lines for key events
-# Add vertical lines and shaded areas for key events
-ax.axvline(x=pd.to_datetime('2006-10-01'), color='#333333', linestyle='--', alpha=0.8, linewidth=2, label='SLA Start (Oct 2006)')  # Dark gray, dashed
-ax.axvspan(pd.to_datetime('2007-01-01'), pd.to_datetime('2009-12-31'), color='#666666', alpha=0.3, label='Financial Crisis (2007-2009)')  # Shaded area
-ax.axvline(x=pd.to_datetime('2015-10-01'), color='#666666', linestyle=':', alpha=0.8, linewidth=2, label='SLA End (Oct 2015)')  # Medium gray, dotted
-ax.axvline(x=pd.to_datetime('2016-11-01'), color='#999999', linestyle='-.', alpha=0.8, linewidth=2, label='Trump Elected (Nov 2016)')  # Light gray, dash-dot
-
-# Add legend
-ax.legend(loc='upper right', fontsize=17, framealpha=0.9)
-
-# Add title and labels
-ax.set_title('Total Lumber Production in Canada (2003-2025)', fontsize=24, fontweight='bold', pad=20)
-ax.set_xlabel('Year', fontsize=20)
-ax.set_ylabel('Production (thousands of cubic metres)', fontsize=20)
-
-# Format the x-axis
-ax.grid(True, alpha=0.3, linestyle='--', color='gray')
-
-# Format the plot
-plt.xticks(rotation=45, ha='right')
-plt.tight_layout()
-
-# Print summary statistics
-print("\n=== Lumber Production Summary Statistics ===")
-print(f"Time Period: {sorted_dates[0].strftime('%B %Y')} to {sorted_dates[-1].strftime('%B %Y')}")
-print(f"Mean Production: {np.mean(sorted_values):,.0f} thousand cubic metres")
-print(f"Maximum Production: {np.max(sorted_values):,.0f} thousand cubic metres ({sorted_dates[np.argmax(sorted_values)].strftime('%B %Y')})")
-print(f"Minimum Production: {np.min(sorted_values):,.0f} thousand cubic metres ({sorted_dates[np.argmin(sorted_values)].strftime('%B %Y')})")
-print(f"Latest (most recent): {sorted_values[-1]:,.0f} thousand cubic metres ({sorted_dates[-1].strftime('%B %Y')})")
-
-# Calculate year-over-year changes
-yearly_data = {}
-for date, value in zip(sorted_dates, sorted_values):
-    year = date.year
-    if year not in yearly_data:
-        yearly_data[year] = []
-    yearly_data[year].append(value)
-
-# Calculate annual averages
-annual_averages = {year: np.mean(values) for year, values in yearly_data.items()}
-print("\n=== Annual Average Production ===")
-for year in sorted(annual_averages.keys()):
-    print(f"{year}: {annual_averages[year]:,.0f} thousand cubic metres")
+import numpy as np
 
-# Save the plot to images folder
-plt.savefig('../images/lumber_output_graph.png', dpi=300, bbox_inches='tight')
-plt.close()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from softwood import figures, lazy, resample, results, seasonal, vintage
+from softwood.instrument import stage
+
+spec = figures.FIGURES['lumber_output_graph']
+PRODUCTION_ROW = spec['series'][0]['pattern']
+
+with stage('load'):
+    # The older dataset (2003-2018) and the newer dataset (2014-2025) as releases of one
+    # vintage store; only a new release is parsed and appended to the cache
+    releases = vintage.sync('lumber-output')
+
+with stage('clean'):
+    # The latest release of every cell, prioritizing newer data (blank cells keep the older value);
+    # quality indicators are split off the values and missing cells ('..', 'x', 'F') are dropped,
+    # from 2003 onwards (see softwood/figures.py)
+    combined = figures.data(spec)['Production']
+
+    sorted_dates = combined.index.to_timestamp()
+    sorted_values = combined.to_numpy()
+
+if lazy.rendering():
+    with stage('plot'):
+        # Plot production with the event markers
+        fig, ax = figures.plot(spec)
+
+with stage('summary'):
+    # Print summary statistics
+    print("\n=== Lumber Production Summary Statistics ===")
+    print(f"Time Period: {sorted_dates[0].strftime('%B %Y')} to {sorted_dates[-1].strftime('%B %Y')}")
+    print(f"Mean Production: {np.mean(sorted_values):,.0f} thousand cubic metres")
+    print(f"Maximum Production: {np.max(sorted_values):,.0f} thousand cubic metres ({sorted_dates[np.argmax(sorted_values)].strftime('%B %Y')})")
+    print(f"Minimum Production: {np.min(sorted_values):,.0f} thousand cubic metres ({sorted_dates[np.argmin(sorted_values)].strftime('%B %Y')})")
+    print(f"Latest (most recent): {sorted_values[-1]:,.0f} thousand cubic metres ({sorted_dates[-1].strftime('%B %Y')})")
+    results.stat('mean_production', np.mean(sorted_values), unit='thousand cubic metres')
+    results.stat('latest_production', sorted_values[-1], unit='thousand cubic metres', period=sorted_dates[-1])
+
+    # Calculate annual averages
+    annual_averages = resample.annual(combined)
+    print("\n=== Annual Average Production ===")
+    for period, value in annual_averages.items():
+        print(f"{period.year}: {value:,.0f} thousand cubic metres")
+
+    results.stat('annual_average_production', {p.year: v for p, v in annual_averages.items()}, unit='thousand cubic metres')
+
+with stage('filters'):
+    # Seasonal factors and cyclical component of log production (results are cached per series)
+    cycles = seasonal.cycle_summary(combined, adjust=True)
+    hp_cycle = cycles['hp_cycle'].dropna()
+    hamilton_cycle = cycles['hamilton_cycle'].dropna()
+
+    print("\n=== Seasonal Factors (X-11, % of seasonally adjusted level) ===")
+    factors = cycles['seasonal_factors']
+    print(f"Peak month: {calendar.month_name[factors.idxmax()]} ({factors.max():+.1f}%)")
+    print(f"Trough month: {calendar.month_name[factors.idxmin()]} ({factors.min():+.1f}%)")
+    results.stat('production_seasonal_factors', {calendar.month_abbr[m]: f for m, f in factors.items()}, unit='percent')
+
+    print("\n=== Cyclical Component (% deviation from trend) ===")
+    print(f"HP filter (lambda=129600): std {hp_cycle.std():.1f}%, latest {hp_cycle.iloc[-1]:+.1f}% ({hp_cycle.index[-1].strftime('%B %Y')})")
+    print(f"Hamilton filter (h=24, p=12): std {hamilton_cycle.std():.1f}%, latest {hamilton_cycle.iloc[-1]:+.1f}% ({hamilton_cycle.index[-1].strftime('%B %Y')})")
+    results.stat('production_hp_cycle_std', hp_cycle.std(), unit='percent')
+    results.stat('production_hamilton_cycle_std', hamilton_cycle.std(), unit='percent')
+    results.stat('production_latest_hp_cycle', hp_cycle.iloc[-1], unit='percent', period=hp_cycle.index[-1])
+
+with stage('vintages'):
+    # Revisions to production between the releases (real-time data matrix, period x release)
+    print("\n=== Data Vintages ===")
+    for release in releases.itertuples():
+        print(f"{release.release_date} ({release.table_id}): {release.added:,} cells added, {release.revised:,} revised")
+    history = vintage.history('lumber-output', PRODUCTION_ROW)
+    first, last = releases.iloc[0], releases.iloc[-1]
+    both = history.loc[last['first_period']:first['last_period']].dropna()
+    if len(releases) > 1 and not both.empty:
+        revision = (both.iloc[:, -1] / both.iloc[:, 0] - 1) * 100
+        print(f"Production revised in {(revision != 0).sum()} of {len(revision)} months published in both "
+              f"({revision.index[0].strftime('%B %Y')} to {revision.index[-1].strftime('%B %Y')}), "
+              f"mean {revision.mean():+.1f}%")
+        results.stat('mean_production_revision', revision.mean(), unit='percent')
+
+if lazy.rendering():
+    with stage('save'):
+        # Save the plot to images folder
+        figures.save(spec, fig)
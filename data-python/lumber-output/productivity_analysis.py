@@ -1,184 +1,76 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from datetime import datetime
-
-# Read employment data
-df_employment = pd.read_csv('employment/1410020201-eng.csv', skiprows=10)
-
-# Extract sawmill employment row
-sawmill_employment_row = df_employment[df_employment.iloc[:, 0].str.contains(r'Sawmills and wood preservation  \[3211\]', na=False, regex=True)]
-
-# Get years from employment data
-employment_years = [int(col) for col in df_employment.columns[1:] if col.strip() and col.strip().isdigit()]
-
-# Get employment values
-employment_values = []
-for year_col in [str(year) for year in employment_years]:
-    val = sawmill_employment_row[year_col].values[0] if len(sawmill_employment_row) > 0 else np.nan
-    
-    # Clean the value (remove quality indicators and convert to float)
-    if pd.notna(val):
-        val_str = str(val).replace('A', '').replace('B', '').replace('C', '').replace(',', '').strip()
-        try:
-            employment_values.append(float(val_str))
-        except:
-            employment_values.append(np.nan)
-    else:
-        employment_values.append(np.nan)
-
-# Read lumber output data (from the combined dataset)
-# We'll need to aggregate monthly data to annual
-df_old = pd.read_csv('lumber-output/1610004501-eng.csv', skiprows=9)
-df_new = pd.read_csv('lumber-output/1610001701-eng.csv', skiprows=9)
-
-# Get date columns and production data
-old_date_columns = [col for col in df_old.columns[1:] if col.strip() and not col.startswith('Unnamed')]
-new_date_columns = [col for col in df_new.columns[1:] if col.strip() and not col.startswith('Unnamed')]
-
-# Skip units row
-df_old = df_old.iloc[1:]
-df_new = df_new.iloc[1:]
-
-# Extract production rows
-old_production_row = df_old[df_old.iloc[:, 0].str.contains('Total softwood and hardwood, production', na=False, regex=False)]
-new_production_row = df_new[df_new.iloc[:, 0].str.contains('Total softwood and hardwood, production', na=False, regex=False)]
-
-# Parse production data
-def parse_production(date_columns, data_row):
-    dates = []
-    values = []
-    for col in date_columns:
-        try:
-            date_obj = pd.to_datetime(col, format='%B %Y')
-            if len(data_row) > 0 and col in data_row.columns:
-                val = data_row[col].values[0]
-                if pd.notna(val) and str(val).strip() and str(val) != '..':
-                    val_str = str(val).replace('r', '').replace('A', '').replace('B', '').replace('C', '').strip()
-                    try:
-                        value = float(val_str.replace(',', ''))
-                        dates.append(date_obj)
-                        values.append(value)
-                    except:
-                        pass
-        except:
-            continue
-    return dates, values
-
-old_dates, old_values = parse_production(old_date_columns, old_production_row)
-new_dates, new_values = parse_production(new_date_columns, new_production_row)
-
-# Combine production data, prioritizing newer data
-combined_data = {}
-for date, value in zip(old_dates, old_values):
-    if pd.notna(value):
-        combined_data[date] = value
-for date, value in zip(new_dates, new_values):
-    if pd.notna(value):
-        combined_data[date] = value
-
-# Aggregate monthly production to annual (sum for the year)
-annual_production = {}
-for date, value in combined_data.items():
-    year = date.year
-    if year not in annual_production:
-        annual_production[year] = []
-    annual_production[year].append(value)
-
-# Calculate annual totals (thousands of cubic metres)
-production_years = []
-production_totals = []
-for year in sorted(annual_production.keys()):
-    production_years.append(year)
-    production_totals.append(sum(annual_production[year]))
-
-# Align employment and production data
-# Find common years (starting from 2004)
-common_years = sorted(set(employment_years) & set(production_years))
-common_years = [year for year in common_years if year >= 2004]
-
-# Get aligned data
-aligned_employment = []
-aligned_production = []
-aligned_years = []
-for year in common_years:
-    emp_idx = employment_years.index(year)
-    prod_idx = production_years.index(year)
-    
-    emp_val = employment_values[emp_idx]
-    prod_val = production_totals[prod_idx]
-    
-    if not np.isnan(emp_val) and not np.isnan(prod_val) and emp_val > 0:
-        aligned_employment.append(emp_val)
-        aligned_production.append(prod_val)
-        aligned_years.append(year)
-
-if len(aligned_years) == 0:
-    print("\nERROR: No overlapping years with valid data!")
-    print(f"Check employment data: {list(zip(employment_years, employment_values))}")
-    exit(1)
-
-# Use aligned_years instead of common_years for the rest
-common_years = aligned_years
-
-# Calculate productivity (output per worker in thousands of cubic metres per person)
-productivity = np.array(aligned_production) / np.array(aligned_employment)
-
-# Create productivity index (earliest year = 100)
-productivity_index = (productivity / productivity[0]) * 100
-
-# Create the plot
-fig, ax = plt.subplots(figsize=(14, 7))
-
-# Plot the data
-ax.plot(common_years, productivity_index, linewidth=2, color='black')
-
-# Add vertical lines and shaded areas for key events
-ax.axvline(x=2006.75, color='#333333', linestyle='--', alpha=0.8, linewidth=2, label='SLA Start (Oct 2006)')  # Dark gray, dashed
-ax.axvspan(2007, 2009, color='#666666', alpha=0.3, label='Financial Crisis (2007-2009)')  # Shaded area for financial crisis
-ax.axvline(x=2015.75, color='#666666', linestyle=':', alpha=0.8, linewidth=2, label='SLA End (Oct 2015)') # Medium gray, dotted
-ax.axvline(x=2016.75, color='#999999', linestyle='-.', alpha=0.8, linewidth=2, label='Trump Elected (Nov 2016)') # Light gray, dash-dot
-
-# Add legend
-ax.legend(loc='upper left', fontsize=17, framealpha=0.9)
-
-# Add title and labels
-ax.set_title('Sawmill Productivity Index: Output per Worker (2004 = 100)', 
-             fontsize=21, fontweight='bold', pad=20)
-ax.set_xlabel('Year', fontsize=18)
-ax.set_ylabel('Productivity Index', fontsize=18)
-
-# Add a horizontal line at 100
-ax.axhline(y=100, color='gray', linestyle='--', alpha=0.5, linewidth=1)
-
-# Format the axes
-ax.grid(True, alpha=0.3, linestyle='--', color='gray')
-ax.set_xticks(common_years[::2])  # Show every other year
-ax.set_xticklabels(common_years[::2], rotation=45)
-
-plt.tight_layout()
-
-# Print summary statistics
-print("\n=== Sawmill Productivity Analysis ===")
-print(f"Time Period: {common_years[0]} to {common_years[-1]}")
-print(f"\nBase Year ({common_years[0]}):")
-print(f"  Employment: {aligned_employment[0]:,.0f} persons")
-print(f"  Production: {aligned_production[0]:,.0f} thousand cubic metres")
-print(f"  Productivity: {productivity[0]:.2f} thousand cubic metres per worker")
-print(f"  Index: 100.0")
-
-print(f"\nLatest Year ({common_years[-1]}):")
-print(f"  Employment: {aligned_employment[-1]:,.0f} persons")
-print(f"  Production: {aligned_production[-1]:,.0f} thousand cubic metres")
-print(f"  Productivity: {productivity[-1]:.2f} thousand cubic metres per worker")
-print(f"  Index: {productivity_index[-1]:.1f}")
-
-print(f"\nProductivity Change: {((productivity_index[-1] / 100) - 1) * 100:+.1f}%")
-
-print("\n=== Productivity Index by Year ===")
-for year, emp, prod, prod_val, idx in zip(common_years, aligned_employment, aligned_production, productivity, productivity_index):
-    print(f"{year}: {idx:6.1f} (Employment: {emp:>6,.0f}, Production: {prod:>7,.0f}, Output/Worker: {prod_val:.2f})")
-
-# Save the plot to images folder
-plt.savefig('../images/productivity_analysis.png', dpi=300, bbox_inches='tight')
-plt.close()
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from softwood import figures, lazy, results
+from softwood.instrument import stage
+
+spec = figures.FIGURES['productivity_analysis']
+
+# Base year of the productivity index
+BASE_YEAR = spec['series'][0]['productivity']
+
+with stage('load'):
+    # Read the employment table and the older and newer lumber output tables
+    for path in [figures.EMPLOYMENT] + figures.OUTPUT_TABLES:
+        figures.load(path)
+
+with stage('align'):
+    # Sawmill employment [3211] against production (the newer table where both have a month,
+    # monthly production summed to years) from the base year on; each year gets a confidence
+    # flag from the quality letters of the cells behind it (see softwood/figures.py)
+    aligned = figures.load(BASE_YEAR, 'productivity')
+    aligned_years = aligned.productivity.dropna()
+
+    if len(aligned_years) == 0:
+        results.warn('No overlapping years with valid employment and production data')
+        sawmill_employment = figures.data(figures.FIGURES['employment'])['Sawmills']
+        print("\nERROR: No overlapping years with valid data!")
+        print(f"Check employment data: {list(zip(sawmill_employment.index.year, sawmill_employment.tolist()))}")
+        sys.exit(1)
+
+    common_years = list(aligned.productivity.index.year)
+    aligned_employment = aligned.employment.to_numpy()
+    aligned_production = aligned.output.to_numpy()
+    confidence = aligned.confidence.tolist()
+
+    # Productivity (output per worker in thousands of cubic metres per person)
+    # and its chain-linked index (base year = 100)
+    per_worker = aligned.productivity.to_numpy()
+    productivity_index = aligned.index.to_numpy()
+
+if lazy.rendering():
+    with stage('plot'):
+        # Plot the index with the event markers, every other year on the x-axis
+        fig, ax = figures.plot(spec)
+
+with stage('summary'):
+    # Print summary statistics
+    print("\n=== Sawmill Productivity Analysis ===")
+    print(f"Time Period: {common_years[0]} to {common_years[-1]}")
+    print(f"\nBase Year ({common_years[0]}):")
+    print(f"  Employment: {aligned_employment[0]:,.0f} persons")
+    print(f"  Production: {aligned_production[0]:,.0f} thousand cubic metres")
+    print(f"  Productivity: {per_worker[0]:.2f} thousand cubic metres per worker")
+    print(f"  Index: 100.0")
+
+    print(f"\nLatest Year ({common_years[-1]}):")
+    print(f"  Employment: {aligned_employment[-1]:,.0f} persons")
+    print(f"  Production: {aligned_production[-1]:,.0f} thousand cubic metres")
+    print(f"  Productivity: {per_worker[-1]:.2f} thousand cubic metres per worker")
+    print(f"  Index: {productivity_index[-1]:.1f}")
+
+    print(f"\nProductivity Change: {((productivity_index[-1] / 100) - 1) * 100:+.1f}%")
+    results.stat('base_year', common_years[0])
+    results.stat('latest_productivity', per_worker[-1], unit='thousand cubic metres per worker', period=common_years[-1])
+    results.stat('latest_productivity_index', productivity_index[-1], period=common_years[-1])
+
+    print("\n=== Productivity Index by Year ===")
+    for year, emp, prod, prod_val, idx, conf in zip(common_years, aligned_employment, aligned_production, per_worker, productivity_index, confidence):
+        print(f"{year}: {idx:6.1f} (Employment: {emp:>6,.0f}, Production: {prod:>7,.0f}, Output/Worker: {prod_val:.2f}, Confidence: {conf})")
+    results.stat('productivity_confidence', dict(zip(common_years, confidence)))
+
+if lazy.rendering():
+    with stage('save'):
+        # Save the plot to images folder
+        figures.save(spec, fig)
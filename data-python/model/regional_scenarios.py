@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from softwood import figures, housing, lazy, model, regions, results
+from softwood.exports import destination_shares, load_monthly_totals
+from softwood.instrument import stage
+
+plt = lazy.module('matplotlib.pyplot')
+
+# Subsidy rates for the long-run comparison, the paths solved, and the months shown
+SUBSIDIES = [0.0, 0.05, 0.10, 0.15, 0.20]
+PLOTTED = [0.0, 0.10, 0.20]
+SHOWN = ('2017-01', '2035-12')
+
+with stage('calibrate'):
+    # Provinces, their lumber output shares and their exports to the US, from the export
+    # extract (export value by province stands in for output)
+    analytics = destination_shares(load_monthly_totals())
+    shares = analytics['province_share'].mean()
+    shares = shares[shares > 0].sort_values(ascending=False)
+    provinces = list(shares.index)
+    us_exports = (analytics['province_share'] * analytics['province_us_share'] / 100).mean()[shares.index]
+
+    # Construction shares from provincial housing starts; they follow lumber output when the
+    # download has no provinces (canada-housing-starts/3410015801-eng.csv covers Canada only)
+    starts = housing.select(housing.panel(), level='province').mean()
+    construction = starts.reindex(shares.index) if shares.index.isin(starts.index).all() else None
+    national = model.calibrate()
+    params = regions.calibrate(shares, construction=construction, exports=us_exports, national=national)
+    tau = model.tariff_path()
+
+with stage('solve'):
+    # Perfect-foresight paths of every province, each subsidy starting from the last solution
+    started = time.perf_counter()
+    solutions = {}
+    guess = None
+    for omega in PLOTTED:
+        solutions[omega] = regions.solve(params, tau, omega=omega, guess=guess)
+        guess = solutions[omega].y
+    elapsed = time.perf_counter() - started
+
+    # Long-run steady states under the final tariff for every subsidy, in one batch
+    started = time.perf_counter()
+    before, _ = regions.steady_levels(params)
+    after, after_national = regions.steady_levels(params, tau.iloc[-1], SUBSIDIES)
+    batch_elapsed = time.perf_counter() - started
+    long_run = (after['Y_W'] / before['Y_W'].iloc[0] - 1) * 100
+    long_run.index = SUBSIDIES
+
+    # Percent deviations of each province's lumber output from the pre-tariff steady state
+    deviations = {omega: (solution.regions['Y_W'] / before['Y_W'].iloc[0] - 1) * 100
+                  for omega, solution in solutions.items()}
+
+if lazy.rendering():
+    with stage('plot'):
+        fig, axes = plt.subplots(1, 2, figsize=(18, 7))
+        grays = ['#333333', '#888888', '#cccccc']
+
+        # Long-run change in lumber output by province
+        ax = axes[0]
+        width = 0.8 / len(PLOTTED)
+        positions = np.arange(len(provinces))
+        for k, (omega, color) in enumerate(zip(PLOTTED, grays)):
+            ax.bar(positions + (k - (len(PLOTTED) - 1) / 2) * width, long_run.loc[omega, provinces], width,
+                   color=color, edgecolor='black', label=f'Subsidy {omega:.0%}')
+        ax.axhline(y=0, color='black', linewidth=1)
+        ax.set_xticks(positions)
+        ax.set_xticklabels(provinces, rotation=30, ha='right', fontsize=12)
+        ax.set_title('Long-Run Lumber Output by Province', fontsize=20, fontweight='bold')
+        ax.set_ylabel('% from pre-tariff steady state', fontsize=16)
+        ax.legend(loc='upper left', fontsize=13, framealpha=0.9)
+        ax.grid(True, axis='y', alpha=0.3, linestyle='--', color='gray')
+
+        # Paths without the subsidy for the largest producers
+        ax = axes[1]
+        styles = ['-', '--', ':', '-.']
+        for province, style in zip(provinces, styles):
+            shown = deviations[0.0].loc[SHOWN[0]:SHOWN[1], province]
+            ax.plot(shown.index.to_timestamp(), shown.to_numpy(), linewidth=2, color='black', linestyle=style,
+                    label=province)
+        ax.axhline(y=0, color='gray', linewidth=1, alpha=0.5)
+        ax.set_title('Lumber Output without the Subsidy', fontsize=20, fontweight='bold')
+        ax.set_xlabel('Year', fontsize=16)
+        ax.set_ylabel('% from pre-tariff steady state', fontsize=16)
+        ax.legend(loc='lower left', fontsize=13, framealpha=0.9)
+        ax.grid(True, alpha=0.3, linestyle='--', color='gray')
+
+        plt.tight_layout()
+
+with stage('summary'):
+    n = len(provinces)
+    print(f"=== Regional Model ({n} provinces, {len(tau)} months, {5 * n + 2} unknowns a month) ===")
+    print(f"Solved {len(solutions)} paths in {elapsed:.2f}s "
+          f"(Newton iterations: {', '.join(str(s.iterations) for s in solutions.values())}); "
+          f"{len(SUBSIDIES) + 1} steady states in {batch_elapsed:.2f}s")
+
+    print(f"\n=== Long-Run Lumber Output vs. Pre-Tariff Steady State (tariff {tau.iloc[-1]:.1%}) ===")
+    print(f"{'Province':<20}{'Share':>8}{'To US':>8}" + ''.join(f"{f'{omega:.0%}':>9}" for omega in SUBSIDIES)
+          + f"{'Net sales':>12}")
+    trade = before['interregional'].iloc[0] / (before['P_W'] * before['Y_W']).iloc[0] * 100
+    for province in provinces:
+        cells = ''.join(f"{long_run.loc[omega, province]:>+8.1f}%" for omega in SUBSIDIES)
+        us = analytics['province_us_share'][province].mean()
+        print(f"{province:<20}{shares[province]:>7.1f}%{us:>7.1f}%{cells}{trade[province]:>+11.1f}%")
+        results.stat(f"long_run_output_{province.lower().replace(' ', '_')}", long_run.loc[0.0, province],
+                     unit='percent')
+    total = (after_national['Y_W'] / before['Y_W'].iloc[0].sum() - 1) * 100
+    us = us_exports.sum() / shares.sum() * 100
+    print(f"{'Canada':<20}{100:>7.1f}%{us:>7.1f}%" + ''.join(f"{value:>+8.1f}%" for value in total))
+    print("(Net sales: sales to other provinces less purchases from them, % of lumber revenue)")
+
+if lazy.rendering():
+    with stage('save'):
+        # Save the plot to images folder
+        path = figures.savefig('../images/model_regional_scenarios.png')
+
+        print(f"\nGraph saved to: {path}")
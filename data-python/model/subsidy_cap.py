@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from softwood import figures, lazy, model, occbin, results
+from softwood.instrument import stage
+
+plt = lazy.module('matplotlib.pyplot')
+
+# Reference economy: the AR5 tariff with a 20% subsidy, and a ceiling 5% above its spending
+TARIFF = 0.141
+SUBSIDY = 0.20
+CEILING = 1.05
+
+# Simulated export-demand paths: monthly AR(1) shocks for ten years, then no new shocks
+PATHS = 2000
+SHOCK_MONTHS = 120
+PERSISTENCE = 0.97
+VOLATILITY = 0.02
+HORIZON = 600
+
+with stage('linearize'):
+    # Linearize the stacked model once around the reference steady state
+    params = model.calibrate()
+    linear = occbin.linearize(params, tau=TARIFF, omega=SUBSIDY, periods=HORIZON)
+    ceiling = CEILING * linear.levels['G']
+
+with stage('shocks'):
+    # Export-demand paths (log deviations), each known in advance (perfect foresight)
+    rng = np.random.default_rng(2025)
+    innovations = np.zeros((PATHS, HORIZON))
+    innovations[:, :SHOCK_MONTHS] = rng.normal(0, VOLATILITY, (PATHS, SHOCK_MONTHS))
+    demand = np.zeros_like(innovations)
+    demand[:, 0] = innovations[:, 0]
+    for t in range(1, HORIZON):
+        demand[:, t] = PERSISTENCE * demand[:, t - 1] + innovations[:, t]
+    shocks = [{'demand': path} for path in demand]
+
+
+def summarize(solution):
+    """Months at the cap, months at the investment floor and the lowest effective subsidy of a path."""
+    return (int(solution.regimes['cap'].sum()), int(solution.regimes['investment'].sum()),
+            float(solution.path['omega'].min()), solution.converged)
+
+
+with stage('simulate'):
+    # Every path with the subsidy cap and the investment floor, over the worker processes
+    started = time.perf_counter()
+    summaries = pd.DataFrame(occbin.simulate(linear, shocks, summary=summarize, ceiling=ceiling),
+                             columns=['cap_months', 'floor_months', 'lowest_subsidy', 'converged'])
+    elapsed = time.perf_counter() - started
+
+    # The path with the most months at the cap, with and without it
+    worst = int(summaries['cap_months'].idxmax())
+    capped = occbin.solve(linear, demand=demand[worst], ceiling=ceiling)
+    uncapped = occbin.solve(linear, demand=demand[worst])
+    binding = summaries.loc[summaries['cap_months'] > 0, 'cap_months']
+
+if lazy.rendering():
+    with stage('plot'):
+        fig, axes = plt.subplots(1, 2, figsize=(18, 7))
+        months = np.arange(SHOCK_MONTHS + 60)
+
+        # Subsidy spending on the example path against the ceiling
+        ax = axes[0]
+        ax.plot(months, uncapped.path['G'].iloc[months] / linear.levels['G'] * 100, linewidth=2, color='#999999',
+                linestyle='--', label='Without the ceiling')
+        ax.plot(months, capped.path['G'].iloc[months] / linear.levels['G'] * 100, linewidth=2, color='black',
+                label='With the ceiling')
+        ax.axhline(y=CEILING * 100, color='black', linestyle=':', linewidth=1.5, label=f'Ceiling ({CEILING:.0%} of steady state)')
+        ax.set_title('Subsidy Spending, Path with Most Months Capped', fontsize=20, fontweight='bold')
+        ax.set_xlabel('Months', fontsize=16)
+        ax.set_ylabel('% of steady-state spending', fontsize=16)
+        ax.legend(loc='lower left', fontsize=13, framealpha=0.9)
+        ax.grid(True, alpha=0.3, linestyle='--', color='gray')
+
+        # Months at the ceiling across the simulated paths
+        ax = axes[1]
+        ax.hist(binding, bins=20, color='#666666', edgecolor='black')
+        ax.set_title(f'Months at the Ceiling ({len(binding)} of {PATHS} Paths)', fontsize=20, fontweight='bold')
+        ax.set_xlabel('Months with spending at the ceiling', fontsize=16)
+        ax.set_ylabel('Paths', fontsize=16)
+        ax.grid(True, alpha=0.3, linestyle='--', color='gray')
+
+        plt.tight_layout()
+
+with stage('summary'):
+    print(f"=== Subsidy Ceiling and Investment Floor ({PATHS} export-demand paths, {HORIZON} months) ===")
+    print(f"Reference: tariff {TARIFF:.1%}, subsidy {SUBSIDY:.0%}, ceiling {CEILING:.0%} of steady-state spending")
+    print(f"Solved in {elapsed:.2f}s ({elapsed / PATHS * 1000:.1f} ms per path); "
+          f"{len(linear.factors)} regime sequences factorized; "
+          f"{(~summaries['converged']).sum()} paths did not converge")
+    share = (summaries['cap_months'] > 0).mean()
+    print(f"Paths reaching the ceiling: {share:.1%} "
+          f"(mean {binding.mean() if len(binding) else 0:.1f} months when they do)")
+    print(f"Paths reaching the investment floor: {(summaries['floor_months'] > 0).mean():.1%}")
+    print(f"Lowest effective subsidy rate: {summaries['lowest_subsidy'].min():.1%}")
+    results.stat('ceiling_binding_share', share)
+    results.stat('lowest_effective_subsidy', summaries['lowest_subsidy'].min())
+
+if lazy.rendering():
+    with stage('save'):
+        # Save the plot to images folder
+        path = figures.savefig('../images/model_subsidy_cap.png')
+
+        print(f"\nGraph saved to: {path}")
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from softwood import figures, lazy, model, results
+from softwood.instrument import stage
+
+plt = lazy.module('matplotlib.pyplot')
+
+# Subsidy rates to compare, and the months shown in the figure
+SUBSIDIES = [0.0, 0.05, 0.10, 0.15, 0.20]
+PLOTTED = [0.0, 0.10, 0.20]
+SHOWN = ('2017-01', '2035-12')
+
+# Variables plotted: (title, column)
+PANELS = [
+    ('Lumber Output', 'Y_W'),
+    ('Lumber Exports', 'X'),
+    ('Domestic Lumber Use', 'W'),
+    ('Construction Output', 'Y_F'),
+]
+
+with stage('calibrate'):
+    # Model parameters (alpha from the sawmill revenue table) and the monthly tariff path
+    params = model.calibrate()
+    tau = model.tariff_path()
+
+with stage('solve'):
+    # Perfect-foresight paths for each subsidy rate, each starting from the last solution
+    started = time.perf_counter()
+    scenarios = {omega: dict(tau=tau, omega=omega) for omega in SUBSIDIES}
+    solutions = model.sweep(params, scenarios)
+    elapsed = time.perf_counter() - started
+
+    # Percent deviations from the steady state before the tariffs
+    baseline = model.steady_levels(params)
+    deviations = {omega: (solution.path / baseline - 1) * 100 for omega, solution in solutions.items()}
+
+if lazy.rendering():
+    with stage('plot'):
+        fig, axes = plt.subplots(2, 2, figsize=(16, 11), sharex=True)
+        styles = ['-', '--', ':']
+
+        for ax, (title, column) in zip(axes.ravel(), PANELS):
+            for omega, style in zip(PLOTTED, styles):
+                shown = deviations[omega].loc[SHOWN[0]:SHOWN[1], column]
+                ax.plot(shown.index.to_timestamp(), shown.to_numpy(), linewidth=2, color='black', linestyle=style,
+                        label=f'Subsidy {omega:.0%}')
+            ax.axhline(y=0, color='gray', linewidth=1, alpha=0.5)
+
+            # Add title and labels
+            ax.set_title(title, fontsize=20, fontweight='bold')
+            ax.set_ylabel('% from pre-tariff steady state', fontsize=14)
+            ax.grid(True, alpha=0.3, linestyle='--', color='gray')
+
+        for ax in axes[1]:
+            ax.set_xlabel('Year', fontsize=16)
+        axes[0, 0].legend(loc='lower left', fontsize=13, framealpha=0.9)
+        fig.suptitle('Tariff Path with and without the Lumber Subsidy (Perfect Foresight)',
+                     fontsize=22, fontweight='bold')
+        plt.tight_layout()
+
+with stage('summary'):
+    print(f"=== Perfect-Foresight Solutions ({len(tau)} months from {tau.index[0].strftime('%B %Y')}) ===")
+    print(f"Solved {len(solutions)} scenarios in {elapsed:.2f}s "
+          f"(Newton iterations: {', '.join(str(s.iterations) for s in solutions.values())})")
+    peak = tau.idxmax()
+    print(f"Weighted tariff: {tau.iloc[0]:.1%} to {tau.max():.1%} (from {peak.strftime('%B %Y')})")
+
+    print(f"\n=== Effects vs. Pre-Tariff Steady State ({peak.strftime('%B %Y')} / long run) ===")
+    print(f"{'Subsidy':<9}{'Output':>16}{'Exports':>16}{'Domestic':>16}{'Construction':>16}{'Cost/Constr.':>14}")
+    for omega, deviation in deviations.items():
+        now, later = deviation.loc[peak], deviation.iloc[-1]
+        path = solutions[omega].path
+        cost = path['G'].iloc[-1] / (path['Y_F'].iloc[-1] * path['P_F'].iloc[-1]) * 100
+        cells = ''.join(f" {now[c]:>+7.1f}/{later[c]:>+6.1f}%" for _, c in PANELS)
+        print(f"{omega:<9.0%}{cells}{cost:>13.1f}%")
+        results.stat(f'long_run_output_subsidy_{round(omega * 100)}', later['Y_W'], unit='percent')
+
+    # Subsidy that keeps long-run lumber output at its pre-tariff level
+    long_run = pd.Series({omega: deviation['Y_W'].iloc[-1] for omega, deviation in deviations.items()})
+    if long_run.min() <= 0 <= long_run.max() and long_run.is_monotonic_increasing:
+        offset = np.interp(0.0, long_run.to_numpy(), long_run.index.to_numpy())
+        print(f"\nSubsidy offsetting the long-run output loss: about {offset:.1%}")
+        results.stat('offsetting_subsidy', offset)
+
+if lazy.rendering():
+    with stage('save'):
+        # Save the plot to images folder
+        path = figures.savefig('../images/model_tariff_scenarios.png')
+
+        print(f"\nGraph saved to: {path}")
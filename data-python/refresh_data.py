@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Refresh the StatCan and FRED source tables from a data mirror.
+
+Checks the release date embedded in each table on the mirror (a local
+directory or an HTTP base URL, see softwood/refresh.py), downloads only
+the tables with a newer release, checks each download against its schema
+(softwood/schema.py) and appends new or revised cells to the columnar
+cache, one part per release, so earlier releases stay available for
+as-of queries (softwood/vintage.py). Without --source (or
+$SOFTWOOD_MIRROR) the cache is just synced with the local files.
+"""
+
+import argparse
+import os
+import sys
+
+from softwood import refresh
+
+
+def main():
+    """Refresh the source tables."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default=os.environ.get(refresh.MIRROR_ENV),
+                        help='mirror directory or base URL (default: $SOFTWOOD_MIRROR)')
+    parser.add_argument('--table', action='append', dest='tables', metavar='ID',
+                        help='only refresh this table ID (e.g. 18-10-0266-01) or FRED series; repeatable')
+    parser.add_argument('--force', action='store_true',
+                        help='download tables even if the mirror has no newer release, and compare whole tables with the cache')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report what would be downloaded without changing anything')
+    args = parser.parse_args()
+
+    if args.source:
+        print(f"Refreshing from: {args.source}")
+    else:
+        print("No mirror given; syncing the cache with the local files")
+
+    statuses = refresh.refresh(args.source, tables=args.tables, force=args.force, dry_run=args.dry_run)
+    if args.tables and not statuses:
+        print(f"No local table matches: {', '.join(args.tables)}")
+        sys.exit(1)
+
+    print(f"\n{'Table':<16}{'Local release':<16}{'Mirror release':<16}{'Action':<16}Cache")
+    for status in statuses:
+        local = status['local_release'].isoformat() if status['local_release'] else '-'
+        remote = status['remote_release'].isoformat() if status['remote_release'] else '-'
+        if args.dry_run or status['action'] == 'rejected':
+            cached = '-'
+        elif status['added'] or status['revised']:
+            cached = f"+{status['added']:,} cells, {status['revised']:,} revised"
+        else:
+            cached = 'current'
+        print(f"{status['id']:<16}{local:<16}{remote:<16}{status['action']:<16}{cached}")
+
+    updated = sum(1 for s in statuses if s['action'] in ('updated', 'would update'))
+    print(f"\n{updated} of {len(statuses)} table(s) {'would be ' if args.dry_run else ''}updated")
+
+    rejected = [s for s in statuses if s['action'] == 'rejected']
+    if rejected:
+        print(f"\n✗ REJECTED ({len(rejected)}), local copies left unchanged:")
+        for status in rejected:
+            print(f"  - {status['error']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
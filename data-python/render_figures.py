@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Render the declarative figures (softwood/figures.py) in one process.
+
+Each table is read once and each shared transform computed once across
+all of the figures, so this is the quick way to redraw the figures that
+have specs after a data refresh:
+
+    python render_figures.py                      # every figure in FIGURES
+    python render_figures.py material_comparison  # just the named ones
+    python render_figures.py --list
+"""
+
+import argparse
+import time
+
+from softwood import figures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('names', nargs='*', help='figures to render (default: all)')
+    parser.add_argument('--list', action='store_true', help='list the figure specs and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, spec in figures.FIGURES.items():
+            print(f"{name:<24}{spec['output']}")
+        return
+
+    unknown = [name for name in args.names if name not in figures.FIGURES]
+    if unknown:
+        parser.error(f"unknown figure(s): {', '.join(unknown)}; see --list")
+
+    started = time.perf_counter()
+    rendered = figures.render(args.names or None)
+    for name, frame in rendered.items():
+        print(f"{name}: {len(frame)} periods x {frame.shape[1]} series -> {figures.FIGURES[name]['output']}")
+    print(f"Rendered {len(rendered)} figures in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
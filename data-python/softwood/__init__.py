@@ -0,0 +1,7 @@
+"""
+Shared helpers for the softwood lumber data scripts.
+
+The graph scripts in the sibling folders are run from the data-python
+directory (see generate_all_graphs.py) and import this package by adding
+data-python to sys.path.
+"""
@@ -0,0 +1,253 @@
+"""
+Columnar on-disk cache for parsed tables.
+
+Each cached table lives in its own directory under the cache root
+(data-python/.cache by default, or $SOFTWOOD_CACHE_DIR):
+
+    .cache/<name>/manifest.json
+    .cache/<name>/part-00000.parquet
+    .cache/<name>/part-00001.parquet
+    ...
+
+Tables are stored as parquet when pyarrow is installed and as pandas
+pickles otherwise; both keep the data column by column. A table is a
+sequence of append-only parts, so refreshes can add new periods without
+rewriting what is already cached. The manifest records the parts, the
+signatures of the source files the table was built from, and free-form
+metadata such as release dates.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+CACHE_ENV = 'SOFTWOOD_CACHE_DIR'
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+
+try:
+    import pyarrow  # noqa: F401
+    FORMAT = 'parquet'
+except ImportError:
+    FORMAT = 'pickle'
+
+
+def cache_root():
+    """Return the cache root directory."""
+    return os.environ.get(CACHE_ENV, DEFAULT_ROOT)
+
+
+def _table_dir(name):
+    return os.path.join(cache_root(), name)
+
+
+def _manifest_path(name):
+    return os.path.join(_table_dir(name), 'manifest.json')
+
+
+def source_signature(path):
+    """Return a cheap signature (size and mtime) for a source file."""
+    st = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def frame_hash(frame):
+    """Return a stable content hash for a DataFrame or Series."""
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    if isinstance(frame, pd.DataFrame):
+        digest.update('\x1f'.join(map(str, frame.columns)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def slug(text):
+    """Return text as a lowercase name safe for a cache directory ('Canada, total' -> 'canada-total')."""
+    return re.sub(r'[^a-z0-9]+', '-', str(text).lower()).strip('-') or 'unnamed'
+
+
+def read_manifest(name):
+    """Return the manifest dict for a cached table, or None if not cached."""
+    try:
+        with open(_manifest_path(name), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(name, manifest):
+    path = _manifest_path(name)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _flatten(frame):
+    """Move the index into columns so every format can store it."""
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame()
+    names = [n if n is not None else f'level_{i}' for i, n in enumerate(frame.index.names)]
+    flat = frame.copy()
+    flat.index.names = names
+    flat.columns = [str(c) for c in flat.columns]
+    return flat.reset_index(), names, [str(c) for c in frame.columns]
+
+
+def _write_part(name, frame, part_number):
+    flat, index_names, columns = _flatten(frame)
+    suffix = '.parquet' if FORMAT == 'parquet' else '.pkl'
+    filename = f'part-{part_number:05d}{suffix}'
+    path = os.path.join(_table_dir(name), filename)
+    if FORMAT == 'parquet':
+        flat.to_parquet(path, index=False)
+    else:
+        flat.to_pickle(path)
+    return {'file': filename, 'rows': len(flat), 'hash': frame_hash(frame)}, index_names, columns
+
+
+def _read_part(name, part):
+    path = os.path.join(_table_dir(name), part['file'])
+    if part['file'].endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def write(name, frame, sources=(), meta=None, part_meta=None):
+    """Replace a cached table with frame.
+
+    part_meta is stored with the part in the manifest (e.g. the release
+    the rows came from).
+    """
+    os.makedirs(_table_dir(name), exist_ok=True)
+    old = read_manifest(name)
+    part, index_names, columns = _write_part(name, frame, 0)
+    part.update(part_meta or {})
+    manifest = {
+        'name': name,
+        'format': FORMAT,
+        'index': index_names,
+        'columns': columns,
+        'parts': [part],
+        'sources': [source_signature(p) for p in sources],
+        'meta': meta or {},
+        'updated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    _write_manifest(name, manifest)
+    # Remove parts left over from the previous version of the table
+    if old:
+        for stale in old['parts']:
+            if stale['file'] != part['file']:
+                try:
+                    os.remove(os.path.join(_table_dir(name), stale['file']))
+                except OSError:
+                    pass
+
+
+def append(name, frame, sources=None, meta=None, part_meta=None):
+    """Append frame to a cached table as a new part (creates the table if needed)."""
+    manifest = read_manifest(name)
+    if manifest is None:
+        write(name, frame, sources=sources or (), meta=meta, part_meta=part_meta)
+        return
+    number = max(int(p['file'][5:10]) for p in manifest['parts']) + 1 if manifest['parts'] else 0
+    part, _, _ = _write_part(name, frame, number)
+    part.update(part_meta or {})
+    manifest['parts'].append(part)
+    if sources is not None:
+        manifest['sources'] = [source_signature(p) for p in sources]
+    if meta:
+        manifest['meta'].update(meta)
+    manifest['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    _write_manifest(name, manifest)
+
+
+def restamp(name, sources=None, meta=None):
+    """Update a cached table's source signatures and metadata without adding a part."""
+    manifest = read_manifest(name)
+    if manifest is None:
+        return
+    if sources is not None:
+        manifest['sources'] = [source_signature(p) for p in sources]
+    if meta:
+        manifest['meta'].update(meta)
+    manifest['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    _write_manifest(name, manifest)
+
+
+def read(name, parts=None):
+    """Read a cached table (all parts, or the first `parts` parts) or None if not cached."""
+    manifest = read_manifest(name)
+    if manifest is None:
+        return None
+    selected = manifest['parts'] if parts is None else manifest['parts'][:parts]
+    frames = [_read_part(name, p) for p in selected]
+    flat = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    frame = flat.set_index(manifest['index'])
+    if manifest['index'] == ['level_0']:
+        frame.index.name = None
+    return frame
+
+
+def read_parts(name, select=None):
+    """Return [(part, frame)] for the parts of a cached table that select(part) accepts (default all).
+
+    part is the part's manifest entry, with the metadata it was written
+    with (e.g. its release date). Returns None if the table is not cached.
+    """
+    manifest = read_manifest(name)
+    if manifest is None:
+        return None
+    selected = [p for p in manifest['parts'] if select is None or select(p)]
+    return [(p, _read_part(name, p).set_index(manifest['index'])) for p in selected]
+
+
+def read_if(name, **meta):
+    """Return the cached table if its manifest metadata has all the given values, else None.
+
+    Caches keyed by a stable name (a series rather than a hash of its
+    data) store the data hash in their metadata and are replaced when it
+    changes, so superseded versions do not pile up.
+    """
+    manifest = read_manifest(name)
+    if manifest is None or any(manifest.get('meta', {}).get(k) != v for k, v in meta.items()):
+        return None
+    return read(name)
+
+
+def is_fresh(name, sources):
+    """True if the table is cached and built from these exact source files."""
+    manifest = read_manifest(name)
+    if manifest is None:
+        return False
+    try:
+        current = [source_signature(p) for p in sources]
+    except OSError:
+        return False
+    return manifest['sources'] == current
+
+
+def cached(name, sources, build, meta=None):
+    """Return the cached table if its sources are unchanged, else build and cache it."""
+    if is_fresh(name, sources):
+        frame = read(name)
+        if frame is not None:
+            return frame
+    frame = build()
+    write(name, frame, sources=sources, meta=meta)
+    return frame
+
+
+def clear(name):
+    """Remove a cached table."""
+    manifest = read_manifest(name)
+    if manifest is None:
+        return
+    for part in manifest['parts']:
+        try:
+            os.remove(os.path.join(_table_dir(name), part['file']))
+        except OSError:
+            pass
+    os.remove(_manifest_path(name))
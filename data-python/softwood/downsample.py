@@ -0,0 +1,153 @@
+"""
+Downsampling of long series for display, and level-of-detail pyramids.
+
+A line drawn a few hundred pixels wide cannot show more than a few
+points per pixel, so a chart of a multi-decade daily series only needs a
+small subset of its points. Two reductions keep the shape:
+
+    lttb(x, y, n)      Largest-Triangle-Three-Buckets (Steinarsson 2013):
+                       the first and last points, and from each of n - 2
+                       buckets the point forming the largest triangle with
+                       the point kept before it and the mean of the next
+                       bucket. Follows the visual shape closely.
+    minmax(x, y, n)    the lowest and highest point of each of n / 2
+                       buckets, in x order, so no spike is ever lost.
+
+Both return indices into x, and skip NaN values.
+
+pyramid(x, y) precomputes the series at decreasing resolutions, each
+level the min-max reduction of the one below by `factor`, down to about
+`floor` points; every level keeps the extremes of the full series.
+query(levels, start, end, points) answers a zoomed view from the finest
+level that has at most points x factor points in the window (one point
+beyond each edge, so lines run to the edges of the view), reduced to
+`points` with LTTB or min-max. A view of any width then costs at most
+points x factor points of work, however long the series is.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('lttb', 'minmax')
+
+Level = namedtuple('Level', ['x', 'y'])
+
+
+def _finite(x, y):
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    keep = np.flatnonzero(~np.isnan(y))
+    return x[keep], y[keep], keep
+
+
+def _edges(size, buckets):
+    """Start positions of `buckets` nearly equal buckets of range(size), plus size."""
+    return np.linspace(0, size, buckets + 1).astype(np.int64)
+
+
+def lttb(x, y, n):
+    """Return the indices of the n points Largest-Triangle-Three-Buckets keeps (all if n >= len)."""
+    x, y, positions = _finite(x, y)
+    size = len(x)
+    if n >= size or size < 3:
+        return positions
+    if n < 3:
+        raise ValueError(f'lttb needs at least 3 points, not {n}')
+    # Buckets of the interior points; the first and last points are always kept
+    edges = _edges(size - 2, n - 2) + 1
+    sums_x = np.add.reduceat(x[1:-1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:-1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    mean_x = np.r_[sums_x / counts, x[-1]]
+    mean_y = np.r_[sums_y / counts, y[-1]]
+
+    chosen = np.empty(n, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, size - 1
+    a = 0
+    for bucket in range(n - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        # Twice the triangle area with the kept point a and the next bucket's mean
+        area = np.abs((x[a] - mean_x[bucket + 1]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (mean_y[bucket + 1] - y[a]))
+        a = lo + int(area.argmax())
+        chosen[bucket + 1] = a
+    return positions[chosen]
+
+
+def minmax(x, y, n):
+    """Return the indices of the lowest and highest point of each of n / 2 buckets (all if n >= len)."""
+    x, y, positions = _finite(x, y)
+    size = len(x)
+    if n >= size:
+        return positions
+    edges = _edges(size, max(n // 2, 1))
+    starts = edges[:-1]
+    bucket = np.repeat(np.arange(len(starts)), np.diff(edges))
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    # The first point of each bucket at its minimum and at its maximum
+    _, first_low = np.unique(bucket[y == lows[bucket]], return_index=True)
+    _, first_high = np.unique(bucket[y == highs[bucket]], return_index=True)
+    low = np.flatnonzero(y == lows[bucket])[first_low]
+    high = np.flatnonzero(y == highs[bucket])[first_high]
+    return positions[np.unique(np.r_[low, high])]
+
+
+def reduce(x, y, n, method='lttb'):
+    """Return the indices kept by the named method (see METHODS)."""
+    if method == 'lttb':
+        return lttb(x, y, n)
+    if method == 'minmax':
+        return minmax(x, y, n)
+    raise ValueError(f'Unknown method {method!r}; expected one of {METHODS}')
+
+
+def as_xy(series):
+    """Return (x, y) float arrays of a date- or period-indexed Series, x in milliseconds since 1970."""
+    index = series.index
+    if isinstance(index, pd.PeriodIndex):
+        index = index.to_timestamp()
+    x = pd.DatetimeIndex(index).as_unit('ms').asi8.astype('float64')
+    return x, series.to_numpy(dtype='float64')
+
+
+def pyramid(x, y, factor=4, floor=512):
+    """Return the levels (finest first) of a series' level-of-detail pyramid (see the module docstring)."""
+    x, y, _ = _finite(x, y)
+    levels = [Level(x, y)]
+    while len(levels[-1].x) > floor * factor:
+        finer = levels[-1]
+        kept = minmax(finer.x, finer.y, len(finer.x) // factor)
+        levels.append(Level(finer.x[kept], finer.y[kept]))
+    return levels
+
+
+def query(levels, start=None, end=None, points=1000, method='lttb', factor=4):
+    """Return (x, y) of the points to draw for the window start <= x <= end (default all)."""
+    for level in levels:
+        lo = 0 if start is None else max(int(np.searchsorted(level.x, start, side='left')) - 1, 0)
+        hi = len(level.x) if end is None else min(int(np.searchsorted(level.x, end, side='right')) + 1, len(level.x))
+        if hi - lo <= points * factor:
+            break
+    x, y = level.x[lo:hi], level.y[lo:hi]
+    kept = reduce(x, y, points, method)
+    return x[kept], y[kept]
+
+
+def to_frame(pyramids):
+    """Flatten {name: levels} into one long DataFrame (series, level, x, y) for the cache."""
+    parts = [pd.DataFrame({'series': name, 'level': number, 'x': level.x, 'y': level.y})
+             for name, levels in pyramids.items() for number, level in enumerate(levels)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def from_frame(frame):
+    """Rebuild {name: levels} from to_frame()'s output, in the order the series were stored."""
+    pyramids = {}
+    for name in pd.unique(frame['series']):
+        rows = frame[frame['series'] == name]
+        pyramids[name] = [Level(group['x'].to_numpy(), group['y'].to_numpy())
+                          for _, group in rows.groupby('level', sort=True)]
+    return pyramids
@@ -0,0 +1,279 @@
+"""
+Event studies and structural-break tests around the softwood lumber
+policy dates.
+
+event_registry() lists the dates the figures mark by hand: the start and
+end of the 2006 Softwood Lumber Agreement, the first rate of each US
+administrative review (AR1-AR6, from tariffs/tariff-weights.csv) and the
+two Trump elections. An event is dated to its first full month.
+daily_tariff() expands the same file to the rate in effect each day.
+
+event_study(panel) fits, for every event and every series of an aligned
+monthly panel (softwood/panel.py),
+
+    y_t = a + b k + c D + d D k + u,   k = t - t0,  D = 1{t >= t0}
+
+over the months around the event, with y = 100 log(series) so c (the
+level shift) and d (the trend shift per month) are in percent. All
+event x series fits share one design matrix, so they are solved as one
+batch of weighted normal equations (missing months get zero weight).
+Standard errors are Newey-West, and the Chow F statistic compares the
+fit with a single line across the window.
+
+bai_perron(panel) estimates up to max_breaks breaks in the level and
+trend of every series without using the event dates: the SSR of every
+admissible segment comes from cumulative sums, the breaks from dynamic
+programming (Bai and Perron 2003), and the number of breaks from the
+LWZ or BIC criterion. Each break is reported with the nearest event.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from softwood import lazy
+
+stats = lazy.module('scipy.stats')
+
+DATA_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARIFF_WEIGHTS = os.path.join(DATA_ROOT, 'tariffs', 'tariff-weights.csv')
+FIXED_EVENTS = [
+    ('SLA start', '2006-10-12', 'agreement'),
+    ('SLA end', '2015-10-12', 'agreement'),
+    ('Trump elected', '2016-11-08', 'election'),
+    ('Trump reelected', '2024-11-05', 'election'),
+]
+
+
+def first_full_month(dates):
+    """Return the first full month on or after each date (the month itself if it starts on the 1st)."""
+    dates = pd.DatetimeIndex(dates)
+    months = dates.to_period('M')
+    return months + (dates.day > 1).astype(int)
+
+
+def event_registry(path=TARIFF_WEIGHTS):
+    """Return the policy events as a DataFrame indexed by name, in date order.
+
+    Columns: date, month (first full month), kind ('agreement',
+    'election' or 'tariff'), weighted_tariff and tariff_change (the
+    change in the weighted tariff rate, for the administrative reviews).
+    """
+    rows = [{'name': name, 'date': pd.Timestamp(date), 'kind': kind} for name, date, kind in FIXED_EVENTS]
+    weights = pd.read_csv(path, parse_dates=['start_date'])
+    weights['review'] = weights['event'].str.extract(r'^(AR\d+)', expand=False)
+    reviews = weights.dropna(subset=['review']).groupby('review', sort=False).first()
+    previous = 0.0
+    for review, entry in reviews.iterrows():
+        rows.append({'name': review, 'date': entry['start_date'], 'kind': 'tariff',
+                     'weighted_tariff': entry['weighted_tariff'],
+                     'tariff_change': entry['weighted_tariff'] - previous})
+        previous = entry['weighted_tariff']
+    registry = pd.DataFrame(rows).sort_values('date').set_index('name')
+    registry.insert(1, 'month', first_full_month(registry['date']))
+    return registry
+
+
+def daily_tariff(path=TARIFF_WEIGHTS, end=None):
+    """Return the weighted tariff rate in effect on every day from the first review to end (default today).
+
+    Days between a period's end date and the next period's start are NaN.
+    """
+    weights = pd.read_csv(path, parse_dates=['start_date', 'end_date']).sort_values('start_date')
+    days = pd.date_range(weights['start_date'].iloc[0], pd.Timestamp(end or pd.Timestamp.today()).normalize(),
+                         freq='D', name='date')
+    period = weights['start_date'].searchsorted(days, side='right') - 1
+    ends = weights['end_date'].to_numpy()[period]
+    rates = np.where(pd.isna(ends) | (days.to_numpy() <= ends), weights['weighted_tariff'].to_numpy()[period], np.nan)
+    return pd.Series(rates, index=days, name='weighted_tariff')
+
+
+def _prepare(panel, log):
+    values = panel.to_numpy(dtype='float64')
+    if log:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(values > 0, 100 * np.log(values), np.nan)
+    return values
+
+
+def _batched_ols(X, Y, W):
+    """Weighted least squares of every (event, series) column of Y on the shared design X.
+
+    X is (window, k); Y and W are (events, window, series). Returns
+    (beta, XtWX pseudo-inverse, residuals with zeros where W is 0, n).
+    """
+    Y0 = np.where(W > 0, Y, 0.0)
+    xtx = np.einsum('wi,ews,wj->esij', X, W, X)
+    xty = np.einsum('wi,ews->esi', X, W * Y0)
+    inverse = np.linalg.pinv(xtx)
+    beta = np.einsum('esij,esj->esi', inverse, xty)
+    resid = (Y0 - np.einsum('wi,esi->ews', X, beta)) * W
+    return beta, inverse, resid, W.sum(axis=1)
+
+
+def _newey_west(X, resid, inverse, lags):
+    """Newey-West covariance of every batched fit (Bartlett weights up to lags)."""
+    scores = np.einsum('wi,ews->eswi', X, resid)
+    meat = np.einsum('eswi,eswj->esij', scores, scores)
+    for lag in range(1, lags + 1):
+        weight = 1 - lag / (lags + 1)
+        gamma = np.einsum('eswi,eswj->esij', scores[:, :, lag:], scores[:, :, :-lag])
+        meat += weight * (gamma + np.swapaxes(gamma, -1, -2))
+    return inverse @ meat @ inverse
+
+
+def event_study(panel, events=None, pre=24, post=24, log=True, min_obs=6, hac_lags=None):
+    """Estimate level and trend shifts at every event for every series of panel in one batch.
+
+    panel has a monthly PeriodIndex and one column per series; events
+    defaults to event_registry(). Each fit uses the pre months before the
+    event month and the post months from it on, and needs min_obs
+    observed months on each side (otherwise its row is NaN). Events
+    closer together than the window are fitted one at a time, so a
+    window may contain other events' effects.
+
+    Returns a DataFrame indexed by (event, series) with level_shift,
+    level_se, level_p, trend_shift, trend_se, trend_p, chow_f, chow_p,
+    n_pre and n_post.
+    """
+    if events is None:
+        events = event_registry()
+    values = _prepare(panel, log)
+    n_periods, n_series = values.shape
+    offsets = np.arange(-pre, post)
+    window = len(offsets)
+
+    # One shared design: intercept, months from the event, post dummy, post trend
+    after = (offsets >= 0).astype('float64')
+    X = np.column_stack([np.ones(window), offsets, after, after * offsets])
+
+    # (event, window, series) blocks of the panel, with zero weight off the ends and at gaps
+    starts = panel.index.searchsorted(events['month'].to_numpy())
+    rows = starts[:, None] + offsets[None, :]
+    inside = (rows >= 0) & (rows < n_periods) & (events['month'].to_numpy() >= panel.index[0])[:, None]
+    Y = values[np.clip(rows, 0, n_periods - 1)]
+    W = (inside[:, :, None] & ~np.isnan(Y)).astype('float64')
+
+    n_pre = W[:, offsets < 0].sum(axis=1)
+    n_post = W[:, offsets >= 0].sum(axis=1)
+    usable = (n_pre >= min_obs) & (n_post >= min_obs)
+
+    beta, inverse, resid, n = _batched_ols(X, Y, W)
+    _, _, resid_r, _ = _batched_ols(X[:, :2], Y, W)
+    rss = (resid ** 2).sum(axis=1)
+    rss_r = (resid_r ** 2).sum(axis=1)
+    dof = np.maximum(n - X.shape[1], 1)
+
+    if hac_lags is None:
+        hac_lags = int(np.floor(4 * (window / 100) ** (2 / 9)))
+    covariance = _newey_west(X, resid, inverse, hac_lags) * (n / dof)[:, :, None, None]
+    se = np.sqrt(np.maximum(np.diagonal(covariance, axis1=-2, axis2=-1), 0.0))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = beta / se
+        p = 2 * stats.t.sf(np.abs(t), dof[:, :, None])
+        chow_f = ((rss_r - rss) / 2) / (rss / dof)
+    chow_p = stats.f.sf(chow_f, 2, dof)
+
+    columns = {
+        'level_shift': beta[:, :, 2], 'level_se': se[:, :, 2], 'level_p': p[:, :, 2],
+        'trend_shift': beta[:, :, 3], 'trend_se': se[:, :, 3], 'trend_p': p[:, :, 3],
+        'chow_f': chow_f, 'chow_p': chow_p,
+    }
+    index = pd.MultiIndex.from_product([events.index, panel.columns], names=['event', 'series'])
+    result = pd.DataFrame({name: np.where(usable, value, np.nan).ravel() for name, value in columns.items()},
+                          index=index)
+    result['n_pre'] = n_pre.ravel().astype(int)
+    result['n_post'] = n_post.ravel().astype(int)
+    return result
+
+
+def _segment_fits(values):
+    """Intercept, slope and SSR of a line fitted to every segment [i, j) of every series.
+
+    values is (periods, series) with NaN for missing months. Returns
+    arrays shaped (series, periods + 1, periods + 1) built from
+    cumulative sums, plus the observation counts.
+    """
+    n_periods = values.shape[0]
+    valid = ~np.isnan(values)
+    t = np.arange(n_periods, dtype='float64')[:, None]
+    y = np.where(valid, values - np.nanmean(values, axis=0), 0.0)
+    w = valid.astype('float64')
+
+    def sums(array):
+        cumulative = np.vstack([np.zeros((1, array.shape[1])), np.cumsum(array, axis=0)]).T
+        return cumulative[:, None, :] - cumulative[:, :, None]
+
+    n = sums(w)
+    st, stt = sums(w * t), sums(w * t * t)
+    sy, sty, syy = sums(y), sums(y * t), sums(y * y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (n * sty - st * sy) / (n * stt - st * st)
+        intercept = (sy - slope * st) / n
+        ssr = syy - intercept * sy - slope * sty
+    return intercept, slope, np.maximum(ssr, 0.0), n
+
+
+def bai_perron(panel, max_breaks=5, trim=0.15, log=True, criterion='lwz', events=None):
+    """Estimate breaks in the level and trend of every series of panel, with no dates given.
+
+    Each segment must hold at least trim of the series' observations.
+    The number of breaks (0 to max_breaks) minimises the LWZ criterion
+    (Liu, Wu and Zidek 1997, the more conservative choice with
+    autocorrelated monthly data) or, with criterion='bic', the BIC.
+
+    Returns a DataFrame with one row per series and break: the first
+    month of the new segment, the jump in the fitted line there
+    (level_shift) and the change in its slope (trend_shift), both in
+    percent with log=True, and the nearest event with the distance to
+    it in months. Series with no break get a row with break NaT.
+    """
+    if events is None:
+        events = event_registry()
+    values = _prepare(panel, log)
+    n_periods = values.shape[0]
+    intercept, slope, ssr, counts = _segment_fits(values)
+    observed = (~np.isnan(values)).sum(axis=0)
+    minimum = np.maximum(np.floor(trim * observed), 3)
+    ssr = np.where((counts >= minimum[:, None, None]) & ~np.isnan(ssr), ssr, np.inf)
+
+    # optimal[m][s, j]: least SSR of the first j periods of series s with m breaks
+    optimal = [ssr[:, 0, :]]
+    choice = [None]
+    for _ in range(max_breaks):
+        candidates = optimal[-1][:, :, None] + ssr
+        choice.append(candidates.argmin(axis=1))
+        optimal.append(candidates.min(axis=1))
+    total = np.stack([o[:, n_periods] for o in optimal], axis=1)
+
+    penalty = {'lwz': lambda n: 0.299 * np.log(n) ** 2.1, 'bic': np.log}[criterion]
+    rows = []
+    event_months = events['month']
+    for s, name in enumerate(panel.columns):
+        n = observed[s]
+        m_range = np.arange(max_breaks + 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            score = n * np.log(total[s] / n) + (3 * m_range + 2) * penalty(n)
+        score[~np.isfinite(total[s])] = np.inf
+        m = int(np.argmin(score))
+
+        edges = [n_periods]
+        for k in range(m, 0, -1):
+            edges.append(choice[k][s, edges[-1]])
+        edges = [0] + edges[::-1]
+        if m == 0:
+            rows.append({'series': name, 'break': pd.NaT, 'n_breaks': 0})
+        for k in range(1, m + 1):
+            before, at, end = edges[k - 1], edges[k], edges[k + 1]
+            level = (intercept[s, at, end] + slope[s, at, end] * at) - (intercept[s, before, at] + slope[s, before, at] * at)
+            # Date the break to the first observed month of the new segment
+            first = at + int(np.argmax(~np.isnan(values[at:end, s])))
+            month = panel.index[first]
+            distance = np.array([(month - e).n for e in event_months])
+            nearest = int(np.argmin(np.abs(distance)))
+            rows.append({'series': name, 'break': month, 'n_breaks': m, 'level_shift': level,
+                         'trend_shift': slope[s, at, end] - slope[s, before, at],
+                         'nearest_event': events.index[nearest], 'months_from_event': int(distance[nearest])})
+    return pd.DataFrame(rows)
@@ -0,0 +1,292 @@
+"""
+Streaming aggregation of trade-by-partner export extracts.
+
+The Canadian International Merchandise Trade web application exports one
+row per province x country x state, e.g. exports/raw-exports.csv:
+
+    Province,Country,State,Value ($),Quantity,Average unit price,Unit of measure
+
+A single-month download names its month in the preamble ("Domestic exports
+by province and trade partner - January 2017"); multi-month extracts carry a
+Period column instead. Extracts covering several years of monthly HS-4407
+data run to gigabytes, so they are read in fixed-size chunks and reduced to
+value and quantity totals by month x destination x province as they stream
+past. Memory use is bounded by the chunk size, not the file size.
+
+Each downloaded extract is aggregated once and kept in the columnar cache
+(softwood/cache.py); load_monthly_totals() stitches every downloaded month
+together and destination_shares() derives the monthly US versus rest of
+world shares, volume-weighted unit prices and province contributions from
+that one table.
+"""
+
+import csv
+import glob
+import hashlib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from softwood import cache, statcan
+from softwood.periods import parse_periods
+
+# Destination classification; every country not listed maps to DEFAULT_DESTINATION
+DESTINATIONS = {'United States': 'United States'}
+DEFAULT_DESTINATION = 'Rest of World'
+
+HEADER_PREFIX = 'Province,'
+PERIOD_COLUMNS = ('Period', 'Reference period', 'Month', 'Date')
+VALUE_COLUMN = 'Value ($)'
+QUANTITY_COLUMN = 'Quantity'
+KEYS = ['month', 'destination', 'province']
+
+# Where downloaded extracts are looked for (relative to data-python)
+EXTRACT_PATTERNS = ('exports/raw-exports*.csv', 'exports/extracts/*.csv')
+
+_MONTH_IN_TITLE = re.compile(r'([A-Z][a-z]+ \d{4})\s*,*\s*$')
+
+
+def destination_categories(destinations=None):
+    """Return the ordered destination categories for a classification."""
+    destinations = DESTINATIONS if destinations is None else destinations
+    return sorted(set(destinations.values()) | {DEFAULT_DESTINATION})
+
+
+def read_preamble(path, max_lines=50):
+    """Find the header row and the month named in an extract's preamble.
+
+    Returns (header_row_index, month) where month is a monthly pd.Period or
+    None if the preamble does not name one.
+    """
+    month = None
+    with open(path, encoding='utf-8-sig') as f:
+        for i, line in enumerate(f):
+            if i >= max_lines:
+                break
+            if line.startswith(HEADER_PREFIX):
+                return i, month
+            match = _MONTH_IN_TITLE.search(line.strip())
+            if match and month is None:
+                parsed = parse_periods([match.group(1)], fmt='statcan', freq='M')[0]
+                month = None if pd.isna(parsed) else parsed
+    raise ValueError(f"No '{HEADER_PREFIX}...' header row found in the first {max_lines} lines of {path}")
+
+
+def classify_destinations(countries, destinations=None):
+    """Map a country column to a destination Categorical without a row-wise apply.
+
+    The mapping is evaluated once per distinct country (the categories) and
+    broadcast to the rows through the category codes.
+    """
+    destinations = DESTINATIONS if destinations is None else destinations
+    categories = destination_categories(destinations)
+    countries = countries.astype('category')
+    per_country = countries.cat.categories.map(lambda c: destinations.get(c, DEFAULT_DESTINATION))
+    lookup = np.array([categories.index(d) for d in per_country] + [-1], dtype=np.int8)
+    # Code -1 (missing country) indexes the trailing -1, keeping it missing
+    codes = lookup[countries.cat.codes.to_numpy()]
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _period_column(columns):
+    for name in PERIOD_COLUMNS:
+        if name in columns:
+            return name
+    return None
+
+
+def _numeric(column):
+    """Convert a text column with optional thousands separators to float."""
+    return pd.to_numeric(column.str.replace(',', '', regex=False), errors='coerce').astype('float64')
+
+
+def _chunk_totals(chunk, month, period_column, destinations):
+    """Reduce one chunk to value/quantity totals by month x destination x province."""
+    chunk = chunk[chunk['Country'].notna() & chunk['Province'].notna()]
+    if chunk.empty:
+        return None
+
+    if period_column is not None:
+        # Parse each distinct period string once and broadcast through the codes
+        raw = chunk[period_column].astype('category')
+        parsed = parse_periods(raw.cat.categories, freq='M')
+        # Code -1 (blank period) takes NaT rather than wrapping to the last category
+        months = pd.Categorical(parsed.take(raw.cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT))
+    else:
+        if month is None:
+            raise ValueError('Extract has no period column and no month in its preamble')
+        months = pd.Categorical.from_codes(np.zeros(len(chunk), dtype=np.int8),
+                                           categories=pd.PeriodIndex([month]))
+
+    frame = pd.DataFrame({
+        'month': months,
+        'destination': classify_destinations(chunk['Country'], destinations),
+        'province': chunk['Province'].astype('category'),
+        'value': _numeric(chunk[VALUE_COLUMN]),
+        'quantity': _numeric(chunk[QUANTITY_COLUMN]),
+    })
+    frame = frame[frame['value'].notna()]
+    undated = frame['month'].isna().to_numpy()
+    if undated.any():
+        examples = chunk.loc[frame.index[undated], period_column].unique()[:3]
+        raise ValueError(f'{undated.sum():,} rows with a value have no month in {period_column!r} '
+                         f'(blank or unrecognised period, e.g. {list(examples)})')
+    return frame.groupby(KEYS, observed=True)[['value', 'quantity']].sum(min_count=1)
+
+
+def aggregate_extract(path, chunksize=250_000, destinations=None):
+    """Stream an export extract and return totals by month x destination x province.
+
+    The result is indexed by (month, destination, province) with 'value'
+    (dollars) and 'quantity' (unit of measure of the extract) columns.
+    """
+    header_row, month = read_preamble(path)
+    columns = pd.read_csv(path, skiprows=header_row, nrows=0, encoding='utf-8-sig').columns
+    period_column = _period_column(columns)
+    usecols = ['Province', 'Country', VALUE_COLUMN, QUANTITY_COLUMN]
+    if period_column is not None:
+        usecols.append(period_column)
+
+    totals = None
+    reader = pd.read_csv(path, skiprows=header_row, usecols=usecols, chunksize=chunksize,
+                         dtype={'Province': 'string', 'Country': 'string', VALUE_COLUMN: 'string',
+                                QUANTITY_COLUMN: 'string'},
+                         encoding='utf-8-sig')
+    for chunk in reader:
+        part = _chunk_totals(chunk, month, period_column, destinations)
+        if part is None:
+            continue
+        totals = part if totals is None else totals.add(part, fill_value=0)
+
+    if totals is None:
+        index = pd.MultiIndex.from_arrays([pd.PeriodIndex([], freq='M'), [], []], names=KEYS)
+        return pd.DataFrame({'value': [], 'quantity': []}, index=index)
+    return _plain_index(totals).sort_index()
+
+
+def _plain_index(totals):
+    """Replace the categorical index levels used while streaming with plain ones."""
+    levels = [totals.index.get_level_values(name) for name in KEYS]
+    index = pd.MultiIndex.from_arrays([
+        pd.PeriodIndex(levels[0].astype(object), freq='M'),
+        levels[1].astype(str),
+        levels[2].astype(str),
+    ], names=KEYS)
+    return totals.set_axis(index)
+
+
+def aggregate_extracts(paths, chunksize=250_000, destinations=None):
+    """Aggregate several extracts (e.g. one download per month) into one table."""
+    totals = None
+    for path in paths:
+        part = aggregate_extract(path, chunksize=chunksize, destinations=destinations)
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    if totals is None:
+        raise ValueError('No extracts to aggregate')
+    return totals.sort_index()
+
+
+def find_extracts(patterns=EXTRACT_PATTERNS):
+    """Return every downloaded extract matching the patterns, sorted by path."""
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(pattern))
+    return sorted(paths)
+
+
+def _cache_name(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+    return f'exports-{stem}-{digest}'
+
+
+def load_monthly_totals(paths=None, chunksize=250_000, destinations=None):
+    """Return totals by month x destination x province for every downloaded month.
+
+    Each extract is aggregated once and cached; later calls only re-read
+    extracts whose size or modification time changed.
+    """
+    paths = find_extracts() if paths is None else list(paths)
+    if not paths:
+        raise ValueError('No export extracts found')
+    parts = []
+    for path in paths:
+        def build(path=path):
+            return aggregate_extract(path, chunksize=chunksize, destinations=destinations)
+        if destinations is None:
+            parts.append(cache.cached(_cache_name(path), [path], build))
+        else:
+            parts.append(build())
+    totals = pd.concat(parts)
+    # The same month may appear in more than one download
+    if totals.index.has_duplicates:
+        totals = totals.groupby(level=KEYS).sum(min_count=1)
+    return totals.sort_index()
+
+
+def destination_shares(totals):
+    """Derive monthly destination analytics from month x destination x province totals.
+
+    Returns a dict of month-indexed DataFrames:
+      value, quantity    totals by destination
+      share              percent of each month's export value by destination
+      unit_price         volume-weighted unit price (total value / total quantity)
+                         by destination, plus 'All destinations'
+      province_share     percent of each month's export value by province
+      province_us_share  percent of each province's exports going to the US
+    """
+    by_destination = totals.groupby(level=['month', 'destination']).sum(min_count=1)
+    value = by_destination['value'].unstack('destination').fillna(0)
+    quantity = by_destination['quantity'].unstack('destination')
+    month_value = value.sum(axis=1)
+    month_quantity = quantity.sum(axis=1, min_count=1)
+
+    share = value.div(month_value, axis=0) * 100
+    unit_price = value / quantity.where(quantity > 0)
+    unit_price['All destinations'] = month_value / month_quantity.where(month_quantity > 0)
+
+    province_value = totals['value'].groupby(level=['month', 'province']).sum().unstack('province')
+    province_share = province_value.div(month_value, axis=0) * 100
+    destinations = totals.index.get_level_values('destination')
+    us_value = (totals['value'][destinations == 'United States']
+                .groupby(level=['month', 'province']).sum()
+                .unstack('province')
+                .reindex(index=province_value.index, columns=province_value.columns, fill_value=0))
+    province_us_share = us_value / province_value.where(province_value > 0) * 100
+
+    return {
+        'value': value,
+        'quantity': quantity,
+        'share': share,
+        'unit_price': unit_price,
+        'province_share': province_share,
+        'province_us_share': province_us_share,
+    }
+
+
+def read_series(path):
+    """Read a CIMT monthly series download as a statcan.Table with one row.
+
+    The row is labelled with the first line of the preamble (the
+    commodity) and the units with the line above the first month. Lines
+    that do not start with a month (the preamble, notes and the citation
+    at the end) are skipped.
+    """
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        rows = [row[:2] for row in csv.reader(f) if len(row) >= 2]
+    cells = pd.DataFrame(rows, columns=['period', 'value'])
+    periods = parse_periods(cells['period'], fmt='cimt')
+    months = np.flatnonzero(~periods.isna())
+    if len(months) == 0:
+        raise ValueError(f'No monthly rows in {path}')
+    label = rows[0][0].strip()
+    units = rows[months[0] - 1][1].strip() if months[0] > 0 else None
+    values = pd.to_numeric(cells['value'].iloc[months].str.replace(',', ''), errors='coerce').astype('float64')
+    values = pd.DataFrame([values.to_numpy()], index=pd.Index([label]),
+                          columns=pd.PeriodIndex(periods[months], name='period'))
+    values = values.sort_index(axis=1)
+    flags = pd.DataFrame('', index=values.index, columns=values.columns)
+    meta = {'path': path, 'title': label, 'units': units, 'freq': 'M'}
+    return statcan.Table(meta, values, flags, units, statcan.label_codes(values.index))
@@ -0,0 +1,749 @@
+"""
+Declarative figure specifications and the engine that renders them.
+
+Most figure scripts do the same work: read a StatCan table, take a few
+rows, keep the months from 2003, maybe rebase them to 100, plot them
+with the event markers, print a summary and save the figure at 300 dpi.
+A figure spec records everything except the summary, e.g.
+
+    'material_comparison': {
+        'output': '../images/material_comparison.png',
+        'title': 'Construction Material Price Indices ({start:%B %Y}=100)',
+        'series': [
+            {'name': 'Lumber', 'label': 'Softwood Lumber',
+             'table': 'prices/1810026601-eng.csv', 'code': '24112'},
+            {'name': 'Steel', 'label': 'Fabricated Steel',
+             'table': 'prices/1810026601-eng.csv', 'code': '46611',
+             'style': {'color': 'gray', 'linestyle': '--'}},
+        ],
+        'align': 'unflagged',
+        'transforms': [('since', '2003-01'), ('rebase',)],
+        'hline': 100,
+    }
+
+A series reads its row from one of the SOURCES:
+
+    'table'         a StatCan table (a path)
+    'store'         a vintage store, its latest values with blank cells filled (vintage.py)
+    'cimt'          a CIMT monthly series download (exports.read_series())
+    'fred'          a FRED series download such as HOUST.csv
+    'gdp'           the GDP by industry analytics (gdp.py); 'part' picks
+                    'values' (the default) or 'shares'
+    'revenue'       the sawmill revenue decomposition (revenue.py), one row per line
+    'tariff'        the weighted tariff rate in effect each day (events.daily_tariff())
+    'extracts'      the export extracts by destination (exports.destination_shares());
+                    'part' picks 'value' (the default), 'share', ...
+    'productivity'  sawmill output per worker from a base year (productivity.py):
+                    rows output, employment, productivity and index
+
+and names the row by classification code ('code'), by a pattern in its
+label ('pattern', with 'regex') or by its exact label ('row'); a source
+with a single row needs none. A table with several series per period
+(e.g. one per mode of transport) picks one with 'column', and
+'resample': ('Y', 'mean') aggregates a series to a lower frequency
+before it is aligned with the others. load() returns what a source
+reads (a statcan.Table, or the Analytics, Decomposition, ... of the
+modules above) so a script's summary can use the rest of it.
+
+'align' picks the periods kept before the transforms: 'any' (periods
+where any series has a value, the default), 'all' (every series has a
+value) or 'unflagged' (every series has a value without a quality
+flag). The transforms run in order:
+
+    ('since', '2003-01')          drop the months before a period
+    ('until', '2019-12')          drop the months after a period
+    ('rebase',)                   index each series to 100 in the first period
+    ('rebase', '2020-01', 100)    ... or in a given period
+    ('share',)                    each series as a % of the row total
+    ('share', 'Total')            ... or of the named series
+    ('resample', 'Y', 'mean')     aggregate to a lower frequency (resample.py)
+    ('scale', 100)                multiply every series by a factor
+    ('residuals', 'y', 'x')       replace series y by its residuals from a
+                                  least-squares line on series x
+
+'kind' is the chart drawn from the data:
+
+    'line'     every series over time (the default)
+    'bar'      horizontal bars of every series in one period ('period',
+               default the last), largest at the bottom; 'values' =
+               (format, offset) writes each value next to its bar
+    'pie'      the series' shares of one period ('period', default the last)
+    'scatter'  series 'y' against series 'x' (default against time); 'fit'
+               adds the least-squares line with its equation
+
+'events' are vertical lines, or shaded spans when they have an 'end',
+drawn when they fall inside the plotted periods. 'hline' is a horizontal
+line at a value, or a dict with its 'y' (a value or 'mean', the mean of
+the first series), 'label' (formatted with {y}) and 'style'. The title
+and axis labels may name the first and last plotted periods as {start}
+and {end}. 'fontsize' sets the title and axis label sizes (a third size
+sets the y label apart), 'xticks' marks every n-th period instead of
+letting matplotlib choose, 'rotation' turns the x tick labels (default
+45 degrees on line charts), 'xformat' and 'yformat' format the tick
+values ('${x:.1f}B', or (format, divisor)) and a 'legend' of None draws
+none.
+
+FIGURES is keyed by figure name, which is the name of the script that
+prints the figure's summary unless the spec names its 'script'. Within
+a process, every source is read once and every prefix of a series'
+transforms is computed once, so figures that share a table or a
+transform (and a script's summary, which asks for the same data) reuse
+the work. render() draws and saves any number of figures in one pass;
+render_figures.py renders every spec in FIGURES, and generate_all_graphs.py
+renders the figures of the scripts it runs with a single render() call
+and then runs those scripts' summaries in the same process.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from softwood import events, exports, gdp, lazy, productivity, resample, results, revenue, statcan, vintage
+from softwood.periods import parse_periods
+
+plt = lazy.module('matplotlib.pyplot')
+
+DPI = 300
+DPI_ENV = 'SOFTWOOD_FIGURE_DPI'
+DIR_ENV = 'SOFTWOOD_FIGURE_DIR'
+
+PRICES = 'prices/1810026601-eng.csv'
+EMPLOYMENT = 'employment/1410020201-eng.csv'
+# Lumber production, older table first; the newer one wins where both have a month
+OUTPUT_TABLES = ['lumber-output/1610004501-eng.csv', 'lumber-output/1610001701-eng.csv']
+PRODUCTION_ROW = 'Total softwood and hardwood, production'
+SAWMILLS_ROW = r'Sawmills and wood preservation  \[3211\]'
+
+# Softwood lumber agreement and market events marked on the time-series figures
+FINANCIAL_CRISIS = {'date': '2007-01-01', 'end': '2009-12-31', 'label': 'Financial Crisis (2007-2009)'}
+EVENTS = [
+    {'date': '2006-10-01', 'label': 'SLA Start (Oct 2006)',
+     'style': {'color': '#333333', 'linestyle': '--', 'alpha': 0.8, 'linewidth': 2}},
+    FINANCIAL_CRISIS,
+    {'date': '2015-10-01', 'label': 'SLA End (Oct 2015)',
+     'style': {'color': '#666666', 'linestyle': ':', 'alpha': 0.8, 'linewidth': 2}},
+    {'date': '2016-11-01', 'label': 'Trump Elected (Nov 2016)',
+     'style': {'color': '#999999', 'linestyle': '-.', 'alpha': 0.8, 'linewidth': 2}},
+]
+
+# Annual US housing starts (FRED HOUST, mean of the months) and Canadian lumber exports
+HOUSING_EXPORTS = [
+    {'name': 'Housing', 'label': 'US Housing Starts Index', 'fred': 'housing-starts/HOUST.csv',
+     'resample': ('Y', 'mean')},
+    {'name': 'Exports', 'label': 'Canadian Lumber Exports Index', 'table': 'exports/1610001801-eng.csv',
+     'row': 'Canada', 'column': 'Total lumber exports', 'style': {'color': 'gray', 'linestyle': '--'}},
+]
+
+BOXED_LEGEND = {'loc': 'best', 'fontsize': 17, 'frameon': True, 'fancybox': False, 'edgecolor': 'black'}
+
+FIGURES = {
+    'employment': {
+        'output': '../images/employment.png',
+        'title': 'Employment in Sawmills and Wood Preservation ({start:%Y}-{end:%Y})',
+        'ylabel': 'Number of Employees (Persons)',
+        'size': (12, 6),
+        'fontsize': (21, 18),
+        'series': [
+            {'name': 'Sawmills', 'table': EMPLOYMENT, 'code': '3211', 'style': {'label': None}},
+        ],
+        'events': EVENTS,
+        'xticks': 2,
+        'legend': {'loc': 'upper right', 'fontsize': 17, 'framealpha': 0.9},
+    },
+    'export_share_piechart': {
+        'output': '../images/export_share_piechart.png',
+        'kind': 'pie',
+        'title': 'Canadian Softwood Lumber Export Share by Destination\n({end:%B %Y})',
+        'size': (10, 8),
+        'series': [
+            {'name': 'Rest of World', 'extracts': exports.EXTRACT_PATTERNS, 'row': 'Rest of World',
+             'style': {'color': '#404040'}},
+            {'name': 'United States', 'extracts': exports.EXTRACT_PATTERNS, 'row': 'United States',
+             'style': {'color': '#BFBFBF'}},
+        ],
+        'legend': None,
+    },
+    'export_value_graph': {
+        'output': '../images/export_value_graph.png',
+        'title': 'Softwood Lumber Export Value and Volume Indices ({start:%B %Y}=100)',
+        'ylabel': 'Index ({start:%B %Y} = 100)',
+        'series': [
+            {'name': 'Value', 'label': 'Export Value Index', 'cimt': 'exports/value-exports.csv'},
+            {'name': 'Volume', 'label': 'Export Volume Index', 'cimt': 'exports/volume-exports.csv',
+             'style': {'color': 'gray', 'linestyle': '--'}},
+        ],
+        'align': 'all',
+        'transforms': [('rebase',)],
+        'hline': 100,
+        'legend': BOXED_LEGEND,
+    },
+    'forestry_gdp': {
+        'output': '../images/forestry_gdp.png',
+        'title': 'Agriculture, Forestry, Fishing and Hunting as % of Total GDP ({start:%Y}-{end:%Y})',
+        'ylabel': 'Percentage of Total GDP (%)',
+        'size': (14, 7),
+        'fontsize': (21, 18, 24),
+        'series': [
+            {'name': 'Forestry', 'gdp': gdp.GDP_PATH, 'part': 'shares', 'code': '11', 'style': {'label': None}},
+        ],
+        'hline': {'y': 'mean', 'label': 'Mean: {y:.2f}%',
+                  'style': {'color': 'gray', 'linestyle': '--', 'alpha': 0.5}},
+        'xticks': 2,
+        'legend': {},
+    },
+    'housing_exports_comparison': {
+        'output': '../images/housing_exports_comparison.png',
+        'title': 'US Housing Starts vs Canadian Lumber Exports ({start:%Y}=100)',
+        'ylabel': 'Index ({start:%Y} = 100)',
+        'series': HOUSING_EXPORTS,
+        'align': 'all',
+        'transforms': [('rebase',)],
+        'hline': 100,
+        'events': [FINANCIAL_CRISIS],
+        'rotation': 0,
+        'legend': BOXED_LEGEND,
+    },
+    'housing_exports_residuals': {
+        'script': 'housing_exports_comparison',
+        'output': '../images/housing_exports_residuals.png',
+        'kind': 'scatter',
+        'title': 'Residual Plot Over Time',
+        'ylabel': 'Residuals (thousand cubic metres)',
+        'size': (12, 8),
+        'series': HOUSING_EXPORTS,
+        'align': 'all',
+        'transforms': [('residuals', 'Exports', 'Housing')],
+        'y': 'Exports',
+        'hline': {'y': 0, 'style': {'color': 'gray', 'linestyle': '--', 'linewidth': 2}},
+        'legend': None,
+    },
+    'housing_exports_scatter': {
+        'script': 'housing_exports_comparison',
+        'output': '../images/housing_exports_scatter.png',
+        'kind': 'scatter',
+        'title': 'Linear Regression: Housing Starts vs Lumber Exports',
+        'xlabel': 'US Housing Starts (thousand units)',
+        'ylabel': 'Canadian Lumber Exports (thousand cubic metres)',
+        'size': (12, 8),
+        'series': HOUSING_EXPORTS,
+        'align': 'all',
+        'x': 'Housing',
+        'y': 'Exports',
+        'fit': True,
+        'legend': BOXED_LEGEND,
+    },
+    'housing_starts_graph': {
+        'output': '../images/canada_housing_starts.png',
+        'title': 'Canadian Housing Starts ({start:%Y}-{end:%Y})',
+        'ylabel': 'Housing Starts (thousands)',
+        'series': [
+            {'name': 'Canada', 'table': 'canada-housing-starts/3410015801-eng.csv', 'pattern': 'Canada',
+             'style': {'linewidth': 1.5, 'alpha': 0.8, 'label': None}},
+        ],
+        'legend': None,
+    },
+    'industry_comparison': {
+        'output': '../images/industry_comparison.png',
+        'kind': 'bar',
+        'title': 'Canadian Industry GDP Comparison ({end:%Y})',
+        'xlabel': 'GDP (millions of chained 2017 dollars)',
+        'ylabel': 'Industry',
+        'size': (14, 8),
+        'series': [
+            {'name': 'Construction', 'gdp': gdp.GDP_PATH, 'code': '23'},
+            {'name': 'Agriculture, forestry, fishing and hunting', 'gdp': gdp.GDP_PATH, 'code': '11'},
+        ],
+        # Most recent complete year (the latest column may be a partial year)
+        'period': '2024',
+        'values': ('${x:,.0f}M', 5000),
+        'xformat': ('${x:.0f}B', 1000),
+        'legend': None,
+    },
+    'lumber_output_graph': {
+        'output': '../images/lumber_output_graph.png',
+        'title': 'Total Lumber Production in Canada ({start:%Y}-{end:%Y})',
+        'ylabel': 'Production (thousands of cubic metres)',
+        'series': [
+            {'name': 'Production', 'store': 'lumber-output', 'pattern': PRODUCTION_ROW,
+             'style': {'linewidth': 1.5, 'alpha': 0.8, 'label': None}},
+        ],
+        'transforms': [('since', '2003-01')],
+        'events': EVENTS,
+        'legend': {'loc': 'upper right', 'fontsize': 17, 'framealpha': 0.9},
+    },
+    'lumber_price_graph': {
+        'output': '../images/lumber_price_graph.png',
+        'title': 'Softwood Lumber Price Index in Canada ({start:%Y}-{end:%Y})',
+        'ylabel': 'Price Index (January 2020 = 100)',
+        'size': (12, 7),
+        'series': [
+            {'name': 'Lumber', 'table': PRICES, 'code': '24112',
+             'style': {'linewidth': 1.5, 'alpha': 0.8, 'label': None}},
+        ],
+        'transforms': [('since', '2003-01')],
+        'events': [
+            {'date': '2020-03-01', 'label': 'COVID-19 Pandemic (Mar 2020)',
+             'style': {'color': '#666666', 'linestyle': ':', 'alpha': 0.8, 'linewidth': 2}},
+        ],
+        'legend': {'loc': 'upper left', 'fontsize': 17, 'framealpha': 0.9},
+    },
+    'material_comparison': {
+        'output': '../images/material_comparison.png',
+        'title': 'Construction Material Price Indices ({start:%B %Y}=100)',
+        'ylabel': 'Price Index ({start:%B %Y} = 100)',
+        'series': [
+            {'name': 'Lumber', 'label': 'Softwood Lumber', 'table': PRICES, 'code': '24112'},
+            {'name': 'Steel', 'label': 'Fabricated Steel', 'table': PRICES, 'code': '46611',
+             'style': {'color': 'gray', 'linestyle': '--'}},
+            {'name': 'Concrete', 'label': 'Ready-Mixed Concrete', 'table': PRICES, 'code': '46512',
+             'style': {'color': 'darkgray', 'linestyle': ':'}},
+        ],
+        'align': 'unflagged',
+        'transforms': [('since', '2003-01'), ('rebase',)],
+        'hline': 100,
+        'legend': BOXED_LEGEND,
+    },
+    'productivity_analysis': {
+        'output': '../images/productivity_analysis.png',
+        'title': 'Sawmill Productivity Index: Output per Worker ({start:%Y} = 100)',
+        'ylabel': 'Productivity Index',
+        'size': (14, 7),
+        'fontsize': (21, 18),
+        'series': [
+            {'name': 'Index', 'productivity': '2004', 'row': 'index', 'style': {'label': None}},
+        ],
+        'hline': {'y': 100, 'style': {'color': 'gray', 'linestyle': '--', 'alpha': 0.5, 'linewidth': 1}},
+        'events': EVENTS,
+        'xticks': 2,
+        'legend': {'loc': 'upper left', 'fontsize': 17, 'framealpha': 0.9},
+    },
+    'sawmill_revenue_graph': {
+        'output': '../images/sawmill_revenue_graph.png',
+        'title': 'Sawmill Revenue from Goods Manufactured in Canada ({start:%Y}-{end:%Y})',
+        'ylabel': 'Revenue (billions of dollars)',
+        'size': (12, 7),
+        'fontsize': (21, 18),
+        'series': [
+            {'name': 'Revenue', 'revenue': revenue.REVENUE_PATH, 'row': 'goods_revenue', 'style': {'label': None}},
+        ],
+        # Thousands of dollars to billions
+        'transforms': [('scale', 1e-6)],
+        'xticks': 1,
+        'rotation': 0,
+        'yformat': '${x:.1f}B',
+        'legend': None,
+    },
+    'tariff_timeline': {
+        'output': '../images/tariff_timeline.png',
+        'title': 'US Weighted Tariff Rate on Canadian Softwood Lumber ({start:%Y}-{end:%Y})',
+        'ylabel': 'Weighted Tariff Rate (%)',
+        'series': [
+            {'name': 'Tariff', 'tariff': events.TARIFF_WEIGHTS, 'style': {'label': None}},
+        ],
+        'transforms': [('until', '2025-11-26'), ('scale', 100)],
+        'events': EVENTS + [
+            {'date': '2024-11-01', 'label': 'Trump Reelected (Nov 2024)',
+             'style': {'color': '#333333', 'linestyle': '-.', 'alpha': 0.8, 'linewidth': 2}},
+        ],
+        'legend': {'loc': 'upper left', 'fontsize': 17, 'framealpha': 0.9},
+    },
+}
+
+LINE_STYLE = {'linewidth': 2, 'color': 'black'}
+HLINE_STYLE = {'color': 'black', 'linestyle': ':', 'linewidth': 1, 'alpha': 0.5}
+SPAN_STYLE = {'color': '#666666', 'alpha': 0.3}
+BAR_STYLE = {'color': 'black', 'edgecolor': 'black', 'linewidth': 1}
+BAR_TEXT_STYLE = {'va': 'center', 'fontsize': 22, 'fontweight': 'bold'}
+PIE_STYLE = {'autopct': '%1.1f%%', 'startangle': 90, 'textprops': {'fontsize': 20, 'weight': 'bold'},
+             'wedgeprops': {'edgecolor': 'black', 'linewidth': 1.5}}
+PIE_PERCENT_STYLE = {'color': 'white', 'fontsize': 21, 'weight': 'bold'}
+SCATTER_STYLE = {'color': 'black', 's': 50, 'alpha': 0.6, 'edgecolors': 'black', 'linewidth': 1}
+FIT_STYLE = {'color': 'gray', 'linewidth': 2, 'linestyle': '--'}
+
+_SOURCES = {}
+_TABLES = {}
+_FRAMES = {}
+
+
+def _as_table(values, path, codes=None):
+    """Wrap a row x period frame (or one period-indexed Series) as a statcan.Table without flags."""
+    if isinstance(values, pd.Series):
+        values = values.to_frame().T
+    values = values.copy()
+    values.columns.name = 'period'
+    flags = pd.DataFrame('', index=values.index, columns=values.columns)
+    if codes is None:
+        codes = statcan.label_codes(values.index)
+    meta = {'path': path, 'title': path, 'units': None, 'freq': values.columns.freqstr}
+    return statcan.Table(meta, values, flags, None, codes)
+
+
+def _read_store(store):
+    # A release not yet in the cache is appended first; cheap when nothing changed
+    vintage.sync(store)
+    return vintage.as_of(store, fill=True)
+
+
+def _read_fred(path):
+    frame = pd.read_csv(path)
+    column = frame.columns[1]
+    values = pd.to_numeric(frame[column], errors='coerce').astype('float64')
+    return _as_table(pd.Series(values.to_numpy(), name=column,
+                               index=parse_periods(frame['observation_date'], fmt='iso', freq='M')), path)
+
+
+def _read_extracts(patterns):
+    return exports.load_monthly_totals(exports.find_extracts(patterns))
+
+
+def _read_productivity(base):
+    # Monthly production summed to years against the sawmill employment
+    # row [3211], from the base year on; each year's confidence comes from
+    # the quality flags of the cells behind it
+    employment = load(EMPLOYMENT)
+    label = statcan.find_row(employment, SAWMILLS_ROW, regex=True)
+    output, flags = None, None
+    for path in OUTPUT_TABLES:
+        found = load(path)
+        row = statcan.find_row(found, PRODUCTION_ROW)
+        values = found.values.loc[row].dropna()
+        if output is None:
+            output, flags = values, found.flags.loc[row, values.index]
+        else:
+            output, flags = values.combine_first(output), found.flags.loc[row, values.index].combine_first(flags)
+    return productivity.productivity(output, employment.values.loc[label], flags, employment.flags.loc[label],
+                                     base=base, start=base)
+
+
+# How each kind of series source is read, and turned into a statcan.Table
+# when it reads something else (the part named by the series' 'part')
+SOURCES = {
+    'table': statcan.read_table,
+    'store': _read_store,
+    'cimt': exports.read_series,
+    'fred': _read_fred,
+    'gdp': gdp.analytics,
+    'revenue': revenue.decomposition,
+    'tariff': events.daily_tariff,
+    'extracts': _read_extracts,
+    'productivity': _read_productivity,
+}
+TABLES = {
+    'gdp': lambda found, path, part: _as_table(getattr(found, part or 'values'), path, codes=found.codes),
+    'revenue': lambda found, path, part: _as_table(
+        getattr(found, part or 'lines').set_axis(pd.PeriodIndex(found.lines.index.astype(str), freq='Y'), axis=0).T, path),
+    'tariff': lambda found, path, part: _as_table(found.set_axis(found.index.to_period('D')), path),
+    'extracts': lambda found, path, part: _as_table(exports.destination_shares(found)[part or 'value'].T, path),
+    'productivity': lambda found, path, part: _as_table(
+        pd.DataFrame({name: getattr(found, name) for name in ['output', 'employment', 'productivity', 'index']}).T,
+        path),
+}
+
+
+def source(series):
+    """Return the (kind, location) of the source a series spec reads (see SOURCES)."""
+    for kind in SOURCES:
+        if kind in series:
+            return kind, series[kind]
+    raise KeyError(f"Series {series['name']!r} names no source; expected one of {list(SOURCES)}")
+
+
+def load(path, kind='table'):
+    """Return what the source of a kind reads from path (see SOURCES), reading it once per process."""
+    if (kind, path) not in _SOURCES:
+        _SOURCES[(kind, path)] = SOURCES[kind](path)
+    return _SOURCES[(kind, path)]
+
+
+def table(series):
+    """Return the statcan.Table a series spec reads."""
+    kind, path = source(series)
+    key = (kind, path, series.get('part'))
+    if key not in _TABLES:
+        found = load(path, kind)
+        _TABLES[key] = TABLES[kind](found, path, series.get('part')) if kind in TABLES else found
+    return _TABLES[key]
+
+
+def row_label(series):
+    """Return the table row label a series spec refers to."""
+    found = table(series)
+    if series.get('code') is not None:
+        positions = np.flatnonzero(found.codes.to_numpy() == series['code'])
+        if len(positions) == 0:
+            raise KeyError(f"No row with code [{series['code']}] in {source(series)[1]}")
+        return found.values.index[positions[0]]
+    if series.get('row') is not None:
+        if series['row'] not in found.values.index:
+            raise KeyError(f"No row {series['row']!r} in {source(series)[1]}")
+        return series['row']
+    if series.get('pattern') is None and len(found.values) == 1:
+        return found.values.index[0]
+    return statcan.find_row(found, series['pattern'], regex=series.get('regex', False))
+
+
+def _series_key(spec):
+    return (tuple((s['name'], source(s), s.get('part'), s.get('code'), s.get('row'), s.get('pattern'),
+                   s.get('regex', False), s.get('column'), tuple(s.get('resample', ())))
+                  for s in spec['series']), spec.get('align', 'any'))
+
+
+def _cells(series):
+    """A series' values and whether each is usable (present and unflagged), by period."""
+    found = table(series)
+    label = row_label(series)
+    values, flags = found.values.loc[label], found.flags.loc[label]
+    if series.get('column') is not None:
+        values = values.xs(series['column'], level='series')
+        flags = flags.xs(series['column'], level='series')
+    usable = (flags == '') & values.notna()
+    if series.get('resample'):
+        values = resample.aggregate(values.dropna(), *series['resample'])
+        usable = values.notna()
+    return values, usable
+
+
+def _aligned(spec):
+    """The spec's series side by side (period x name), on the periods its 'align' keeps."""
+    values, usable = {}, {}
+    for series in spec['series']:
+        values[series['name']], usable[series['name']] = _cells(series)
+    frame = pd.DataFrame(values)
+    align = spec.get('align', 'any')
+    if align == 'any':
+        keep = frame.notna().any(axis=1)
+    elif align == 'all':
+        keep = frame.notna().all(axis=1)
+    elif align == 'unflagged':
+        keep = pd.DataFrame(usable).reindex(frame.index, fill_value=False).all(axis=1)
+    else:
+        raise ValueError(f"Unknown align {align!r}; expected 'any', 'all' or 'unflagged'")
+    frame = frame[keep.to_numpy()]
+    frame.index.name = 'period'
+    return frame
+
+
+def fit(x, y):
+    """Return the (slope, intercept, r_squared) of the least-squares line of y on x."""
+    x, y = np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    slope, intercept = np.polyfit(x, y, 1)
+    return slope, intercept, np.corrcoef(x, y)[0, 1] ** 2
+
+
+def _apply(frame, transform):
+    """Apply one transform tuple (see the module docstring) to a period x series frame."""
+    kind, args = transform[0], transform[1:]
+    if kind == 'since':
+        return frame[frame.index >= pd.Period(args[0], freq=frame.index.freq)]
+    if kind == 'until':
+        return frame[frame.index <= pd.Period(args[0], freq=frame.index.freq)]
+    if kind == 'rebase':
+        base = args[0] if args and args[0] is not None else None
+        value = args[1] if len(args) > 1 else 100
+        row = frame.iloc[0] if base is None else frame.loc[pd.Period(base, freq=frame.index.freq)]
+        return frame / row * value
+    if kind == 'share':
+        total = frame[args[0]] if args else frame.sum(axis=1, min_count=1)
+        return frame.div(total, axis=0) * 100
+    if kind == 'resample':
+        return resample.aggregate(frame, args[0], how=args[1] if len(args) > 1 else 'mean')
+    if kind == 'scale':
+        return frame * args[0]
+    if kind == 'residuals':
+        y, x = args
+        slope, intercept, _ = fit(frame[x], frame[y])
+        return frame.assign(**{y: frame[y] - (intercept + slope * frame[x])})
+    raise ValueError(f'Unknown transform {kind!r}')
+
+
+def data(spec, steps=None):
+    """Return a spec's data (period x series name) after its first `steps` transforms (default all).
+
+    Results are memoized per process, keyed by the series, the alignment
+    and the transforms applied, so shared prefixes are computed once.
+    """
+    transforms = [tuple(t) for t in spec.get('transforms', [])]
+    if steps is not None:
+        transforms = transforms[:steps]
+    key = _series_key(spec)
+    if key not in _FRAMES:
+        _FRAMES[key] = _aligned(spec)
+    frame = _FRAMES[key]
+    for count, transform in enumerate(transforms, start=1):
+        step = key + (tuple(transforms[:count]),)
+        if step not in _FRAMES:
+            _FRAMES[step] = _apply(frame, transform)
+        frame = _FRAMES[step]
+    return frame.copy()
+
+
+def period(spec, frame):
+    """Return the period a bar or pie chart shows: the spec's 'period', or the frame's last."""
+    if spec.get('period') is None:
+        return frame.index[-1]
+    shown = pd.Period(spec['period'], freq=frame.index.freq)
+    if shown not in frame.index:
+        raise KeyError(f'{shown} is not in the data ({frame.index[0]} to {frame.index[-1]})')
+    return shown
+
+
+def _text(template, dates):
+    return template.format(start=dates[0], end=dates[-1]) if template else template
+
+
+def _formatter(template):
+    template, divisor = template if isinstance(template, tuple) else (template, 1)
+    return plt.FuncFormatter(lambda x, p: template.format(x=x / divisor))
+
+
+def _labels(spec):
+    return {series['name']: series.get('label', series['name']) for series in spec['series']}
+
+
+def _line(ax, spec, frame):
+    dates = frame.index.to_timestamp()
+    for series in spec['series']:
+        style = dict(LINE_STYLE, label=series.get('label', series['name']))
+        style.update(series.get('style', {}))
+        column = frame[series['name']]
+        present = column.notna().to_numpy()
+        ax.plot(dates[present], column.to_numpy()[present], **style)
+    return dates
+
+
+def _bar(ax, spec, frame):
+    shown = period(spec, frame)
+    values = frame.loc[shown].dropna().sort_values(ascending=False)
+    labels = _labels(spec)
+    ax.barh([labels[name] for name in values.index], values.to_numpy(), **BAR_STYLE)
+    if spec.get('values'):
+        template, offset = spec['values']
+        for position, value in enumerate(values.to_numpy()):
+            ax.text(value + offset, position, template.format(x=value), **BAR_TEXT_STYLE)
+        # Room for the labels
+        ax.set_xlim(0, values.max() * 1.15)
+    ax.set_axisbelow(True)
+    return pd.DatetimeIndex([shown.to_timestamp()])
+
+
+def _pie(ax, spec, frame):
+    shown = period(spec, frame)
+    labels = _labels(spec)
+    names = [series['name'] for series in spec['series']]
+    colors = [series.get('style', {}).get('color') for series in spec['series']]
+    _, _, percents = ax.pie(frame.loc[shown, names].to_numpy(), labels=[labels[name] for name in names],
+                            colors=colors if all(colors) else None, **PIE_STYLE)
+    for percent in percents:
+        percent.set(**PIE_PERCENT_STYLE)
+    return pd.DatetimeIndex([shown.to_timestamp()])
+
+
+def _scatter(ax, spec, frame):
+    dates = frame.index.to_timestamp()
+    y = frame[spec['y']].to_numpy()
+    x = frame[spec['x']].to_numpy() if spec.get('x') else dates
+    ax.scatter(x, y, **SCATTER_STYLE)
+    if spec.get('fit'):
+        slope, intercept, r_squared = fit(x, y)
+        line = np.sort(x)
+        ax.plot(line, intercept + slope * line, label=f'y = {intercept:.0f} + {slope:.2f}x\nR² = {r_squared:.4f}',
+                **FIT_STYLE)
+    return dates
+
+
+# How each kind of chart is drawn; each returns the dates its title and labels refer to
+KINDS = {'line': _line, 'bar': _bar, 'pie': _pie, 'scatter': _scatter}
+
+
+def _hline(ax, hline, frame):
+    if not isinstance(hline, dict):
+        hline = {'y': hline}
+    y = hline['y']
+    if y == 'mean':
+        y = frame.iloc[:, 0].mean()
+    label = hline['label'].format(y=y) if hline.get('label') else None
+    ax.axhline(y=y, label=label, **hline.get('style', HLINE_STYLE))
+
+
+def plot(spec, frame=None):
+    """Draw a spec's figure and return (fig, ax); frame defaults to data(spec)."""
+    if frame is None:
+        frame = data(spec)
+    kind = spec.get('kind', 'line')
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}; expected one of {list(KINDS)}")
+    fig, ax = plt.subplots(figsize=spec.get('size', (16, 8)))
+    dates = KINDS[kind](ax, spec, frame)
+
+    if spec.get('hline') is not None:
+        _hline(ax, spec['hline'], frame)
+
+    sizes = spec.get('fontsize', (24, 20))
+    ax.set_title(_text(spec['title'], dates), fontsize=sizes[0], fontweight='bold', pad=20)
+    if kind != 'pie':
+        ax.set_xlabel(_text(spec.get('xlabel', 'Year'), dates), fontsize=sizes[1])
+        ax.set_ylabel(_text(spec.get('ylabel', ''), dates), fontsize=sizes[-1])
+        ax.grid(True, alpha=0.3, linestyle='--', color='gray', axis='x' if kind == 'bar' else 'both')
+
+    for event in spec.get('events', []):
+        start = pd.Timestamp(event['date'])
+        if 'end' in event:
+            end = pd.Timestamp(event['end'])
+            if end >= dates[0] and start <= dates[-1]:
+                ax.axvspan(start, end, label=event['label'], **dict(SPAN_STYLE, **event.get('style', {})))
+        elif dates[0] <= start <= dates[-1]:
+            ax.axvline(x=start, label=event['label'], **event.get('style', {}))
+
+    if spec.get('legend', {}) is not None:
+        ax.legend(**spec.get('legend', {}))
+    if spec.get('xticks'):
+        step = spec['xticks']
+        ax.set_xticks(dates[::step], labels=frame.index[::step].astype(str))
+    if kind == 'line':
+        plt.xticks(rotation=spec.get('rotation', 45), ha='right' if spec.get('rotation', 45) else 'center')
+    if spec.get('xformat'):
+        ax.xaxis.set_major_formatter(_formatter(spec['xformat']))
+    if spec.get('yformat'):
+        ax.yaxis.set_major_formatter(_formatter(spec['yformat']))
+    plt.tight_layout()
+    return fig, ax
+
+
+def savefig(path, fig=None):
+    """Save a figure (default the current one) at 300 dpi, record it as an output and close it.
+
+    $SOFTWOOD_FIGURE_DPI and $SOFTWOOD_FIGURE_DIR override the resolution
+    and the folder; check_figures.py renders low-resolution copies into a
+    scratch folder this way. Returns the path written.
+    """
+    if fig is None:
+        fig = plt.gcf()
+    if os.environ.get(DIR_ENV):
+        path = os.path.join(os.environ[DIR_ENV], os.path.basename(path))
+    fig.savefig(path, dpi=int(os.environ.get(DPI_ENV) or DPI), bbox_inches='tight')
+    results.output(path)
+    plt.close(fig)
+    return path
+
+
+def save(spec, fig=None):
+    """Save a spec's figure (default the current one) to its output; see savefig()."""
+    return savefig(spec['output'], fig)
+
+
+def script_figures(script):
+    """Return the names of the figures in FIGURES whose summary a script prints (script is its name)."""
+    return [name for name, spec in FIGURES.items() if spec.get('script', name) == script]
+
+
+def render(names=None, specs=FIGURES):
+    """Draw and save the named figures (default all of specs); returns {name: data}."""
+    rendered = {}
+    for name in (list(specs) if names is None else names):
+        spec = specs[name]
+        frame = data(spec)
+        fig, _ = plot(spec, frame)
+        save(spec, fig)
+        rendered[name] = frame
+    return rendered
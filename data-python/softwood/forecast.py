@@ -0,0 +1,317 @@
+"""
+Forecasts with prediction intervals for the monthly series.
+
+forecast(series, model, horizon) projects one monthly series forward
+with one of:
+
+    'arima'       ARIMA(p,1,q) with drift, orders chosen by AIC
+                  (statsmodels SARIMAX); without statsmodels an
+                  ARIMA(p,1,0) fitted by least squares, p chosen by AIC
+    'ets'         additive damped-trend exponential smoothing
+                  (statsmodels ETSModel); without statsmodels the same
+                  Holt recursion fitted by least squares
+    'regression'  a regression on US housing starts (exog) with AR(1)
+                  errors, the relationship housing_exports_comparison.py
+                  shows on annual data; exog beyond its last observation
+                  is projected with the 'arima' model and its uncertainty
+                  carried into the intervals
+
+Series are modelled as 100 log(level), so the intervals stay positive
+and the forecasts come back as medians in the original units. With
+adjust=True the series is seasonally adjusted first (softwood/seasonal.py)
+and the last year's seasonal factors are added back to the forecast.
+
+Each forecast is cached (softwood/cache.py) under its job name (the
+series name and model for forecast()). The cache metadata holds a hash
+of the data it was fitted to (the data vintage) and the model settings,
+and the fitted parameters, so a refit only happens when a source table
+is revised or extended, and then replaces the superseded forecast.
+forecast_many() runs the uncached fits of many series and models in
+parallel across cores.
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from softwood import cache, lazy, parallel, seasonal
+
+optimize = lazy.module('scipy.optimize')
+stats = lazy.module('scipy.stats')
+
+try:
+    from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    ENGINE = 'statsmodels'
+except ImportError:
+    ETSModel = SARIMAX = None
+    ENGINE = 'numpy'
+
+MODELS = ('arima', 'ets', 'regression')
+LEVELS = (0.5, 0.8, 0.95)
+MAX_LAGS = 12
+
+
+def _arima_numpy(y, horizon, max_lags=MAX_LAGS):
+    """ARIMA(p,1,0) with drift by least squares; returns (mean, sd, params)."""
+    x = np.diff(y)
+    n = len(x)
+    best = None
+    for p in range(max_lags + 1):
+        # Compare the orders on a common sample
+        target = x[max_lags:]
+        X = np.column_stack([np.ones(len(target))] + [x[max_lags - i:n - i] for i in range(1, p + 1)])
+        coef, *_ = np.linalg.lstsq(X, target, rcond=None)
+        resid = target - X @ coef
+        aic = len(target) * np.log(resid @ resid / len(target)) + 2 * (p + 1)
+        if best is None or aic < best[0]:
+            best = (aic, p)
+    p = best[1]
+
+    # Refit the chosen order on every usable observation
+    target = x[p:]
+    X = np.column_stack([np.ones(len(target))] + [x[p - i:n - i] for i in range(1, p + 1)])
+    coef, *_ = np.linalg.lstsq(X, target, rcond=None)
+    resid = target - X @ coef
+    sigma2 = resid @ resid / max(len(target) - X.shape[1], 1)
+    drift, phi = coef[0], coef[1:]
+
+    history = list(x[n - p:]) if p else []
+    steps = []
+    for _ in range(horizon):
+        step = drift + sum(phi[i] * history[-1 - i] for i in range(p))
+        steps.append(step)
+        history.append(step)
+    mean = y[-1] + np.cumsum(steps)
+
+    # psi weights of the integrated AR polynomial (1 - phi(L))(1 - L)
+    a = -np.convolve(np.r_[1.0, -phi], [1.0, -1.0])[1:]
+    psi = np.zeros(horizon)
+    psi[0] = 1.0
+    for j in range(1, horizon):
+        psi[j] = sum(a[i - 1] * psi[j - i] for i in range(1, min(j, len(a)) + 1))
+    sd = np.sqrt(sigma2 * np.cumsum(psi ** 2))
+    return mean, sd, {'order': [p, 1, 0], 'drift': drift, 'ar': phi.tolist(), 'sigma2': sigma2}
+
+
+def _arima_statsmodels(y, horizon):
+    """ARIMA(p,1,q) with drift, p and q up to 2 chosen by AIC; returns (mean, sd, params)."""
+    best = None
+    for p in range(3):
+        for q in range(3):
+            try:
+                fit = SARIMAX(y, order=(p, 1, q), trend='t').fit(disp=False)
+            except (ValueError, np.linalg.LinAlgError):
+                continue
+            if best is None or fit.aic < best.aic:
+                best = fit
+    if best is None:
+        # No order could be fitted; use the numpy model rather than fail
+        return _arima_numpy(y, horizon)
+    prediction = best.get_forecast(horizon)
+    params = dict(zip(best.model.param_names, np.asarray(best.params).tolist()))
+    return (np.asarray(prediction.predicted_mean), np.sqrt(np.asarray(prediction.var_pred_mean)),
+            {'order': list(best.model.order), 'params': params, 'aic': best.aic})
+
+
+def _holt_errors(y, alpha, beta, phi):
+    """One-step errors and final states of the additive damped-trend recursion."""
+    level, trend = y[0], np.mean(np.diff(y[:13]))
+    errors = np.empty(len(y) - 1)
+    for t in range(1, len(y)):
+        fitted = level + phi * trend
+        error = y[t] - fitted
+        level = fitted + alpha * error
+        trend = phi * trend + beta * error
+        errors[t - 1] = error
+    return errors, level, trend
+
+
+def _ets_numpy(y, horizon):
+    """Additive damped-trend exponential smoothing by least squares; returns (mean, sd, params)."""
+    def sse(params):
+        alpha, share, phi = params
+        errors, _, _ = _holt_errors(y, alpha, alpha * share, phi)
+        return errors @ errors
+
+    fit = optimize.minimize(sse, x0=[0.5, 0.1, 0.95], method='L-BFGS-B',
+                            bounds=[(1e-4, 0.9999), (0.0, 1.0), (0.8, 0.98)])
+    alpha, share, phi = fit.x
+    beta = alpha * share
+    errors, level, trend = _holt_errors(y, alpha, beta, phi)
+    sigma2 = errors @ errors / max(len(errors) - 3, 1)
+
+    damped = np.cumsum(phi ** np.arange(1, horizon + 1))
+    mean = level + damped * trend
+    # Variance of the class 1 ETS(A,Ad,N) model: 1 + sum_j (alpha + beta phi_j)^2
+    c = alpha + beta * damped[:-1]
+    sd = np.sqrt(sigma2 * (1 + np.r_[0.0, np.cumsum(c ** 2)]))
+    return mean, sd, {'alpha': alpha, 'beta': beta, 'phi': phi, 'sigma2': sigma2}
+
+
+def _ets_statsmodels(y, horizon):
+    """Additive damped-trend ETS via statsmodels; returns (mean, sd, params)."""
+    fit = ETSModel(y, error='add', trend='add', damped_trend=True).fit(disp=False)
+    prediction = fit.get_prediction(start=len(y), end=len(y) + horizon - 1)
+    params = dict(zip(fit.param_names, np.asarray(fit.params).tolist()))
+    return (np.asarray(prediction.predicted_mean), np.sqrt(np.asarray(prediction.forecast_variance)),
+            {'params': params, 'aic': fit.aic})
+
+
+def _arima(y, horizon):
+    return _arima_statsmodels(y, horizon) if ENGINE == 'statsmodels' else _arima_numpy(y, horizon)
+
+
+def _ets(y, horizon):
+    return _ets_statsmodels(y, horizon) if ENGINE == 'statsmodels' else _ets_numpy(y, horizon)
+
+
+def _regression(y, x, horizon):
+    """Regression of y on x with AR(1) errors; x holds y's periods plus horizon future periods.
+
+    Future x values that are missing are projected with _arima() and
+    their forecast variance is carried into the intervals.
+    """
+    n = len(y)
+    both = ~np.isnan(y) & ~np.isnan(x[:n])
+    X = np.column_stack([np.ones(both.sum()), x[:n][both]])
+    (intercept, slope), *_ = np.linalg.lstsq(X, y[both], rcond=None)
+    u = y[both] - X @ [intercept, slope]
+    rho = (u[1:] @ u[:-1]) / (u[:-1] @ u[:-1])
+    innovations = u[1:] - rho * u[:-1]
+    sigma2 = innovations @ innovations / max(len(innovations) - 3, 1)
+
+    future = x[n:n + horizon].copy()
+    future_sd = np.zeros(horizon)
+    last = np.flatnonzero(~np.isnan(x))[-1]
+    missing = np.isnan(future)
+    if missing.any():
+        # Project x from its last observation to the end of the horizon
+        history = x[:last + 1]
+        x_mean, x_sd, _ = _arima(history[~np.isnan(history)], n + horizon - 1 - last)
+        offset = last + 1 - n
+        future[missing] = x_mean[np.flatnonzero(missing) - offset]
+        future_sd[missing] = x_sd[np.flatnonzero(missing) - offset]
+
+    h = np.arange(1, horizon + 1)
+    mean = intercept + slope * future + rho ** h * u[-1]
+    sd = np.sqrt(slope ** 2 * future_sd ** 2 + sigma2 * np.cumsum(rho ** (2 * (h - 1))))
+    return mean, sd, {'intercept': intercept, 'slope': slope, 'rho': rho, 'sigma2': sigma2}
+
+
+def _prepare(series, log=True, adjust=False):
+    """Put a series on a regular monthly index, log it and optionally seasonally adjust it."""
+    index = pd.period_range(series.first_valid_index(), series.last_valid_index(), freq=series.index.freq)
+    y = series.reindex(index).astype('float64')
+    if log:
+        y = 100 * np.log(y)
+    y = y.interpolate(limit_area='inside')
+    factors = None
+    if adjust:
+        components = seasonal.decompose(y, method='x11')
+        y = components['adjusted']
+        last_year = components['seasonal'].iloc[-seasonal.PERIOD:]
+        factors = pd.Series(last_year.to_numpy(), index=last_year.index.month)
+    return y, factors
+
+
+def _forecast_key(name, series, model, horizon, levels, log, adjust, exog):
+    """Return (cache name, vintage hash) of the forecast job called name."""
+    if isinstance(name, tuple):
+        name = '-'.join(map(str, name))
+    digest = hashlib.sha1()
+    digest.update(cache.frame_hash(series).encode('ascii'))
+    if exog is not None:
+        digest.update(cache.frame_hash(exog).encode('ascii'))
+    digest.update(json.dumps([model, horizon, list(levels), log, adjust, ENGINE]).encode('utf-8'))
+    return f'forecast-{cache.slug(name)}', digest.hexdigest()
+
+
+def _fit(series, model='arima', horizon=24, levels=LEVELS, log=True, adjust=False, exog=None):
+    """Fit one model and return (forecast frame, fitted parameters)."""
+    if model not in MODELS:
+        raise ValueError(f'Unknown model {model!r}; expected one of {MODELS}')
+    y, factors = _prepare(series, log=log, adjust=adjust)
+    future = pd.period_range(y.index[-1] + 1, periods=horizon, freq=y.index.freq, name='period')
+
+    if model == 'regression':
+        if exog is None:
+            raise ValueError("The 'regression' model needs exog (e.g. US housing starts)")
+        x, _ = _prepare(exog, log=log, adjust=False)
+        x = x.reindex(y.index.append(future)).to_numpy()
+        mean, sd, params = _regression(y.to_numpy(), x, horizon)
+    elif model == 'arima':
+        mean, sd, params = _arima(y.to_numpy(), horizon)
+    else:
+        mean, sd, params = _ets(y.to_numpy(), horizon)
+
+    if factors is not None:
+        mean = mean + factors.reindex(future.month).to_numpy()
+    transform = (lambda v: np.exp(v / 100)) if log else (lambda v: v)
+    columns = {'median': transform(mean)}
+    for level in levels:
+        z = stats.norm.ppf(0.5 + level / 2)
+        columns[f'lower_{round(level * 100)}'] = transform(mean - z * sd)
+        columns[f'upper_{round(level * 100)}'] = transform(mean + z * sd)
+    params = {k: (v.tolist() if hasattr(v, 'tolist') else v) for k, v in params.items()}
+    return pd.DataFrame(columns, index=future), params
+
+
+def _fit_job(job):
+    return _fit(**job)
+
+
+def forecast(series, model='arima', horizon=24, levels=LEVELS, log=True, adjust=False, exog=None, use_cache=True):
+    """Forecast one monthly series horizon months ahead (see the module docstring).
+
+    Returns a DataFrame indexed by the forecast periods with the median
+    and the lower_/upper_ bounds of each prediction interval in levels
+    (lower_80, upper_80, ...); the fitted parameters are in .attrs.
+    """
+    job = dict(series=series, model=model, horizon=horizon, levels=levels, log=log, adjust=adjust, exog=exog)
+    return forecast_many({(series.name, model): job}, workers=1, use_cache=use_cache)[(series.name, model)]
+
+
+def forecast_many(jobs, workers=None, use_cache=True):
+    """Run many forecasts, fitting the uncached ones in parallel across cores.
+
+    jobs maps a name to the keyword arguments of forecast() (series,
+    model, horizon, ...). Returns a dict of name -> forecast frame.
+    Without the fork start method (Windows) the fits run one by one.
+    """
+    forecasts = {}
+    pending = {}
+    keys = {}
+    for name, job in jobs.items():
+        job = dict(job)
+        job.setdefault('levels', LEVELS)
+        keys[name] = _forecast_key(name, job['series'], job.get('model', 'arima'), job.get('horizon', 24),
+                                   job['levels'], job.get('log', True), job.get('adjust', False), job.get('exog'))
+        stored = cache.read_if(keys[name][0], vintage=keys[name][1]) if use_cache else None
+        if stored is not None:
+            stored.attrs['params'] = cache.read_manifest(keys[name][0])['meta'].get('params')
+            forecasts[name] = stored
+        else:
+            pending[name] = job
+
+    context = parallel.fork_context()
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    if workers > 1 and context is not None:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            fitted = dict(zip(pending, pool.map(_fit_job, pending.values())))
+    else:
+        fitted = {name: _fit_job(job) for name, job in pending.items()}
+
+    for name, (frame, params) in fitted.items():
+        frame.attrs['params'] = params
+        forecasts[name] = frame
+        if use_cache:
+            job = pending[name]
+            cache.write(keys[name][0], frame, meta={
+                'model': job.get('model', 'arima'), 'engine': ENGINE, 'vintage': keys[name][1],
+                'last_period': str(job['series'].last_valid_index()), 'params': params})
+    return {name: forecasts[name] for name in jobs}
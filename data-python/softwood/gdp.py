@@ -0,0 +1,109 @@
+"""
+GDP by industry analytics over the whole 36-10-0434-03 table.
+
+analytics() reads gdp/3610043403-eng.csv once into an industry x year
+float matrix (statcan.read_table) and derives, for every row and every
+year at once:
+
+    shares        percent of All industries [T001]
+    growth        percent change on the previous year
+    ranks         rank by GDP among the NAICS sectors (1 = largest)
+    rank_changes  change in rank on the previous year (negative = moved up)
+
+tree is the NAICS hierarchy of the rows (softwood/naics.py), for
+rollups and parent shares.
+
+The results are cached (softwood/cache.py) and rebuilt only when the
+table changes, so comparing many industries costs no more than reading
+one ratio. Rows are indexed by their cleaned labels; codes maps each
+label to its NAICS code ('11', '3211', 'T001', ...).
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from softwood import cache, naics, statcan
+
+DATA_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GDP_PATH = os.path.join(DATA_ROOT, 'gdp', '3610043403-eng.csv')
+TOTAL_CODE = 'T001'
+
+Analytics = namedtuple('Analytics', ['values', 'codes', 'tree', 'shares', 'growth', 'ranks', 'rank_changes'])
+
+
+def shares(values, total):
+    """Every row as a percent of the total row, for every year."""
+    return values.div(total, axis=1) * 100
+
+
+def growth(values):
+    """Percent change of every row on the previous year."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (values / values.shift(1, axis=1) - 1) * 100
+
+
+def ranks(values, rows):
+    """Rank the selected rows by value within each year (1 = largest; other rows NaN)."""
+    ranked = values[rows].rank(axis=0, ascending=False, method='min')
+    return ranked.reindex(values.index)
+
+
+def _compute(path):
+    table = statcan.read_table(path)
+    values = table.values
+    codes = table.codes
+    total = statcan.code_row(table, TOTAL_CODE)
+    ranked = ranks(values, naics.is_sector(codes))
+    return {
+        'values': values,
+        'codes': codes,
+        'tree': naics.build(codes),
+        'shares': shares(values, total),
+        'growth': growth(values),
+        'ranks': ranked,
+        'rank_changes': ranked - ranked.shift(1, axis=1),
+    }
+
+
+def _to_store(frame):
+    stored = frame.copy()
+    stored.columns = [str(c) for c in stored.columns]
+    return stored
+
+
+def _from_store(frame):
+    restored = frame.copy()
+    restored.columns = pd.PeriodIndex(restored.columns, freq='Y', name='period')
+    return restored
+
+
+def analytics(path=GDP_PATH, use_cache=True):
+    """Return the Analytics namedtuple for the GDP table (see the module docstring)."""
+    if not use_cache:
+        return Analytics(**_compute(path))
+    names = ['values', 'shares', 'growth', 'ranks', 'rank_changes']
+    if all(cache.is_fresh(f'gdp-{name}', [path]) for name in names + ['codes']):
+        stored = {name: cache.read(f'gdp-{name}') for name in names + ['codes']}
+        if all(frame is not None for frame in stored.values()):
+            parts = {name: _from_store(stored[name]) for name in names}
+            codes = stored['codes']['code']
+            parts['codes'] = codes.astype(object).where(codes.notna(), None)
+            parts['tree'] = naics.build(parts['codes'])
+            return Analytics(**parts)
+
+    parts = _compute(path)
+    for name in names:
+        cache.write(f'gdp-{name}', _to_store(parts[name]), sources=[path])
+    cache.write('gdp-codes', parts['codes'].to_frame('code'), sources=[path])
+    return Analytics(**parts)
+
+
+def row(frame, codes, code):
+    """Return the row of an analytics frame for a NAICS code such as '11' or 'T001'."""
+    labels = codes.index[codes.to_numpy() == code]
+    if len(labels) == 0:
+        raise KeyError(f'No row with code [{code}] in the GDP table')
+    return frame.loc[labels[0]]
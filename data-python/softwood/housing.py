@@ -0,0 +1,128 @@
+"""
+Housing starts by geography from the CMHC table 34-10-0158-01.
+
+panel() reads every geography row of
+canada-housing-starts/3410015801-eng.csv in the one statcan.read_table()
+call (the whole block is parsed and its flags split at once) and returns
+a Panel of:
+
+    values     month x geography, thousands of units (SAAR)
+    flags      the quality flag or symbol of every cell, same shape
+    geography  one row per geography: its level ('country', 'region',
+               'province', 'territory' or 'cma') and its province (the
+               province itself, or the province named after a CMA's
+               comma, e.g. 'Kelowna, British Columbia')
+
+The download on disk covers Canada only; the full table (and the CMA
+tables in the same layout) load the same way, one column per geography.
+The panel is kept in the columnar cache (softwood/cache.py), so scripts
+that need a few provinces read their columns instead of re-parsing the
+table. select() filters the panel by level or province, and per_capita()
+divides by population (a constant per geography, or a population table
+at any frequency, matched to the month).
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from softwood import cache, statcan
+
+DATA_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTS_PATH = os.path.join(DATA_ROOT, 'canada-housing-starts', '3410015801-eng.csv')
+
+Panel = namedtuple('Panel', ['values', 'flags', 'geography'])
+
+COUNTRY = 'Canada'
+PROVINCES = ['Newfoundland and Labrador', 'Prince Edward Island', 'Nova Scotia', 'New Brunswick', 'Quebec',
+             'Ontario', 'Manitoba', 'Saskatchewan', 'Alberta', 'British Columbia']
+TERRITORIES = ['Yukon', 'Northwest Territories', 'Nunavut']
+# Geographical regions of Canada, as labelled in the CMHC tables
+REGIONS = ['Atlantic', 'Atlantic provinces', 'Prairies', 'Prairie provinces', 'Territories']
+
+
+def classify(labels):
+    """Return the level and province of each geography label as a DataFrame indexed by label."""
+    labels = pd.Index(labels)
+    names = labels.astype(str)
+    # A CMA names its province after the last comma; a CMA straddling two names both ('Ontario/Quebec')
+    suffix = names.str.rsplit(',', n=1).str[-1].str.strip().str.split('/').str[0]
+    level = np.select(
+        [names == COUNTRY, names.isin(PROVINCES), names.isin(TERRITORIES), names.isin(REGIONS),
+         names.str.contains(',', regex=False)],
+        ['country', 'province', 'territory', 'region', 'cma'], default='other')
+    province = np.where(np.isin(level, ['province', 'territory']), names,
+                        np.where((level == 'cma') & suffix.isin(PROVINCES + TERRITORIES), suffix, None))
+    return pd.DataFrame({'level': level, 'province': province}, index=labels)
+
+
+def _build(path):
+    table = statcan.read_table(path)
+    values = table.values.T
+    flags = table.flags.T
+    values.columns.name = flags.columns.name = 'geography'
+    return values, flags
+
+
+def _to_store(frame):
+    stored = frame.copy()
+    stored.columns = [str(c) for c in stored.columns]
+    return stored
+
+
+def panel(path=STARTS_PATH, use_cache=True):
+    """Return the Panel of housing starts by month and geography (see the module docstring)."""
+    if use_cache and cache.is_fresh('housing-starts', [path]) and cache.is_fresh('housing-flags', [path]):
+        values, flags = cache.read('housing-starts'), cache.read('housing-flags')
+        if values is not None and flags is not None:
+            values.columns.name = flags.columns.name = 'geography'
+            return Panel(values, flags, classify(values.columns))
+    values, flags = _build(path)
+    if use_cache:
+        cache.write('housing-starts', _to_store(values), sources=[path])
+        cache.write('housing-flags', _to_store(flags), sources=[path])
+    return Panel(values, flags, classify(values.columns))
+
+
+def select(panel, level=None, province=None, exclude_flags=()):
+    """Return the panel's values for the geographies at level(s) and/or in province(s).
+
+    level and province are a name or a list of names (None keeps all);
+    cells whose flag is in exclude_flags are NaN.
+    """
+    geography = panel.geography
+    keep = np.ones(len(geography), dtype=bool)
+    if level is not None:
+        keep &= geography['level'].isin([level] if isinstance(level, str) else level).to_numpy()
+    if province is not None:
+        keep &= geography['province'].isin([province] if isinstance(province, str) else province).to_numpy()
+    values = panel.values.loc[:, keep]
+    if exclude_flags:
+        values = values.where(~panel.flags.loc[:, keep].isin(list(exclude_flags)))
+    return values
+
+
+def per_capita(values, population, per=1000):
+    """Housing starts per `per` residents (annualized) from starts in thousands.
+
+    population is a Series of residents by geography, or a DataFrame of
+    residents by period x geography at any frequency (annual,
+    quarterly, monthly); each month takes the population of the period
+    that contains it. Geographies without a population are NaN.
+    """
+    if isinstance(population, pd.Series):
+        residents = population.reindex(values.columns).to_numpy(dtype='float64')[None, :]
+    else:
+        periods = values.index.asfreq(population.index.freqstr, how='start')
+        residents = population.reindex(index=periods, columns=values.columns).to_numpy(dtype='float64')
+    return values * 1000 / residents * per
+
+
+def read_population(path):
+    """Return a StatCan population table (geography rows x periods) as periods x geography, in persons."""
+    table = statcan.read_table(path)
+    population = table.values.T
+    population.columns.name = 'geography'
+    return population
@@ -0,0 +1,168 @@
+"""
+Stage-level timing and memory instrumentation for the graph scripts.
+
+Scripts wrap their work in named stages:
+
+    with stage('load'):
+        df = pd.read_csv(...)
+
+or decorate functions with @timed(). Each stage records wall time, CPU time
+and the process peak RSS when the stage ends. Stages can be nested; the
+nesting is kept as a ';'-joined path so the orchestrator can build a
+flame-style report.
+
+When SOFTWOOD_STAGE_REPORT is set (generate_all_graphs.py does this) the
+recorded stages are written to that path as JSON when the script exits.
+When SOFTWOOD_CAPTURE is set to 'cprofile' or 'tracemalloc' the whole run
+is also captured and written to SOFTWOOD_CAPTURE_OUT.
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+REPORT_ENV = 'SOFTWOOD_STAGE_REPORT'
+CAPTURE_ENV = 'SOFTWOOD_CAPTURE'
+CAPTURE_OUT_ENV = 'SOFTWOOD_CAPTURE_OUT'
+
+_started_wall = time.perf_counter()
+_started_cpu = time.process_time()
+_stages = []
+_stack = []
+_capture = {}
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, or None."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+        if sys.platform == 'darwin':
+            return peak / (1024 * 1024)
+        return peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+
+
+@contextmanager
+def stage(name):
+    """Record wall time, CPU time and peak RSS for the enclosed block."""
+    _stack.append(name)
+    path = ';'.join(_stack)
+    rss_before = peak_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        rss_after = peak_rss_mb()
+        _stack.pop()
+        _stages.append({
+            'stage': name,
+            'path': path,
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_rss_mb': None if rss_after is None else round(rss_after, 2),
+            'rss_growth_mb': None if rss_after is None else round(rss_after - rss_before, 2),
+        })
+
+
+def timed(name=None):
+    """Decorator form of stage(); defaults to the function name."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stages():
+    """Return the stages recorded so far, in completion order."""
+    return list(_stages)
+
+
+def reset():
+    """Forget the recorded stages and restart the clocks, before the next script run in the same process."""
+    global _started_wall, _started_cpu
+    _started_wall = time.perf_counter()
+    _started_cpu = time.process_time()
+    _stages.clear()
+    _stack.clear()
+
+
+def report():
+    """Return the stage report for this process as a dict."""
+    rss = peak_rss_mb()
+    return {
+        'script': os.path.relpath(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+        'wall_s': round(time.perf_counter() - _started_wall, 6),
+        'cpu_s': round(time.process_time() - _started_cpu, 6),
+        'peak_rss_mb': None if rss is None else round(rss, 2),
+        'stages': stages(),
+    }
+
+
+def _write_report():
+    path = os.environ.get(REPORT_ENV)
+    if not path:
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report(), f, indent=2)
+
+
+def _start_capture():
+    mode = os.environ.get(CAPTURE_ENV)
+    if mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        _capture['cprofile'] = profiler
+    elif mode == 'tracemalloc':
+        import tracemalloc
+        tracemalloc.start(25)
+        _capture['tracemalloc'] = tracemalloc
+    elif mode:
+        print(f"Warning: unknown {CAPTURE_ENV} mode '{mode}' ignored", file=sys.stderr)
+
+
+def _stop_capture():
+    out = os.environ.get(CAPTURE_OUT_ENV)
+    if 'cprofile' in _capture:
+        profiler = _capture['cprofile']
+        profiler.disable()
+        profiler.dump_stats(out or 'capture.prof')
+    elif 'tracemalloc' in _capture:
+        tracemalloc = _capture['tracemalloc']
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        top = snapshot.statistics('lineno')[:50]
+        with open(out or 'capture-tracemalloc.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Top {len(top)} allocation sites\n")
+            for stat in top:
+                f.write(f"{stat}\n")
+
+
+def _at_exit():
+    _stop_capture()
+    _write_report()
+
+
+_start_capture()
+atexit.register(_at_exit)
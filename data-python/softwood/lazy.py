@@ -0,0 +1,52 @@
+"""
+Deferred imports and the headless stats-only mode.
+
+pyplot and scipy are the slowest imports the scripts make (about 0.35s
+for pyplot and 0.15-0.65s per scipy subpackage, on top of pandas), and
+many runs never use them: a stats-only run draws nothing, and a filter
+or forecast read from the cache fits nothing. module(name) returns a
+stand-in that imports the module the first time one of its attributes
+is used:
+
+    plt = lazy.module('matplotlib.pyplot')
+    stats = lazy.module('scipy.stats')
+
+With SOFTWOOD_STATS_ONLY=1 (generate_all_graphs.py --stats-only)
+rendering() is False: the scripts skip their plot and save stages, so
+matplotlib is never imported, and only print their summaries and record
+their statistics (softwood/results.py).
+"""
+
+import importlib
+import os
+import sys
+import types
+
+STATS_ONLY_ENV = 'SOFTWOOD_STATS_ONLY'
+
+
+class _Deferred(types.ModuleType):
+    """A module that is imported on first attribute access."""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        # Later lookups find the module's attributes directly
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def module(name):
+    """Return the module called name, imported now if it already is, else on first use."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return _Deferred(name)
+
+
+def stats_only():
+    """True in a headless run that only computes statistics ($SOFTWOOD_STATS_ONLY)."""
+    return os.environ.get(STATS_ONLY_ENV, '') not in ('', '0')
+
+
+def rendering():
+    """True unless this is a stats-only run; scripts draw and save their figures only when it is."""
+    return not stats_only()
@@ -0,0 +1,296 @@
+"""
+Perfect-foresight solution of the softwood lumber model (latex-paper/theoretical_model.tex).
+
+The economy has sawmills (Cobb-Douglas in K and L), construction firms
+(CES in lumber W and alternatives Psi), a household (log utility in
+consumption and leisure) and a government paying the lumber subsidy
+omega from lump-sum taxes. To close it:
+
+    - alternatives are the numeraire (P^Psi = 1) and the final good has
+      a price P^F; the final good is consumed and invested, Y^F = C + I
+    - lumber exports pay for the alternatives, P^W X = P^Psi Psi
+    - export demand falls with the tariff tau on Canadian lumber,
+      X = Xbar exp(d) ((1 + tau) P^W)^-epsilon, with d a log shift in
+      export demand (zero unless given)
+
+Each period has seven unknowns, solved for in logs:
+
+    K (next period's capital), C, L, P^W, P^F, W, Psi
+
+and seven equations: the Euler equation, the consumption-leisure
+tradeoff, lumber market clearing, the two construction first-order
+conditions, final-goods market clearing and balanced trade.
+
+solve() stacks every period of a tariff (and subsidy) path into one
+system and runs Newton's method on it. Only the Euler equation looks a
+period ahead and only capital a period back, so the Jacobian is block
+tridiagonal; it is built column-colored (21 residual evaluations per
+Newton step however long the horizon) and factorized as a sparse
+matrix. The path starts from the steady state before the shock and
+ends at the steady state of its last period; a 1,200-month horizon
+solves in about a tenth of a second. sweep() solves a list of scenarios
+in turn, starting each from the previous solution.
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from softwood import lazy, revenue
+
+optimize = lazy.module('scipy.optimize')
+sparse = lazy.module('scipy.sparse')
+linalg = lazy.module('scipy.sparse.linalg')
+
+DATA_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARIFF_WEIGHTS = os.path.join(DATA_ROOT, 'tariffs', 'tariff-weights.csv')
+
+# Annual parameters; see the calibration table in the paper
+PARAMETERS = {
+    'interest_rate': 0.0197,   # real net interest rate, i* (beta = 1 / (1 + i*))
+    'delta': 0.0348,           # depreciation rate
+    'hours': 0.33,             # time spent working in steady state (pins gamma)
+    'export_share': 0.67,      # share of lumber output exported (pins Xbar)
+    'theta': 0.5,              # weight of lumber in construction (chosen by author)
+    'phi': 0.5,                # CES exponent; elasticity of substitution 1 / (1 - phi) (chosen by author)
+    'epsilon': 2.0,            # price elasticity of export demand (chosen by author)
+    'A_S': 1.0,                # sawmill technology
+    'A_C': 1.0,                # construction technology
+    'P_Psi': 1.0,              # price of alternatives (numeraire)
+}
+
+VARIABLES = ['K', 'C', 'L', 'P_W', 'P_F', 'W', 'Psi']
+PATH_COLUMNS = VARIABLES + ['Y_W', 'Y_F', 'X', 'r', 'w', 'G', 'tau', 'omega']
+
+Solution = namedtuple('Solution', ['path', 'y', 'iterations', 'residual'])
+
+
+def calibrate(alpha=None, per_year=12, **overrides):
+    """Return the model parameters at per_year periods a year.
+
+    alpha defaults to the sawmill capital share from the revenue table
+    (revenue.calibrate_alpha). gamma and Xbar are set so the steady
+    state without tariffs or subsidy has the target hours and export
+    share.
+    """
+    params = dict(PARAMETERS, **overrides)
+    if alpha is None:
+        alpha = revenue.calibrate_alpha(revenue.decomposition())
+    params['alpha'] = alpha
+    params['per_year'] = per_year
+    params['beta'] = (1 / (1 + params['interest_rate'])) ** (1 / per_year)
+    params['delta_period'] = 1 - (1 - params['delta']) ** (1 / per_year)
+    params['gamma'] = 1.0
+    params['xbar'] = 1.0
+
+    # Solve the untaxed steady state for gamma and Xbar with L and the export share fixed
+    def equations(z):
+        trial = dict(params, gamma=np.exp(z[6]), xbar=np.exp(z[7]))
+        y = np.insert(z[:6], 2, np.log(params['hours']))
+        levels = _levels(y[None], np.exp(y[0]), y, 0.0, 0.0, trial)
+        return np.append(_residuals(y[None], np.exp(y[0]), y, 0.0, 0.0, trial).ravel(),
+                         np.log(levels['X'][0] / levels['Y_W'][0]) - np.log(params['export_share']))
+
+    found = optimize.root(equations, np.zeros(8), method='hybr', options={'xtol': 1e-12})
+    if not found.success:
+        raise RuntimeError(f'Calibration failed: {found.message}')
+    params['gamma'] = float(np.exp(found.x[6]))
+    params['xbar'] = float(np.exp(found.x[7]))
+    return params
+
+
+def _levels(Y, k0, y_end, tau, omega, p, demand=0.0):
+    """Every variable of every period from the stacked log unknowns Y (periods x 7)."""
+    K_next, C, L, P_W, P_F, W, Psi = np.exp(Y).T
+    K = np.concatenate([[k0], K_next[:-1]])
+    Y_W = p['A_S'] * K ** p['alpha'] * L ** (1 - p['alpha'])
+    Y_F = p['A_C'] * (p['theta'] * W ** p['phi'] + (1 - p['theta']) * Psi ** p['phi']) ** (1 / p['phi'])
+    X = p['xbar'] * np.exp(demand) * ((1 + tau) * P_W) ** -p['epsilon']
+    r = p['alpha'] * P_W * Y_W / K
+    w = (1 - p['alpha']) * P_W * Y_W / L
+
+    # Next period's consumption and real rental rate (the end steady state after the last period)
+    C_next = np.append(C[1:], np.exp(y_end[1]))
+    L_next = np.append(L[1:], np.exp(y_end[2]))
+    P_W_next = np.append(P_W[1:], np.exp(y_end[3]))
+    P_F_next = np.append(P_F[1:], np.exp(y_end[4]))
+    Y_W_next = p['A_S'] * K_next ** p['alpha'] * L_next ** (1 - p['alpha'])
+    real_r_next = p['alpha'] * P_W_next * Y_W_next / K_next / P_F_next
+    return {'K': K, 'K_next': K_next, 'C': C, 'L': L, 'P_W': P_W, 'P_F': P_F, 'W': W, 'Psi': Psi,
+            'Y_W': Y_W, 'Y_F': Y_F, 'X': X, 'r': r, 'w': w, 'C_next': C_next, 'real_r_next': real_r_next,
+            'G': omega * P_W * W, 'tau': np.broadcast_to(tau, K.shape), 'omega': np.broadcast_to(omega, K.shape)}
+
+
+def _residuals(Y, k0, y_end, tau, omega, p, demand=0.0):
+    """The seven equations of every period, as a (periods x 7) array of log gaps."""
+    v = _levels(Y, k0, y_end, tau, omega, p, demand)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        marginal = np.log(v['P_F']) + p['phi'] * np.log(p['A_C']) + (1 - p['phi']) * np.log(v['Y_F'])
+        return np.column_stack([
+            np.log(v['C_next'] / v['C']) - np.log(p['beta'] * (v['real_r_next'] + 1 - p['delta_period'])),
+            np.log(p['gamma'] * v['C'] / (1 - v['L'])) - np.log(v['w'] / v['P_F']),
+            np.log(v['Y_W']) - np.log(v['W'] + v['X']),
+            marginal + np.log(p['theta']) + (p['phi'] - 1) * np.log(v['W']) - np.log((1 - v['omega']) * v['P_W']),
+            marginal + np.log(1 - p['theta']) + (p['phi'] - 1) * np.log(v['Psi']) - np.log(p['P_Psi']),
+            np.log(v['Y_F']) - np.log(v['C'] + v['K_next'] - (1 - p['delta_period']) * v['K']),
+            np.log(v['P_W'] * v['X']) - np.log(p['P_Psi'] * v['Psi']),
+        ])
+
+
+def steady_state(params, tau=0.0, omega=0.0, guess=None):
+    """Return the log steady state (7 values, in VARIABLES order) for a constant tariff and subsidy."""
+    if guess is None:
+        guess = steady_state(params) if (tau, omega) != (0.0, 0.0) else np.zeros(len(VARIABLES))
+        if (tau, omega) == (0.0, 0.0):
+            guess[2] = np.log(params['hours'])
+
+    def equations(y):
+        return _residuals(y[None], np.exp(y[0]), y, tau, omega, params).ravel()
+
+    found = optimize.root(equations, guess, method='hybr', options={'xtol': 1e-12})
+    if not found.success or not np.all(np.isfinite(found.x)):
+        raise RuntimeError(f'No steady state at tau={tau}, omega={omega}: {found.message}')
+    return found.x
+
+
+def steady_levels(params, tau=0.0, omega=0.0):
+    """Return every variable of the steady state (levels, including output, exports and prices) as a Series."""
+    y = steady_state(params, tau, omega)
+    levels = _levels(y[None], np.exp(y[0]), y, tau, omega, params)
+    return pd.Series({name: float(levels[name][0]) for name in PATH_COLUMNS})
+
+
+def _stacked_jacobian(residuals, Y, step=1e-6, colors=3):
+    """Sparse Jacobian of a stacked system whose periods only touch their neighbours, by colored differences.
+
+    residuals maps the (periods x n) unknowns to (periods x n) residuals.
+    With colors=3 each period may depend on the periods either side
+    (block tridiagonal); colors=1 is for independent blocks (block
+    diagonal), such as a batch of steady states.
+    """
+    periods, n = Y.shape
+    rows, cols, values = [], [], []
+    block = np.arange(periods)
+    for color in range(colors):
+        # Residual block s moved with the one perturbed block among s-1, s, s+1
+        offset = (color - block) % colors
+        offset[offset > colors // 2] -= colors
+        source = block + offset
+        ok = (source >= 0) & (source < periods)
+        for j in range(n):
+            bump = np.zeros_like(Y)
+            bump[color::colors, j] = step
+            diff = (residuals(Y + bump) - residuals(Y - bump)) / (2 * step)
+            period, i = np.nonzero(ok[:, None] & (diff != 0))
+            rows.append(period * n + i)
+            cols.append(source[period] * n + j)
+            values.append(diff[period, i])
+    size = periods * n
+    return sparse.csc_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                             shape=(size, size))
+
+
+def _jacobian(Y, k0, y_end, tau, omega, p, demand=0.0, step=1e-6):
+    """Sparse block-tridiagonal Jacobian of the stacked residuals, by colored central differences."""
+    return _stacked_jacobian(lambda Z: _residuals(Z, k0, y_end, tau, omega, p, demand), Y, step)
+
+
+def _newton(residuals, Y, tol=1e-10, max_iter=50, colors=3):
+    """Newton's method on a stacked system (see _stacked_jacobian); returns (Y, max residual, iterations)."""
+    residual = residuals(Y)
+    norm = np.abs(residual).max()
+    if not np.isfinite(norm):
+        raise ValueError('The starting guess gives undefined residuals (negative consumption or investment)')
+    iterations = 0
+    while norm > tol:
+        if iterations == max_iter:
+            raise RuntimeError(f'Newton did not converge in {max_iter} iterations (max residual {norm:.2e})')
+        jacobian = _stacked_jacobian(residuals, Y, colors=colors)
+        delta = linalg.spsolve(jacobian, -residual.ravel()).reshape(Y.shape)
+        # Halve the step until the residual falls (and hours stay below one)
+        scale = 1.0
+        while True:
+            trial = Y + scale * delta
+            trial_residual = residuals(trial)
+            trial_norm = np.abs(trial_residual).max()
+            if np.isfinite(trial_norm) and trial_norm < norm or scale < 1e-4:
+                break
+            scale /= 2
+        Y, residual, norm = trial, trial_residual, trial_norm
+        iterations += 1
+    return Y, norm, iterations
+
+
+def _as_path(values, periods):
+    array = np.asarray(values, dtype='float64')
+    return np.full(periods, float(array)) if array.ndim == 0 else array
+
+
+def solve(params, tau, omega=0.0, demand=0.0, initial=(0.0, 0.0), guess=None, tol=1e-10, max_iter=50):
+    """Solve the perfect-foresight path for a tariff path tau (and subsidy omega, scalar or path).
+
+    demand shifts export demand by a log deviation (scalar or path) that
+    returns to zero after the last period.
+
+    The economy starts in the steady state of initial = (tau, omega) and
+    learns the whole path in the first period; after the last period the
+    tariff and subsidy stay at their final values. guess is the y array
+    of an earlier Solution of the same length (a warm start). Returns a
+    Solution of the path (a DataFrame of every variable, indexed like
+    tau when it is a Series), the log unknowns y, the Newton iterations
+    and the final residual norm.
+    """
+    index = tau.index if isinstance(tau, pd.Series) else None
+    tau = _as_path(tau, len(tau) if np.ndim(tau) else 1)
+    periods = len(tau)
+    omega = _as_path(omega, periods)
+    demand = _as_path(demand, periods)
+
+    start = steady_state(params, *initial)
+    end = steady_state(params, tau[-1], omega[-1], guess=start)
+    k0 = np.exp(start[0])
+    if guess is not None:
+        Y = np.array(guess, dtype='float64')
+    else:
+        # The end steady state, with capital depreciating towards it from the start
+        Y = np.tile(end, (periods, 1))
+        k_end = np.exp(end[0])
+        decay = (1 - params['delta_period']) ** np.arange(1, periods + 1)
+        Y[:, 0] = np.log(k_end + decay * (k0 - k_end))
+
+    Y, norm, iterations = _newton(lambda Z: _residuals(Z, k0, end, tau, omega, params, demand),
+                                  Y, tol, max_iter)
+
+    levels = _levels(Y, k0, end, tau, omega, params, demand)
+    path = pd.DataFrame({name: levels[name] for name in PATH_COLUMNS}, index=index)
+    return Solution(path, Y, iterations, norm)
+
+
+def sweep(params, scenarios, **kwargs):
+    """Solve a dict of scenarios (name -> dict of solve() arguments), warm-starting each from the last."""
+    solutions = {}
+    previous = None
+    for name, scenario in scenarios.items():
+        arguments = dict(kwargs, **scenario)
+        if previous is not None and 'guess' not in arguments and previous.y.shape[0] == len(np.atleast_1d(arguments['tau'])):
+            arguments['guess'] = previous.y
+        previous = solutions[name] = solve(params, **arguments)
+    return solutions
+
+
+def tariff_path(start='2017-01', periods=1200, path=TARIFF_WEIGHTS):
+    """Monthly weighted tariff rate (day-weighted mean of each month) from tariff-weights.csv.
+
+    Months before the first review are untaxed; months after the last
+    entry keep its rate. The default 100 years lets capital settle at
+    the new steady state before the end of the path.
+    """
+    weights = pd.read_csv(path, parse_dates=['start_date', 'end_date'])
+    months = pd.period_range(start=start, periods=periods, freq='M')
+    days = pd.date_range(months[0].start_time, months[-1].end_time.normalize(), freq='D')
+    entry = np.searchsorted(weights['start_date'].to_numpy(), days.to_numpy(), side='right') - 1
+    rates = np.where(entry >= 0, weights['weighted_tariff'].to_numpy()[np.maximum(entry, 0)], 0.0)
+    daily = pd.Series(rates, index=days)
+    monthly = daily.groupby(daily.index.to_period('M')).mean()
+    return monthly.reindex(months).rename('tau')
@@ -0,0 +1,251 @@
+"""
+NAICS hierarchy over the classification codes of a StatCan table.
+
+StatCan tables list NAICS rows as flat labels ('Sawmills and wood
+preservation  [3211]'); build() turns the codes that statcan.read_table()
+splits off the labels into a tree, once, when the table is loaded:
+
+    T001  All industries
+      T002  Goods-producing industries
+        11    Agriculture, forestry, fishing and hunting
+          11N   Forestry, logging and support (113 + 1153)
+            113   Forestry and logging
+              1133  Logging
+        31-33 Manufacturing
+          321   Wood product manufacturing
+            3211  Sawmills and wood preservation
+      T003  Service-producing industries
+
+A code's parent is its longest prefix present in the table, so the tree
+only has the levels the table publishes: [3211] hangs straight off
+[31-33] in a table without [321]. Sector ranges ('31-33', '44-45',
+'48-49') hold their two-digit prefixes, the goods- and service-producing
+aggregates hold their sectors, and the other T-code aggregates (business
+sector, energy, ...) cut across the NAICS and stay outside the tree.
+
+Parents, children and depths are dicts, so walking up from a code costs
+O(depth). rollup(), parent_shares() and check() work on a whole values
+frame at once through the tree's row positions.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+Tree = namedtuple('Tree', ['codes', 'parent', 'children', 'depth'])
+
+TOTAL = 'T001'
+GOODS = 'T002'
+SERVICES = 'T003'
+GOODS_SECTORS = ('11', '21', '22', '23', '31', '32', '33')
+
+# StatCan aggregates that are not NAICS prefixes: code -> (parent, member codes)
+SPECIAL = {'11N': ('11', ('113', '1153'))}
+_SPECIAL_MEMBERS = {member: code for code, (_, members) in SPECIAL.items() for member in members}
+
+LEVELS = {2: 'sector', 3: 'subsector', 4: 'industry group', 5: 'industry', 6: 'national industry'}
+
+
+def _as_codes(codes):
+    if isinstance(codes, pd.Series):
+        return codes
+    codes = list(codes)
+    return pd.Series(codes, index=codes, name='code')
+
+
+def _is_range(code):
+    return len(code) == 5 and code[2] == '-' and code[:2].isdigit() and code[3:].isdigit()
+
+
+def level(code):
+    """Return the level of a code: 'total', 'aggregate', 'sector' ... 'national industry', or None."""
+    if code is None:
+        return None
+    if code == TOTAL:
+        return 'total'
+    if code.startswith('T'):
+        return 'aggregate'
+    if code in SPECIAL:
+        return 'special'
+    if _is_range(code):
+        return 'sector'
+    return LEVELS.get(len(code)) if code.isdigit() else None
+
+
+def is_sector(codes):
+    """Return a boolean mask of the codes that are two-digit NAICS sectors."""
+    return np.array([level(code) == 'sector' for code in _as_codes(codes).to_numpy()], dtype=bool)
+
+
+def _sector_map(present):
+    """Map each two-digit prefix to the sector row that holds it ('32' -> '31-33')."""
+    sectors = {}
+    for code in present:
+        if _is_range(code):
+            for prefix in range(int(code[:2]), int(code[3:]) + 1):
+                sectors[str(prefix)] = code
+        elif level(code) == 'sector':
+            sectors[code] = code
+    return sectors
+
+
+def _find_parent(code, present, sectors):
+    if code == TOTAL:
+        return None
+    if code in (GOODS, SERVICES):
+        return TOTAL if TOTAL in present else None
+    if code.startswith('T'):
+        return None
+
+    if code in SPECIAL:
+        parent = SPECIAL[code][0]
+        if parent in present:
+            return parent
+        prefix = parent
+    else:
+        prefix = code[:2]
+        # Longest prefix present, or a special aggregate that groups one
+        for k in range(len(code), 2, -1):
+            candidate = code[:k]
+            if k < len(code) and candidate in present:
+                return candidate
+            special = _SPECIAL_MEMBERS.get(candidate)
+            if special is not None and special != code and special in present:
+                return special
+
+    sector = sectors.get(prefix, prefix)
+    if sector != code and sector in present:
+        return sector
+    aggregate = GOODS if prefix in GOODS_SECTORS else SERVICES
+    if aggregate in present:
+        return aggregate
+    return TOTAL if TOTAL in present else None
+
+
+def build(codes):
+    """Build the hierarchy of a table's codes (statcan.Table.codes, or a list of codes).
+
+    Rows without a code are left out. Returns a Tree of the label -> code
+    Series and parent, children and depth dicts keyed by code; the top
+    of the tree (usually [T001]) has depth 0 and parent None.
+    """
+    codes = _as_codes(codes)
+    present = [code for code in codes.to_numpy() if code is not None and not pd.isna(code)]
+    present_set = set(present)
+    sectors = _sector_map(present)
+
+    parent = {}
+    for code in present:
+        parent[code] = _find_parent(code, present_set, sectors)
+    children = {code: [] for code in present}
+    for code in present:
+        if parent[code] is not None:
+            children[parent[code]].append(code)
+
+    depth = {}
+    for code in present:
+        chain = ancestors(Tree(codes, parent, children, depth), code)
+        depth[code] = len(chain)
+    return Tree(codes, parent, children, depth)
+
+
+def ancestors(tree, code):
+    """Return the codes above code, nearest first (O(depth))."""
+    chain = []
+    current = tree.parent[code]
+    while current is not None:
+        chain.append(current)
+        current = tree.parent[current]
+    return chain
+
+
+def descendants(tree, code):
+    """Return every code below code, depth first in table order."""
+    found = []
+    stack = list(reversed(tree.children[code]))
+    while stack:
+        current = stack.pop()
+        found.append(current)
+        stack.extend(reversed(tree.children[current]))
+    return found
+
+
+def leaves(tree, code):
+    """Return the codes below code (or code itself) that have no children in the table."""
+    below = descendants(tree, code) or [code]
+    return [c for c in below if not tree.children[c]]
+
+
+def _positions(tree, values):
+    """Map each code to its row position in values (rows are labels or codes)."""
+    index = values.index
+    by_label = pd.Series(np.arange(len(index)), index=index)
+    positions = {}
+    for label, code in tree.codes.items():
+        if code is None or pd.isna(code) or code in positions:
+            continue
+        if label in by_label.index:
+            positions[code] = int(by_label[label])
+        elif code in by_label.index:
+            positions[code] = int(by_label[code])
+    return positions
+
+
+def _sum_rows(values, groups):
+    """Sum groups of row positions of values at once (NaN when a group has no values)."""
+    matrix = np.zeros((len(groups), len(values)))
+    for i, rows in enumerate(groups):
+        matrix[i, rows] = 1.0
+    data = values.to_numpy(dtype='float64')
+    observed = ~np.isnan(data)
+    sums = matrix @ np.where(observed, data, 0.0)
+    counts = matrix @ observed
+    return np.where(counts > 0, sums, np.nan)
+
+
+def rollup(tree, values, targets):
+    """Sum the bottom-level rows under each target code, for every column at once.
+
+    targets are codes in the tree; each is rebuilt from the codes below
+    it that have no children of their own (itself, if it has none).
+    Returns a frame indexed by target code with the columns of values.
+    """
+    positions = _positions(tree, values)
+    groups = [[positions[c] for c in leaves(tree, target) if c in positions] for target in targets]
+    return pd.DataFrame(_sum_rows(values, groups), index=pd.Index(targets, name='code'), columns=values.columns)
+
+
+def parent_shares(tree, values):
+    """Every row as a percent of its parent row (NaN for rows without a parent in the table)."""
+    positions = _positions(tree, values)
+    rows = np.arange(len(values))
+    parent_rows = np.full(len(values), -1)
+    for code, position in positions.items():
+        parent = tree.parent.get(code)
+        if parent is not None and parent in positions:
+            parent_rows[position] = positions[parent]
+    data = values.to_numpy(dtype='float64')
+    parents = np.where(parent_rows[:, None] >= 0, data[np.maximum(parent_rows, 0)], np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shares = data[rows] / parents * 100
+    return pd.DataFrame(shares, index=values.index, columns=values.columns)
+
+
+def check(tree, values):
+    """Compare every parent with the sum of its children in the table.
+
+    Returns a frame indexed by parent code (one row per parent with
+    children) of the children's sum as a percent gap from the parent.
+    A gap is expected where the table leaves children out (e.g. [11N]
+    with [113] but not [1153]) and for chained dollars, which are not
+    additive away from the reference year.
+    """
+    positions = _positions(tree, values)
+    parents = [code for code, kids in tree.children.items() if kids and code in positions]
+    groups = [[positions[c] for c in tree.children[code] if c in positions] for code in parents]
+    sums = _sum_rows(values, groups)
+    totals = values.to_numpy(dtype='float64')[[positions[code] for code in parents]]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gaps = (sums / totals - 1) * 100
+    return pd.DataFrame(gaps, index=pd.Index(parents, name='code'), columns=values.columns)
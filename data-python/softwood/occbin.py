@@ -0,0 +1,261 @@
+"""
+Occasionally-binding constraints for the lumber model (OccBin-style, piecewise linear).
+
+Two inequality constraints can bind in some periods and not others:
+
+    cap          subsidy spending G_t = omega_t P^W_t W_t stays at or
+                 below a fiscal ceiling; when it binds, the subsidy rate
+                 falls below its statutory value so G_t equals the cap
+    investment   sawmill capital cannot fall faster than depreciation,
+                 K_{t+1} >= (1 - delta) K_t; when it binds, the Euler
+                 equation gives way to zero investment
+
+linearize() takes the stacked perfect-foresight system of softwood/model.py
+around a steady state once, with the subsidy rate as an extra unknown
+each period. A regime sequence says which constraint binds in which
+period and swaps the matching rows of the sparse system; solve() then
+iterates (as in OccBin) until the regimes agree with the solution:
+slack periods respect their constraint, binding periods have the right
+sign (the capped rate is below the statutory one; the household would
+rather disinvest). The first guess is the constraint violations of the
+unconstrained path, which usually is (or is one step from) the answer.
+
+Each regime sequence's sparse LU factorization is cached on the
+linearization, so shock paths that share a regime sequence (the common
+case: never binding, or binding for the same months) are one triangular
+solve each. simulate() spreads many shock paths over worker processes.
+
+The piecewise-linear paths are accurate for moderate deviations from
+the steady state; model.solve() is the exact (unconstrained) solution
+for large shocks.
+"""
+
+import os
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from softwood import lazy, model, parallel
+
+sparse = lazy.module('scipy.sparse')
+linalg = lazy.module('scipy.sparse.linalg')
+
+N = len(model.VARIABLES) + 1
+OMEGA = N - 1
+EULER, CAPITAL, P_W, W = 0, 0, 3, 5
+
+Linearization = namedtuple('Linearization', ['params', 'steady', 'levels', 'k0', 'periods', 'tau', 'omega',
+                                             'model_rows', 'exogenous', 'factors'])
+Piecewise = namedtuple('Piecewise', ['path', 'regimes', 'iterations', 'converged'])
+
+# Factorizations kept per linearization
+CACHE_SIZE = 256
+
+# The linearization, options and summary shared with forked workers (factorizations do not pickle)
+_shared = None
+
+
+def linearize(params, tau=0.0, omega=0.0, periods=600, initial=None):
+    """Linearize the stacked model around the steady state of (tau, omega) over periods.
+
+    The path starts from the steady-state capital of initial = (tau,
+    omega) (the reference steady state by default) and ends back at the
+    reference steady state, so shocks should die out within periods.
+    """
+    steady = model.steady_state(params, tau, omega)
+    start = steady if initial is None else model.steady_state(params, *initial, guess=steady)
+    k0 = np.exp(start[0])
+    Y = np.tile(steady, (periods, 1))
+    taus = np.full(periods, float(tau))
+    omegas = np.full(periods, float(omega))
+
+    # Model equations in the 7 log unknowns and the subsidy rate of every period
+    jacobian = model._jacobian(Y, k0, steady, taus, omegas, params).tocoo()
+    rows = jacobian.row // (N - 1) * N + jacobian.row % (N - 1)
+    cols = jacobian.col // (N - 1) * N + jacobian.col % (N - 1)
+    step = 1e-6
+    base_residual = model._residuals(Y, k0, steady, taus, omegas, params)
+    exogenous = {}
+    for name in ('omega', 'tau', 'demand'):
+        bumped = dict(tau=taus, omega=omegas, demand=0.0)
+        bumped[name] = bumped[name] + step
+        exogenous[name] = (model._residuals(Y, k0, steady, bumped['tau'], bumped['omega'], params,
+                                            bumped['demand']) - base_residual) / step
+    block = np.repeat(np.arange(periods), N - 1)
+    equation = np.tile(np.arange(N - 1), periods)
+    omega_rows = block * N + equation
+    model_rows = sparse.csr_matrix(
+        (np.concatenate([jacobian.data, exogenous['omega'].ravel()]),
+         (np.concatenate([rows, omega_rows]), np.concatenate([cols, block * N + OMEGA]))),
+        shape=(periods * N, periods * N))
+    exogenous = {'base': base_residual, 'tau': exogenous['tau'], 'demand': exogenous['demand']}
+
+    levels = model._levels(steady[None], np.exp(steady[0]), steady, tau, omega, params)
+    levels = {name: float(value[0]) for name, value in levels.items()}
+    return Linearization(params, steady, levels, k0, periods, float(tau), float(omega),
+                         model_rows, exogenous, OrderedDict())
+
+
+def _rows(linear, cap, investment):
+    """Assemble the sparse system for one regime sequence (boolean arrays over periods)."""
+    periods = linear.periods
+    keep = np.ones(periods * N, dtype=bool)
+    extra_rows, extra_cols, extra_values = [], [], []
+    delta = linear.params['delta_period']
+    t = np.arange(periods)
+
+    # Investment floor in place of the Euler equation: k_{t+1} - (1 - delta) k_t = -delta (log deviations)
+    binding = t[investment]
+    keep[binding * N + EULER] = False
+    for period in binding:
+        extra_rows += [period * N + EULER]
+        extra_cols += [period * N + CAPITAL]
+        extra_values += [1.0]
+        if period > 0:
+            extra_rows += [period * N + EULER]
+            extra_cols += [(period - 1) * N + CAPITAL]
+            extra_values += [-(1 - delta)]
+
+    # Subsidy rate: the statutory rate, or spending at the cap (G = omega P^W W, linearized)
+    spending = linear.levels['P_W'] * linear.levels['W']
+    for period in t:
+        row = period * N + OMEGA
+        if cap[period]:
+            extra_rows += [row, row, row]
+            extra_cols += [period * N + OMEGA, period * N + P_W, period * N + W]
+            extra_values += [spending, linear.levels['G'], linear.levels['G']]
+        else:
+            extra_rows.append(row)
+            extra_cols.append(period * N + OMEGA)
+            extra_values.append(1.0)
+
+    mask = sparse.diags(keep.astype(float))
+    extra = sparse.csr_matrix((extra_values, (extra_rows, extra_cols)), shape=linear.model_rows.shape)
+    return sparse.csc_matrix(mask @ linear.model_rows + extra)
+
+
+def _factor(linear, cap, investment):
+    key = np.packbits(cap).tobytes() + np.packbits(investment).tobytes()
+    factors = linear.factors
+    if key in factors:
+        factors.move_to_end(key)
+        return factors[key]
+    factor = linalg.splu(_rows(linear, cap, investment))
+    factors[key] = factor
+    if len(factors) > CACHE_SIZE:
+        factors.popitem(last=False)
+    return factor
+
+
+def _solve_regime(linear, cap, investment, tau, omega, demand, ceiling):
+    """Solve the linear system for one regime sequence; returns the (periods x N) deviations."""
+    periods = linear.periods
+    exogenous = linear.exogenous
+    rhs = -(exogenous['base'] + exogenous['tau'] * (tau - linear.tau)[:, None]
+            + exogenous['demand'] * demand[:, None]).copy()
+    delta = linear.params['delta_period']
+    k_gap = np.log(linear.k0) - linear.steady[CAPITAL]
+
+    rhs = np.column_stack([rhs, omega - linear.omega])
+    rhs[investment, EULER] = -delta
+    if investment[0]:
+        rhs[0, EULER] += (1 - delta) * k_gap
+    rhs[cap, OMEGA] = ceiling - linear.levels['G']
+    return _factor(linear, cap, investment).solve(rhs.ravel()).reshape(periods, N)
+
+
+def _check(linear, deviation, cap, investment, omega, demand, tau, ceiling, tol):
+    """Return the regimes implied by a solution (OccBin update)."""
+    delta = linear.params['delta_period']
+    k = deviation[:, CAPITAL]
+    k_previous = np.concatenate([[np.log(linear.k0) - linear.steady[CAPITAL]], k[:-1]])
+    invest_gap = k - (1 - delta) * k_previous + delta
+    spending = linear.levels['G'] + (linear.levels['P_W'] * linear.levels['W'] * deviation[:, OMEGA]
+                                     + linear.levels['G'] * (deviation[:, P_W] + deviation[:, W]))
+    rate = linear.omega + deviation[:, OMEGA]
+
+    # The Euler residual where investment is held at zero: positive means the household would disinvest
+    residual = (linear.model_rows @ deviation.ravel()).reshape(linear.periods, N)[:, :N - 1]
+    residual = residual + linear.exogenous['base'] + linear.exogenous['tau'] * (tau - linear.tau)[:, None] \
+        + linear.exogenous['demand'] * demand[:, None]
+    euler = residual[:, EULER]
+
+    new_cap = np.where(cap, rate <= omega + tol, spending > ceiling + tol * max(ceiling, 1.0))
+    new_investment = np.where(investment, euler >= -tol, invest_gap < -tol)
+    return new_cap, new_investment
+
+
+def solve(linear, tau=None, omega=None, demand=0.0, ceiling=np.inf, investment_floor=True,
+          index=None, max_iter=50, tol=1e-9):
+    """Piecewise-linear path for shock paths tau and demand, with the subsidy cap and investment floor.
+
+    tau and omega (the statutory subsidy rate) default to the
+    linearization's; ceiling is the cap on subsidy spending in model
+    units (np.inf for none) and investment_floor switches the capital
+    constraint. Returns a Piecewise namedtuple of the path (levels, as
+    in model.solve, plus the effective subsidy rate), the binding
+    regimes (a boolean DataFrame with 'cap' and 'investment' columns),
+    the regime iterations and whether they converged.
+    """
+    periods = linear.periods
+    tau = np.full(periods, linear.tau) if tau is None else model._as_path(tau, periods)
+    omega = np.full(periods, linear.omega) if omega is None else model._as_path(omega, periods)
+    demand = model._as_path(demand, periods)
+
+    cap = np.zeros(periods, dtype=bool)
+    investment = np.zeros(periods, dtype=bool)
+    converged = False
+    for iteration in range(1, max_iter + 1):
+        deviation = _solve_regime(linear, cap, investment, tau, omega, demand, ceiling)
+        new_cap, new_investment = _check(linear, deviation, cap, investment, omega, demand, tau, ceiling, tol)
+        new_cap &= np.isfinite(ceiling)
+        new_investment &= investment_floor
+        if np.array_equal(new_cap, cap) and np.array_equal(new_investment, investment):
+            converged = True
+            break
+        cap, investment = new_cap, new_investment
+
+    Y = linear.steady + deviation[:, :N - 1]
+    rate = linear.omega + deviation[:, OMEGA]
+    levels = model._levels(Y, linear.k0, linear.steady, tau, rate, linear.params, demand)
+    path = pd.DataFrame({name: levels[name] for name in model.PATH_COLUMNS}, index=index)
+    regimes = pd.DataFrame({'cap': cap, 'investment': investment}, index=index)
+    return Piecewise(path, regimes, iteration, converged)
+
+
+def _simulate_chunk(shocks):
+    linear, options, summary = _shared
+    solved = []
+    for shock in shocks:
+        result = solve(linear, **dict(options, **shock))
+        solved.append(summary(result) if summary is not None else result)
+    return solved
+
+
+def simulate(linear, shocks, workers=None, summary=None, **options):
+    """Solve many shock paths (a list of dicts of solve() arguments) across worker processes.
+
+    summary, if given, maps each Piecewise result to what is kept (a
+    few numbers, say) so the workers do not send whole paths back. The
+    all-slack factorization is built before the workers start, so every
+    worker shares it. Without the fork start method (Windows) the paths
+    are solved one by one.
+    """
+    global _shared
+    _factor(linear, np.zeros(linear.periods, dtype=bool), np.zeros(linear.periods, dtype=bool))
+    _shared = (linear, options, summary)
+    workers = workers or os.cpu_count() or 1
+    context = parallel.fork_context()
+    if workers == 1 or len(shocks) < 2 * workers or context is None:
+        return _simulate_chunk(shocks)
+
+    chunks = [shocks[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        parts = list(pool.map(_simulate_chunk, chunks))
+    # Undo the round-robin split
+    results = [None] * len(shocks)
+    for offset, part in enumerate(parts):
+        results[offset::workers] = part
+    return results
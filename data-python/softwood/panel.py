@@ -0,0 +1,81 @@
+"""
+The aligned monthly panel of the series the figures plot.
+
+monthly_panel() reads every monthly source once and lines the series up
+on one monthly PeriodIndex, one column per series and NaN outside each
+series' coverage:
+
+    lumber_production   16-10-0045-01 spliced with 16-10-0017-01 (newer
+                        release wins), thousands of cubic metres
+    lumber_price        18-10-0266-01 softwood lumber [24112], 202001=100
+    steel_price         18-10-0266-01 fabricated structural steel [46611]
+    concrete_price      18-10-0266-01 ready-mixed concrete [46512]
+    housing_starts      34-10-0158-01 Canada, thousands (SAAR)
+    us_housing_starts   FRED HOUST, thousands (SAAR)
+
+The panel is cached (softwood/cache.py) and rebuilt only when one of the
+source files changes.
+"""
+
+import os
+
+import pandas as pd
+
+from softwood import cache, statcan
+from softwood.periods import parse_periods
+
+DATA_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCES = {
+    'lumber_old': 'lumber-output/1610004501-eng.csv',
+    'lumber_new': 'lumber-output/1610001701-eng.csv',
+    'prices': 'prices/1810026601-eng.csv',
+    'housing_starts': 'canada-housing-starts/3410015801-eng.csv',
+    'us_housing_starts': 'housing-starts/HOUST.csv',
+}
+PRODUCTION_ROW = 'Total softwood and hardwood, production'
+PRICE_CODES = {'lumber_price': '24112', 'steel_price': '46611', 'concrete_price': '46512'}
+UNITS = {
+    'lumber_production': 'thousand cubic metres',
+    'lumber_price': 'index, 202001=100',
+    'steel_price': 'index, 202001=100',
+    'concrete_price': 'index, 202001=100',
+    'housing_starts': 'thousand units (SAAR)',
+    'us_housing_starts': 'thousand units (SAAR)',
+}
+
+
+def _path(key, root=DATA_ROOT):
+    return os.path.join(root, SOURCES[key])
+
+
+def _build(root=DATA_ROOT):
+    old = statcan.row(statcan.read_table(_path('lumber_old', root)), PRODUCTION_ROW)
+    new = statcan.row(statcan.read_table(_path('lumber_new', root)), PRODUCTION_ROW)
+    series = {'lumber_production': new.dropna().combine_first(old.dropna())}
+
+    prices = statcan.read_table(_path('prices', root))
+    for name, code in PRICE_CODES.items():
+        series[name] = statcan.code_row(prices, code)
+
+    starts = statcan.read_table(_path('housing_starts', root))
+    series['housing_starts'] = statcan.row(starts, 'Canada')
+
+    houst = pd.read_csv(_path('us_housing_starts', root))
+    series['us_housing_starts'] = pd.Series(houst['HOUST'].to_numpy(dtype='float64'),
+                                            index=parse_periods(houst['observation_date'], fmt='iso', freq='M'))
+
+    frame = pd.DataFrame({name: s.dropna() for name, s in series.items()})
+    index = pd.period_range(frame.index.min(), frame.index.max(), freq='M', name='period')
+    return frame.reindex(index)[list(UNITS)]
+
+
+def monthly_panel(start=None, root=DATA_ROOT, use_cache=True):
+    """Return the aligned monthly panel (see the module docstring), from start onwards."""
+    sources = [_path(key, root) for key in SOURCES]
+    if use_cache:
+        frame = cache.cached('panel-monthly', sources, lambda: _build(root), meta={'units': UNITS})
+    else:
+        frame = _build(root)
+    if start is not None:
+        frame = frame[frame.index >= pd.Period(start, freq='M')]
+    return frame
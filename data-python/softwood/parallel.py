@@ -0,0 +1,17 @@
+"""
+Process pools for the batch fits.
+
+The graph scripts are plain modules, so worker processes must be forked
+rather than spawned (a spawned worker would rerun the script).
+fork_context() returns the fork multiprocessing context, or None where
+fork is unavailable (Windows); callers then run the work in-process.
+"""
+
+import multiprocessing
+
+
+def fork_context():
+    """Return the 'fork' multiprocessing context, or None if this platform has none."""
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context('fork')
@@ -0,0 +1,138 @@
+"""
+Vectorized period parsing for the date formats used by the source tables.
+
+The tables name their periods in a handful of formats:
+
+    StatCan headers        'January 2017'   '%B %Y'
+    StatCan quarterly      'Q1 2017'        'Q%q %Y' (no strptime directive;
+                                            parsed with a regex)
+    StatCan annual tables  '2017'           '%Y'
+    CIMT trade series      'Jan-17'         '%b-%y'
+    FRED series            '2017-01-01'     '%Y-%m-%d'
+
+parse_periods() maps a whole header array or column to a PeriodIndex in
+one call. Each distinct string is parsed once and remembered in a lookup
+table shared by every table read in the process, so the month strings that
+recur across tables (and across the row and column axes of a panel) are
+only ever parsed the first time they are seen. Strings that are not
+periods in the detected format -- 'Unnamed: 12', units cells, footnotes --
+become NaT rather than raising.
+"""
+
+import re
+
+import pandas as pd
+
+QUARTER = 'Q%q %Y'
+_QUARTER = re.compile(r'^Q([1-4])\s+(\d{4})$')
+
+# Formats tried, in order, when none is given
+FORMATS = {
+    'statcan': '%B %Y',
+    'quarter': QUARTER,
+    'cimt': '%b-%y',
+    'iso': '%Y-%m-%d',
+    'year': '%Y',
+}
+
+# Default period frequency for each format
+FREQUENCIES = {
+    '%B %Y': 'M',
+    QUARTER: 'Q',
+    '%b-%y': 'M',
+    '%Y-%m-%d': 'M',
+    '%Y': 'Y',
+}
+
+# (format, freq) -> {string: Period or NaT}
+_lookup = {}
+
+
+def _as_strings(values):
+    """Return values as an object array of stripped strings (NaN for missing)."""
+    index = pd.Index(values)
+    if index.dtype != object and not pd.api.types.is_string_dtype(index.dtype):
+        index = index.astype(str)
+    return pd.Series(index.astype(object)).str.strip().to_numpy(dtype=object)
+
+
+def detect_format(values, sample=20):
+    """Return the first known format that parses one of the first non-empty values.
+
+    Labels that are not periods (a leading dimension name, 'Unnamed: 0')
+    are skipped; None is returned if none of the sample parses.
+    """
+    candidates = [v for v in _as_strings(values) if isinstance(v, str) and v][:sample]
+    for value in candidates:
+        for fmt in FORMATS.values():
+            if fmt == QUARTER:
+                if _QUARTER.match(value):
+                    return fmt
+                continue
+            try:
+                pd.to_datetime(value, format=fmt)
+            except (ValueError, TypeError):
+                continue
+            return fmt
+    return None
+
+
+def _parse_quarters(strings, freq):
+    """Parse 'Q1 2017' strings to periods at freq (NaT where they do not match)."""
+    periods = []
+    for value in strings:
+        match = _QUARTER.match(value) if isinstance(value, str) else None
+        if match is None:
+            periods.append(pd.NaT)
+        else:
+            quarter = pd.Period(year=int(match.group(2)), quarter=int(match.group(1)), freq='Q')
+            periods.append(quarter.asfreq(freq, how='start') if freq != 'Q' else quarter)
+    return periods
+
+
+def _resolve(uniques, fmt, freq):
+    """Parse the strings not yet in the lookup table and add them to it."""
+    table = _lookup.setdefault((fmt, freq), {})
+    missing = [u for u in uniques if u not in table]
+    if missing and fmt == QUARTER:
+        table.update(zip(missing, _parse_quarters(missing, freq)))
+    elif missing:
+        parsed = pd.to_datetime(pd.Index(missing, dtype=object), format=fmt, errors='coerce')
+        periods = parsed.to_period(freq)
+        table.update(zip(missing, periods))
+    return table
+
+
+def parse_periods(values, fmt=None, freq=None):
+    """Map an array of date strings to a PeriodIndex in one vectorized call.
+
+    fmt is a strftime format or one of the FORMATS keys; when omitted it is
+    detected from the first non-empty value. freq defaults to the format's
+    natural frequency (monthly, or annual for bare years). Values that do
+    not parse become NaT.
+    """
+    fmt = FORMATS.get(fmt, fmt)
+    if fmt is None:
+        fmt = detect_format(values)
+        if fmt is None:
+            return pd.PeriodIndex([pd.NaT] * len(values), freq=freq or 'M')
+    freq = freq or FREQUENCIES.get(fmt, 'M')
+
+    strings = _as_strings(values)
+    codes, uniques = pd.factorize(strings)
+    table = _resolve(list(uniques), fmt, freq)
+    parsed = pd.PeriodIndex([table[u] for u in uniques], freq=freq)
+    # Code -1 (missing value) takes the fill value
+    return parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+
+
+def period_columns(columns, fmt=None, freq=None):
+    """Return (mask, periods) for the columns of a table that name periods."""
+    periods = parse_periods(columns, fmt=fmt, freq=freq)
+    mask = ~periods.isna()
+    return mask, periods[mask]
+
+
+def clear_lookup():
+    """Forget every memoized period string."""
+    _lookup.clear()
@@ -0,0 +1,199 @@
+"""
+Labour productivity (output per worker) and chain-linked indices.
+
+productivity(output, employment) lines an output flow up with an
+employment stock by period index, at the coarser of their two
+frequencies: monthly production against annual SEPH employment gives an
+annual index (production summed over the year, employment as published),
+monthly production against monthly employment a monthly one. Either
+argument can be a single series or a panel with one column per province
+x sector; the columns are matched by name and computed together.
+
+chain_index() turns every column into a chain-linked index equal to 100
+in a base period, and aggregate_index() chains a weighted panel of them
+into one index (e.g. Canada from the provinces, with employment
+weights), so the weights are updated every period.
+
+Confidence flags come from the StatCan quality letters that
+statcan.read_table() splits off the values (A excellent to F too
+unreliable to publish). Each aligned period takes the worst letter of
+the output and employment cells that went into it:
+
+    'high'        A or B
+    'medium'      C or D
+    'low'         E
+    'unreliable'  F
+    'unrated'     no cell carries a quality letter (older releases)
+    'incomplete'  some of the period's output months are missing
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from softwood import resample
+
+Productivity = namedtuple('Productivity', ['output', 'employment', 'productivity', 'index', 'confidence'])
+
+QUALITY_RANKS = {'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6}
+CONFIDENCE = {1: 'high', 2: 'high', 3: 'medium', 4: 'medium', 5: 'low', 6: 'unreliable'}
+_PERIODS_PER_YEAR = {'Y': 1, 'A': 1, 'Q': 4, 'M': 12}
+
+
+def _as_frame(data):
+    if isinstance(data, pd.Series):
+        return data.to_frame(data.name if data.name is not None else 0), True
+    return data, False
+
+
+def periods_per_year(index):
+    """Return 12, 4 or 1 for a monthly, quarterly or annual PeriodIndex (or Period)."""
+    freqstr = index.freqstr
+    if freqstr[0] not in _PERIODS_PER_YEAR:
+        raise ValueError(f'Unsupported frequency {freqstr!r}; expected monthly, quarterly or annual periods')
+    return _PERIODS_PER_YEAR[freqstr[0]]
+
+
+def quality_rank(flags):
+    """Rank the quality letter of every flag cell (A=1 ... F=6; NaN without one).
+
+    Each distinct flag string is ranked once; a cell such as 'rB'
+    (revised, very good) takes its quality letter.
+    """
+    frame, squeeze = _as_frame(flags)
+    codes, uniques = pd.factorize(frame.to_numpy().ravel())
+    ranks = np.array([max((QUALITY_RANKS[c] for c in str(u) if c in QUALITY_RANKS), default=np.nan)
+                      for u in uniques] + [np.nan])
+    ranked = pd.DataFrame(ranks[codes].reshape(frame.shape), index=frame.index, columns=frame.columns)
+    return ranked.iloc[:, 0] if squeeze else ranked
+
+
+def _base_rows(index, base):
+    """Return a mask of the rows of index that fall in the base period."""
+    period = base if isinstance(base, pd.Period) else pd.Period(str(base))
+    if periods_per_year(period) > periods_per_year(index):
+        raise ValueError(f'Base period {period} is finer than the {index.freqstr} data')
+    mask = index.asfreq(period.freqstr, how='start') == period
+    if not mask.any():
+        raise ValueError(f'Base period {period} is outside the data ({index[0]} to {index[-1]})')
+    return mask
+
+
+def _rebase(levels, base):
+    """Scale every column to 100 in the base period (or its first observation when base is None)."""
+    values = levels.to_numpy(dtype='float64')
+    if base is None:
+        first = np.argmax(~np.isnan(values), axis=0)
+        reference = values[first, np.arange(values.shape[1])]
+    else:
+        reference = np.nanmean(values[_base_rows(levels.index, base)], axis=0)
+    return levels * (100 / reference)
+
+
+def chain_index(values, base=None):
+    """Chain-link every column into an index equal to 100 in the base period.
+
+    The links are ratios between consecutive observed periods, so a
+    column with gaps is chained across them. base is a period label
+    ('2004', '2004Q1', '2004-06') at or above the data's frequency; a
+    year label on monthly data makes the year's average 100. By default
+    each column's first observation is 100.
+    """
+    frame, squeeze = _as_frame(values)
+    previous = frame.ffill().shift(1)
+    links = (frame / previous).where(frame.notna())
+    # The first observation of each column starts the chain at 1
+    links = links.mask(previous.isna() & frame.notna(), 1.0)
+    levels = links.fillna(1.0).cumprod().where(frame.notna())
+    index = _rebase(levels, base)
+    return index.iloc[:, 0] if squeeze else index
+
+
+def aggregate_index(values, weights, base=None):
+    """Chain a panel of series into one index, weighting each link by the previous period's weights.
+
+    Each period's link is the weighted mean of the columns' period-to-
+    period ratios over the columns observed in both periods, with the
+    weights (employment, say) of the earlier period. Returns a Series
+    equal to 100 in the base period.
+    """
+    previous_values = values.shift(1)
+    ratios = values / previous_values
+    previous_weights = weights.reindex_like(values).shift(1).where(ratios.notna())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        links = (ratios * previous_weights).sum(axis=1, min_count=1) / previous_weights.sum(axis=1, min_count=1)
+    observed = values.notna().any(axis=1)
+    first = observed.to_numpy().argmax()
+    links.iloc[first] = 1.0
+    levels = links.where(observed).fillna(1.0).cumprod().where(observed)
+    levels.iloc[:first] = np.nan
+    return _rebase(levels.to_frame('index'), base)['index']
+
+
+def _confidence(ranks, complete):
+    labels = np.array(['unrated'] + [CONFIDENCE[r] for r in sorted(CONFIDENCE)], dtype=object)
+    codes = np.where(np.isnan(ranks), 0, np.nan_to_num(ranks)).astype(int)
+    confidence = labels[codes]
+    confidence[~complete] = 'incomplete'
+    return confidence
+
+
+def productivity(output, employment, output_flags=None, employment_flags=None, base=None, start=None):
+    """Output per worker, its chain-linked index and confidence flags, aligned by period.
+
+    output is a flow (summed to the common frequency) and employment a
+    stock (averaged); both have a PeriodIndex and, for panels, matching
+    columns. The flags are the matching statcan.Table flag frames or
+    rows, used for the confidence flags. Periods before start, and
+    periods with no positive employment and output pair, are dropped.
+
+    Returns a Productivity namedtuple of output, employment,
+    productivity, index (100 in base; the first period by default) and
+    confidence, each a DataFrame (or Series, for Series arguments)
+    indexed by the aligned periods.
+    """
+    output_frame, squeeze = _as_frame(output)
+    employment_frame, _ = _as_frame(employment)
+    if squeeze:
+        employment_frame = employment_frame.set_axis(output_frame.columns, axis=1)
+    coarse = min(output_frame.index, employment_frame.index, key=periods_per_year)
+    freq = coarse.freqstr
+
+    # Sum output and average employment to the coarser frequency
+    months_per_period = periods_per_year(output_frame.index) // periods_per_year(coarse)
+    output_sum = resample.aggregate(output_frame, freq, how='sum')
+    output_count = resample.aggregate(output_frame, freq, how='count')
+    employment_mean = resample.aggregate(employment_frame, freq, how='mean')
+
+    periods = output_sum.index.intersection(employment_mean.index)
+    if start is not None:
+        periods = periods[periods >= pd.Period(str(start), freq=freq)]
+    output_sum = output_sum.reindex(periods)
+    employment_mean = employment_mean.reindex(periods)[output_sum.columns]
+    valid = output_sum.notna() & employment_mean.gt(0)
+    output_sum = output_sum.where(valid)
+    employment_mean = employment_mean.where(valid)
+    keep = valid.any(axis=1)
+    output_sum, employment_mean = output_sum[keep], employment_mean[keep]
+
+    per_worker = output_sum / employment_mean
+    index = chain_index(per_worker, base=base)
+
+    # Worst quality letter of the cells behind each aligned period
+    ranks = pd.DataFrame(np.nan, index=per_worker.index, columns=per_worker.columns)
+    for flags, frame in ((output_flags, output_frame), (employment_flags, employment_frame)):
+        if flags is None:
+            continue
+        ranked, _ = _as_frame(quality_rank(flags))
+        ranked = ranked.set_axis(frame.columns, axis=1).reindex(frame.index)
+        worst = resample.aggregate(ranked, freq, how='max').reindex(per_worker.index)
+        ranks = np.fmax(ranks, worst)
+    complete = output_count.reindex(per_worker.index).to_numpy() >= months_per_period
+    confidence = pd.DataFrame(_confidence(ranks.to_numpy(), complete), index=per_worker.index,
+                              columns=per_worker.columns).where(valid[keep])
+
+    parts = [output_sum, employment_mean, per_worker, index, confidence]
+    if squeeze:
+        parts = [part.iloc[:, 0] for part in parts]
+    return Productivity(*parts)
@@ -0,0 +1,421 @@
+"""
+Incremental refresh of the source tables from a data mirror.
+
+The StatCan tables are checked in as downloaded, and each one names its
+table ID and release date in its preamble:
+
+    "Table: 18-10-0266-01"
+    "Release date: 2025-11-20"
+
+A mirror is either a local directory holding newer downloads (laid out
+like data-python/, or flat) or an HTTP base URL serving the same files
+by name. refresh() reads just the first few kilobytes of each table on
+the mirror, compares its release date with the local copy and only
+downloads tables that have a newer release. FRED series (HOUST.csv) carry
+no release metadata and are small, so they are compared by content. A
+download that does not match its table's schema (softwood/schema.py) is
+rejected before it replaces the local copy.
+
+Every table is also kept in the columnar cache (softwood/cache.py) in long
+form, one row per label x period cell. When a table changes, only the
+cells that are new (new periods) or revised are appended as a new part,
+tagged with the release it came from (its date, file, periods and the
+cells it added and revised), so a monthly refresh writes O(new data)
+instead of rebuilding the table and every release stays readable
+(vintage.py answers as-of queries from the parts). It reads O(new data)
+too: only the new periods and the last REVISION_PERIODS cached ones are
+taken from the file and compared with the parts that hold them, so a
+revision further back needs a full comparison (refresh(force=True)). load_table() reads
+the cached table back into the same Table that statcan.read_table()
+returns.
+"""
+
+import csv
+import glob
+import hashlib
+import io
+import os
+import tempfile
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from softwood import cache, periods, schema, statcan
+
+MIRROR_ENV = 'SOFTWOOD_MIRROR'
+DATA_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATCAN_PATTERN = '*/*-eng.csv'
+# FRED series id -> local path (relative to data-python)
+FRED_SERIES = {'HOUST': 'housing-starts/HOUST.csv'}
+
+PREAMBLE_BYTES = 8192
+CHUNK_BYTES = 1 << 20
+# Periods before the last cached one that a refresh re-reads for revisions
+REVISION_PERIODS = 12
+
+
+def product_filename(table_id):
+    """Return the download file name for a StatCan table ID ('16-10-0017-01' -> '1610001701-eng.csv')."""
+    return table_id.replace('-', '') + '-eng.csv'
+
+
+def local_tables(root=DATA_ROOT):
+    """Return an entry for every source table checked in under root.
+
+    Each entry is a dict with kind ('statcan' or 'fred'), id, path
+    (relative to root) and, for StatCan tables, release_date.
+    """
+    entries = []
+    for path in sorted(glob.glob(os.path.join(root, STATCAN_PATTERN))):
+        meta = statcan.parse_release(_preamble_lines(path))
+        if 'table_id' not in meta:
+            continue
+        entries.append({'kind': 'statcan', 'id': meta['table_id'],
+                        'path': os.path.relpath(path, root),
+                        'release_date': meta.get('release_date')})
+    for series_id, relpath in FRED_SERIES.items():
+        entries.append({'kind': 'fred', 'id': series_id, 'path': relpath, 'release_date': None})
+    return entries
+
+
+def _preamble_lines(path):
+    with open(path, 'rb') as f:
+        return _lines_from_bytes(f.read(PREAMBLE_BYTES))
+
+
+def _lines_from_bytes(data):
+    """Split the start of a CSV into rows, dropping a trailing partial line."""
+    text = data.decode('utf-8-sig', errors='replace')
+    if '\n' in text:
+        text = text[:text.rindex('\n')]
+    return list(csv.reader(io.StringIO(text)))
+
+
+def _is_url(source):
+    return urllib.parse.urlparse(source).scheme in ('http', 'https', 'file')
+
+
+def _locate(source, entry):
+    """Return the path or URL of entry on the mirror, or None if it is not there."""
+    name = os.path.basename(entry['path'])
+    if _is_url(source):
+        return urllib.parse.urljoin(source.rstrip('/') + '/', name)
+    for candidate in (os.path.join(source, entry['path']), os.path.join(source, name)):
+        if os.path.isfile(candidate):
+            return candidate
+    matches = glob.glob(os.path.join(source, '**', name), recursive=True)
+    return matches[0] if matches else None
+
+
+def _open(location):
+    """Open a mirror location for binary reading, or return None if it is missing."""
+    if location is None:
+        return None
+    if _is_url(location):
+        try:
+            return urllib.request.urlopen(location, timeout=60)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+    return open(location, 'rb')
+
+
+def remote_release(source, entry):
+    """Return the preamble metadata (table_id, release_date) of entry on the mirror, or None."""
+    f = _open(_locate(source, entry))
+    if f is None:
+        return None
+    with f:
+        return statcan.parse_release(_lines_from_bytes(f.read(PREAMBLE_BYTES)))
+
+
+def _download(location, dest, check=None):
+    """Stream location into dest, replacing it atomically. Returns the SHA-1 of the content.
+
+    check is called with the downloaded file's path before it replaces
+    dest; if it raises, dest is left untouched.
+    """
+    digest = hashlib.sha1()
+    directory = os.path.dirname(dest) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.download-')
+    try:
+        with _open(location) as src, os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = src.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+        if check is not None:
+            check(tmp)
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return digest.hexdigest()
+
+
+def _check_table(path, entry, location):
+    """Check a downloaded table against its schema (raises schema.SchemaError naming location)."""
+    try:
+        if entry['kind'] == 'fred':
+            schema.check_series(path, entry['id'])
+        else:
+            schema.check(statcan.read_metadata(path), table_id=entry['id'])
+    except schema.SchemaError as e:
+        raise schema.SchemaError(str(e).replace(path, location)) from None
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_name(entry):
+    """Return the cache table name for an entry."""
+    return f"{entry['kind']}-{entry['id']}"
+
+
+def _long(values, flags):
+    """Flatten a wide values/flags table to one row per label x column cell."""
+    n_rows, n_cols = values.shape
+    columns = values.columns
+    data = {'label': np.repeat(values.index.to_numpy(dtype=object), n_cols)}
+    keys = ['label']
+    for level in range(columns.nlevels):
+        name = columns.names[level] or f'level_{level}'
+        data[name] = np.tile(columns.get_level_values(level).astype(str).to_numpy(dtype=object), n_rows)
+        keys.append(name)
+    data['row'] = np.repeat(np.arange(n_rows), n_cols)
+    data['col'] = np.tile(np.arange(n_cols), n_rows)
+    data['value'] = values.to_numpy(dtype='float64').ravel()
+    data['flag'] = flags.to_numpy(dtype=object).ravel()
+    return pd.DataFrame(data).set_index(keys)
+
+
+def read_source(entry, root=DATA_ROOT, since=None):
+    """Read a local source table as (long frame, meta).
+
+    since keeps only the cells of the periods from then on; the meta
+    still describes the whole table.
+    """
+    path = os.path.join(root, entry['path'])
+    if entry['kind'] == 'fred':
+        series = pd.read_csv(path)
+        months = periods.parse_periods(series.iloc[:, 0], fmt='iso')
+        values = pd.DataFrame([pd.to_numeric(series.iloc[:, 1], errors='coerce').to_numpy()],
+                              index=[entry['id']], columns=pd.PeriodIndex(months, name='period'))
+        flags = pd.DataFrame('', index=values.index, columns=values.columns)
+        meta = {'table_id': entry['id'], 'release_date': None, 'units': None,
+                'content_hash': _file_hash(path)}
+        columns = values.columns
+        meta.update(first_period=str(columns.min()), last_period=str(columns.max()))
+        if since is not None:
+            keep = columns >= pd.Period(since, freq=columns.freq)
+            values, flags = values.loc[:, keep], flags.loc[:, keep]
+    else:
+        table = statcan.read_table(path, since=since)
+        values, flags = table.values, table.flags
+        meta = {'table_id': table.meta['table_id'], 'units': table.units,
+                'release_date': table.meta['release_date'].isoformat(),
+                'row_dimension': table.meta['row_dimension'],
+                'first_period': str(table.meta['first_period']), 'last_period': str(table.meta['last_period'])}
+    meta['freq'] = values.columns.get_level_values(0).freqstr
+    return _long(values, flags), meta
+
+
+def _current(name):
+    """Read a cached long table, keeping the latest version of every cell."""
+    frame = cache.read(name)
+    if frame is None:
+        return None
+    return frame[~frame.index.duplicated(keep='last')]
+
+
+def _window(name, start, freq):
+    """Read the cached cells of the periods from start on, keeping the latest version of each.
+
+    Only the parts whose periods reach start are read.
+    """
+    def reaches(part):
+        return part.get('last_period') is None or pd.Period(part['last_period'], freq=freq) >= start
+    frames = [cells for _, cells in cache.read_parts(name, reaches)]
+    if not frames:
+        return None
+    frame = pd.concat(frames)
+    frame = frame[pd.PeriodIndex(frame.index.get_level_values('period'), freq=freq) >= start]
+    return frame[~frame.index.duplicated(keep='last')]
+
+
+def _changed_cells(old, new):
+    """Return the rows of new that are not in old or differ from it."""
+    added = ~new.index.isin(old.index)
+    previous = old.reindex(new.index)
+    same_value = (previous['value'] == new['value']) | (previous['value'].isna() & new['value'].isna())
+    same_flag = previous['flag'].fillna('') == new['flag'].fillna('')
+    return new[added | ~(same_value & same_flag)], int(added.sum())
+
+
+def sync_cache(entry, root=DATA_ROOT, full=False):
+    """Bring the cached copy of a local table up to date.
+
+    Once a table is cached, only the periods after its last cached period
+    and the REVISION_PERIODS before it are read from the file and compared
+    with the cached cells of those periods (from the parts that reach
+    them), so a refresh costs O(new data) rather than O(table). The file
+    is still scanned line by line, but only those columns are converted.
+    A revision to an older period, or a row added with values in older
+    periods only, is missed; full=True compares the whole table.
+
+    Returns (added_cells, revised_cells); (0, 0) if the cache was current.
+    """
+    name = cache_name(entry)
+    path = os.path.join(root, entry['path'])
+    if cache.is_fresh(name, [path]):
+        return 0, 0
+    manifest = cache.read_manifest(name)
+    since = None
+    if manifest is not None and not full:
+        cached = manifest['meta']
+        since = pd.Period(cached['last_period'], freq=cached['freq']) - REVISION_PERIODS
+    frame, meta = read_source(entry, root, since=since)
+    part_meta = {key: meta[key] for key in ('release_date', 'table_id', 'first_period', 'last_period')}
+    part_meta['path'] = entry['path']
+    if manifest is None:
+        cache.write(name, frame, sources=[path], meta=meta, part_meta=dict(part_meta, added=len(frame), revised=0))
+        return len(frame), 0
+    old = _current(name) if since is None else _window(name, since, meta['freq'])
+    if old is None:
+        old = frame.iloc[:0]
+    changed, added = _changed_cells(old, frame)
+    if changed.empty:
+        # Same content under a new signature (e.g. re-downloaded); just re-stamp it
+        cache.restamp(name, sources=[path], meta=meta)
+        return 0, 0
+    revised = len(changed) - added
+    cache.append(name, changed, sources=[path], meta=meta, part_meta=dict(part_meta, added=added, revised=revised))
+    return added, revised
+
+
+def compact(entry):
+    """Rewrite a cached table as a single part holding the latest cells.
+
+    The earlier releases are dropped, so vintage.as_of() can then only
+    return the latest one.
+    """
+    name = cache_name(entry)
+    manifest = cache.read_manifest(name)
+    if manifest is None:
+        return
+    frame = _current(name)
+    sources = [s['path'] for s in manifest['sources']]
+    last = manifest['parts'][-1] if manifest['parts'] else {}
+    part_meta = {k: v for k, v in last.items() if k not in ('file', 'rows', 'hash')}
+    cache.write(name, frame, sources=sources, meta=manifest['meta'],
+                part_meta=dict(part_meta, added=len(frame), revised=0))
+
+
+def find_entry(table_id, root=DATA_ROOT):
+    """Return the local_tables() entry of a table or series ID (KeyError if there is none)."""
+    entry = next((e for e in local_tables(root) if e['id'] == table_id), None)
+    if entry is None:
+        raise KeyError(f'Unknown table {table_id}')
+    return entry
+
+
+def load_table(table_id):
+    """Return a cached table as a statcan.Table (values, flags, units, codes)."""
+    entry = find_entry(table_id)
+    sync_cache(entry)
+    name = cache_name(entry)
+    meta = cache.read_manifest(name)['meta']
+    return wide_table(_current(name), meta, entry['path'])
+
+
+def wide_table(cells, meta, path):
+    """Pivot long cells (one row per label x column, as cached) back into a statcan.Table."""
+    frame = cells.reset_index()
+    column_keys = [c for c in frame.columns if c not in ('label', 'row', 'col', 'value', 'flag', 'release')]
+    frame['period'] = pd.PeriodIndex(frame['period'], freq=meta['freq'])
+    values = frame.pivot(index='label', columns=column_keys, values='value')
+    flags = frame.pivot(index='label', columns=column_keys, values='flag')
+
+    # Order rows and columns as in the latest release that touched them
+    row_order = frame.groupby('label')['row'].last().sort_values()
+    col_order = frame.groupby(column_keys)['col'].last()
+    columns = sorted(col_order.index, key=lambda key: (key[0], col_order[key]) if isinstance(key, tuple) else key)
+    values = values.reindex(index=row_order.index, columns=columns)
+    flags = flags.reindex(index=row_order.index, columns=columns)
+    values.index.name = flags.index.name = meta.get('row_dimension')
+    return statcan.Table(dict(meta, path=path), values, flags, meta.get('units'),
+                         statcan.label_codes(values.index))
+
+
+def refresh(source=None, tables=None, force=False, dry_run=False, root=DATA_ROOT):
+    """Fetch tables that have a newer release on the mirror and update the cache.
+
+    source is a mirror directory or base URL (default $SOFTWOOD_MIRROR);
+    without one, only the cache is synced with the local files. tables
+    restricts the refresh to the given table or series IDs; force also
+    compares whole tables with the cache (see sync_cache()). Returns one
+    status dict per table.
+    """
+    source = source or os.environ.get(MIRROR_ENV)
+    statuses = []
+    for entry in local_tables(root):
+        if tables and entry['id'] not in tables:
+            continue
+        status = {'id': entry['id'], 'path': entry['path'], 'local_release': entry['release_date'],
+                  'remote_release': None, 'action': 'up to date', 'added': 0, 'revised': 0}
+        dest = os.path.join(root, entry['path'])
+        location = _locate(source, entry) if source else None
+
+        try:
+            if source and location is None:
+                status['action'] = 'not on mirror'
+            elif source and entry['kind'] == 'statcan':
+                remote = remote_release(source, entry)
+                if remote is None:
+                    status['action'] = 'not on mirror'
+                else:
+                    status['remote_release'] = remote.get('release_date')
+                    if remote.get('table_id') != entry['id']:
+                        raise schema.SchemaError(f"{location} is table {remote.get('table_id')}, expected {entry['id']}")
+                    newer = (status['remote_release'] is not None
+                             and (entry['release_date'] is None or status['remote_release'] > entry['release_date']))
+                    if newer or force:
+                        status['action'] = 'would update' if dry_run else 'updated'
+                        if not dry_run:
+                            _download(location, dest, check=lambda path: _check_table(path, entry, location))
+            elif source:
+                # FRED series have no release metadata; compare content instead
+                f = _open(location)
+                if f is None:
+                    status['action'] = 'not on mirror'
+                else:
+                    with f:
+                        remote_hash = hashlib.sha1(f.read()).hexdigest()
+                    if force or not os.path.exists(dest) or remote_hash != _file_hash(dest):
+                        status['action'] = 'would update' if dry_run else 'updated'
+                        if not dry_run:
+                            _download(location, dest, check=lambda path: _check_table(path, entry, location))
+
+            if not dry_run:
+                status['added'], status['revised'] = sync_cache(entry, root, full=force)
+        except schema.SchemaError as e:
+            # Leave the local copy and the cache as they were
+            status['action'] = 'rejected'
+            status['error'] = str(e)
+
+        statuses.append(status)
+    return statuses
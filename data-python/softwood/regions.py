@@ -0,0 +1,307 @@
+"""
+Multi-region (provincial) version of the lumber model in softwood/model.py.
+
+Each of N regions has its own sawmills (capital K_i and hours L_i) and
+construction firms (lumber W_i and alternatives Psi_i); one household
+owns the capital of every region, supplies hours region by region and
+consumes a final good traded freely across regions at price P^F.
+Construction uses land in fixed supply as well,
+
+    Y^F_i = A^C_i (theta W_i^phi + (1 - theta) Psi_i^phi)^(nu/phi)
+
+with nu < 1 (the land rents go to the household); with constant
+returns every region would have to build at the same cost, and the
+size of each region's construction would be undetermined.
+Lumber is traded between regions (Armington): region j buys the
+sawmill output of every region i at the delivered price d_ij P^W_i and
+combines it into its lumber W_j,
+
+    W_j = (sum_i b_i^(1/eta) w_ij^((eta - 1)/eta))^(eta/(eta - 1))
+
+with b_i the taste for region i's lumber, d_ij = 1 + trade_cost between
+regions (iceberg costs) and eta the Armington elasticity; the lumber
+price paid in region j is P^D_j = (sum_i b_i (d_ij P^W_i)^(1 - eta))^(1/(1 - eta)).
+Each region exports to the United States, X_i = Xbar x_i exp(d)
+((1 + tau) P^W_i)^-epsilon, and national exports pay for the
+alternatives.
+
+Each period has 5N + 2 unknowns, in logs and in this order:
+
+    K_i (next period's capital), L_i, P^W_i, W_i, Psi_i   for every region
+    C, P^F
+
+and as many equations: an Euler equation and a consumption-leisure
+tradeoff per region, market clearing for each region's lumber, the two
+construction first-order conditions per region, national final-goods
+market clearing and balanced trade. With one region and constant
+returns (nu = 1) this is model.py's system.
+
+The lumber trade makes every region's price enter every other region's
+equations, so each period's block of the Jacobian has O(N^2) nonzeros,
+but periods still only touch their neighbours: solve() stacks the path
+and reuses model.py's colored, sparse Newton solver, and
+steady_states() solves any number of (tariff, subsidy) steady states as
+one block-diagonal sparse system. Ten provinces over a 1,200-month path
+solve in a few seconds.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from softwood import lazy, model
+
+optimize = lazy.module('scipy.optimize')
+
+# Interregional trade; not estimated
+REGIONAL_PARAMETERS = {
+    'armington': 4.0,          # elasticity of substitution between regions' lumber (assumed)
+    'trade_cost': 0.10,        # iceberg cost of shipping lumber to another region (assumed)
+    'nu': 0.9,                 # returns to scale in construction, one less the land share (assumed)
+}
+
+REGIONAL = ['K', 'L', 'P_W', 'W', 'Psi']
+NATIONAL = ['C', 'P_F']
+REGION_COLUMNS = REGIONAL + ['Y_W', 'Y_F', 'X', 'P_D', 'r', 'w', 'G', 'interregional']
+NATIONAL_COLUMNS = NATIONAL + ['Y_W', 'Y_F', 'X', 'G', 'tau', 'omega']
+
+RegionalSolution = namedtuple('RegionalSolution', ['regions', 'national', 'y', 'iterations', 'residual'])
+
+
+def _shares(shares, regions, positive=True):
+    shares = pd.Series(shares, dtype='float64').reindex(regions)
+    if shares.isna().any() or (shares < 0).any() or shares.sum() <= 0 or positive and (shares == 0).any():
+        raise ValueError(f"Every region needs a {'positive' if positive else 'non-negative'} share")
+    return (shares / shares.sum()).to_numpy()
+
+
+def calibrate(production, construction=None, exports=None, national=None, **overrides):
+    """Return the parameters of the regional model.
+
+    production, construction and exports are each region's share of
+    lumber output, of construction and of lumber exports to the United
+    States (Series or dicts by region name, in any units; construction
+    and exports default to the production shares, and exports may be
+    zero). national is a model.calibrate() parameter dict (computed if
+    not given), whose annual parameters and targets carry over. The
+    taste for each region's lumber is proportional to its production
+    share; sawmill and construction technology, the leisure weight of
+    each region and Xbar are set so the untaxed steady state matches
+    the production and construction shares, the target hours in every
+    region and the national export share.
+    """
+    national = model.calibrate() if national is None else national
+    params = dict(national, **REGIONAL_PARAMETERS)
+    params.update(overrides)
+    regions = list(pd.Series(production).index)
+    n = len(regions)
+    params['regions'] = regions
+    params['production_share'] = _shares(production, regions)
+    params['construction_share'] = _shares(production if construction is None else construction, regions)
+    params['tastes'] = params['production_share']
+    params['export_weights'] = _shares(production if exports is None else exports, regions, positive=False)
+    params['trade_costs'] = 1 + params['trade_cost'] * (1 - np.eye(n))
+
+    # Unknowns: the steady state without hours, log gamma_i, log A_S and log A_C of all
+    # regions but the first (normalized to one) and log Xbar
+    hours = np.full(n, np.log(params['hours']))
+    width = 5 * n + 2
+
+    def unpack(z):
+        y = np.insert(z[:width - n], n, hours)
+        extra = z[width - n:]
+        trial = dict(params,
+                     gamma=np.exp(extra[:n]),
+                     A_S=np.exp(np.insert(extra[n:2 * n - 1], 0, 0.0)),
+                     A_C=np.exp(np.insert(extra[2 * n - 1:3 * n - 2], 0, 0.0)),
+                     xbar=float(np.exp(extra[-1])))
+        return y, trial
+
+    def equations(z):
+        y, trial = unpack(z)
+        levels = _levels(y[None], np.exp(y[None, :n]), y[None], 0.0, 0.0, trial)
+        return np.concatenate([
+            _residuals(y[None], np.exp(y[None, :n]), y[None], 0.0, 0.0, trial).ravel(),
+            np.log(levels['Y_W'][0, 1:] / levels['Y_W'][0].sum() / params['production_share'][1:]),
+            np.log(levels['Y_F'][0, 1:] / levels['Y_F'][0].sum() / params['construction_share'][1:]),
+            [np.log((levels['P_W'] * levels['X']).sum() / (levels['P_W'] * levels['Y_W']).sum()
+                    / params['export_share'])],
+        ])
+
+    # Start from the one-region steady state split by the target shares
+    one = model.steady_state(national)
+    s, h = np.log(params['production_share']), np.log(params['construction_share'])
+    guess = np.concatenate([one[0] + s, np.full(n, one[3]), one[5] + h, one[6] + h, one[[1, 4]],
+                            np.full(n, np.log(national['gamma'])), np.zeros(2 * n - 2),
+                            [np.log(national['xbar'])]])
+    found = optimize.root(equations, guess, method='hybr', options={'xtol': 1e-12})
+    if not found.success:
+        raise RuntimeError(f'Regional calibration failed: {found.message}')
+    y, trial = unpack(found.x)
+    params.update({name: trial[name] for name in ('gamma', 'A_S', 'A_C', 'xbar')})
+    params['steady'] = y
+    return params
+
+
+def _column(values, periods):
+    """A scalar, path or (periods x N) array as a 2-d array that broadcasts over regions."""
+    values = np.asarray(values, dtype='float64')
+    if values.ndim == 0:
+        return np.full((periods, 1), float(values))
+    return values[:, None] if values.ndim == 1 else values
+
+
+def _levels(Y, previous, following, tau, omega, p, demand=0.0):
+    """Every variable of every period from the log unknowns Y (periods x 5N+2).
+
+    previous is each period's capital at its start (periods x N, levels)
+    and following the log unknowns of the period after each one.
+    """
+    n = len(p['regions'])
+    K_next, L, P_W, W, Psi = (np.exp(Y[:, i * n:(i + 1) * n]) for i in range(len(REGIONAL)))
+    C, P_F = np.exp(Y[:, 5 * n]), np.exp(Y[:, 5 * n + 1])
+    K = previous
+    periods = len(Y)
+    tau, omega, shift = _column(tau, periods), _column(omega, periods), _column(demand, periods)
+
+    Y_W = p['A_S'] * K ** p['alpha'] * L ** (1 - p['alpha'])
+    inputs = (p['theta'] * W ** p['phi'] + (1 - p['theta']) * Psi ** p['phi']) ** (1 / p['phi'])
+    Y_F = p['A_C'] * inputs ** p['nu']
+    X = p['xbar'] * p['export_weights'] * np.exp(shift) * ((1 + tau) * P_W) ** -p['epsilon']
+    r = p['alpha'] * P_W * Y_W / K
+    w = (1 - p['alpha']) * P_W * Y_W / L
+
+    # Lumber trade: region j buys b_i (d_ij P^W_i / P^D_j)^-eta W_j from region i. The
+    # sums over origins and destinations are matrix products with the cost matrix
+    # raised to 1 - eta, so no periods x N x N array is formed
+    eta, costs, tastes = p['armington'], p['trade_costs'], p['tastes']
+    reach = costs ** (1 - eta)
+    demand_weight = tastes * P_W ** -eta
+    P_D = ((demand_weight * P_W) @ reach) ** (1 / (1 - eta))
+    spending = P_D ** eta * W
+    shipped = demand_weight * (spending @ reach.T)
+    own = demand_weight * np.diagonal(costs) ** -eta * spending
+    interregional = P_W * (shipped - np.diagonal(costs) * own) - (P_D * W - np.diagonal(costs) * P_W * own)
+
+    # Next period's consumption and each region's real rental rate
+    C_next = np.exp(following[:, 5 * n])
+    L_next = np.exp(following[:, n:2 * n])
+    P_W_next = np.exp(following[:, 2 * n:3 * n])
+    P_F_next = np.exp(following[:, 5 * n + 1])
+    Y_W_next = p['A_S'] * K_next ** p['alpha'] * L_next ** (1 - p['alpha'])
+    real_r_next = p['alpha'] * P_W_next * Y_W_next / K_next / P_F_next[:, None]
+    return {'K': K, 'K_next': K_next, 'C': C, 'L': L, 'P_W': P_W, 'P_F': P_F, 'W': W, 'Psi': Psi,
+            'Y_W': Y_W, 'Y_F': Y_F, 'inputs': inputs, 'X': X, 'P_D': P_D, 'r': r, 'w': w, 'shipped': shipped,
+            'interregional': interregional, 'C_next': C_next, 'real_r_next': real_r_next,
+            'G': omega * P_D * W, 'tau': np.broadcast_to(tau[:, 0], C.shape),
+            'omega': np.broadcast_to(omega[:, 0], C.shape)}
+
+
+def _residuals(Y, previous, following, tau, omega, p, demand=0.0):
+    """The 5N + 2 equations of every period, as a (periods x 5N+2) array of log gaps."""
+    v = _levels(Y, previous, following, tau, omega, p, demand)
+    C, P_F = v['C'][:, None], v['P_F'][:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        marginal = np.log(P_F * p['nu'] * p['A_C']) + (p['nu'] - p['phi']) * np.log(v['inputs'])
+        investment = v['K_next'] - (1 - p['delta_period']) * v['K']
+        return np.column_stack([
+            np.log(v['C_next'][:, None] / C) - np.log(p['beta'] * (v['real_r_next'] + 1 - p['delta_period'])),
+            np.log(p['gamma'] * C / (1 - v['L'])) - np.log(v['w'] / P_F),
+            np.log(v['Y_W']) - np.log(v['shipped'] + v['X']),
+            marginal + np.log(p['theta']) + (p['phi'] - 1) * np.log(v['W'])
+            - np.log((1 - v['omega'][:, None]) * v['P_D']),
+            marginal + np.log(1 - p['theta']) + (p['phi'] - 1) * np.log(v['Psi']) - np.log(p['P_Psi']),
+            np.log(v['Y_F'].sum(axis=1)) - np.log(v['C'] + investment.sum(axis=1)),
+            np.log((v['P_W'] * v['X']).sum(axis=1)) - np.log(p['P_Psi'] * v['Psi'].sum(axis=1)),
+        ])
+
+
+def _steady(Y, n):
+    """Capital at the start of each period and the following period's unknowns, for steady states."""
+    return np.exp(Y[:, :n]), Y
+
+
+def _stacked(Y, k0, end, n):
+    """Capital at the start of each period and the following period's unknowns, for a path."""
+    previous = np.vstack([k0[None], np.exp(Y[:-1, :n])])
+    return previous, np.vstack([Y[1:], end[None]])
+
+
+def steady_states(params, tau=0.0, omega=0.0, guess=None, tol=1e-12, max_iter=50):
+    """Return log steady states (scenarios x 5N+2) for arrays of constant tariffs and subsidies.
+
+    tau and omega broadcast against each other; every scenario is solved
+    in one sparse Newton system, starting from guess (one row, or one per
+    scenario) or the untaxed steady state of the calibration.
+    """
+    tau, omega = np.broadcast_arrays(np.atleast_1d(np.asarray(tau, dtype='float64')),
+                                     np.atleast_1d(np.asarray(omega, dtype='float64')))
+    n = len(params['regions'])
+    guess = params['steady'] if guess is None else np.asarray(guess, dtype='float64')
+    Y = np.tile(guess, (len(tau), 1)) if guess.ndim == 1 else guess.copy()
+
+    def residuals(Z):
+        return _residuals(Z, *_steady(Z, n), tau, omega, params)
+
+    Y, norm, _ = model._newton(residuals, Y, tol, max_iter, colors=1)
+    return Y
+
+
+def _frames(levels, params, index=None):
+    """Split a _levels() dict into the regional (variable x region columns) and national frames."""
+    regions = pd.DataFrame(
+        np.concatenate([levels[name] for name in REGION_COLUMNS], axis=1), index=index,
+        columns=pd.MultiIndex.from_product([REGION_COLUMNS, params['regions']], names=['variable', 'region']))
+    national = pd.DataFrame({
+        'C': levels['C'], 'P_F': levels['P_F'], 'Y_W': levels['Y_W'].sum(axis=1),
+        'Y_F': levels['Y_F'].sum(axis=1), 'X': levels['X'].sum(axis=1), 'G': levels['G'].sum(axis=1),
+        'tau': levels['tau'], 'omega': levels['omega'],
+    }, index=index)
+    return regions, national
+
+
+def steady_levels(params, tau=0.0, omega=0.0):
+    """Return every variable of the steady states of (tau, omega) as (regional, national) DataFrames."""
+    y = steady_states(params, tau, omega)
+    n = len(params['regions'])
+    tau, omega = np.broadcast_arrays(np.atleast_1d(tau), np.atleast_1d(omega))
+    levels = _levels(y, *_steady(y, n), tau, omega, params)
+    return _frames(levels, params)
+
+
+def solve(params, tau, omega=0.0, demand=0.0, initial=(0.0, 0.0), guess=None, tol=1e-10, max_iter=50):
+    """Solve the perfect-foresight path of every region for a tariff path tau, as in model.solve.
+
+    omega is a scalar or path; demand a scalar, path, or (periods x N)
+    array of log shifts in each region's export demand. Returns a
+    RegionalSolution of the regional path (columns variable x region),
+    the national path, the log unknowns y, the Newton iterations and
+    the final residual norm.
+    """
+    index = tau.index if isinstance(tau, pd.Series) else None
+    tau = model._as_path(tau, len(tau) if np.ndim(tau) else 1)
+    periods = len(tau)
+    omega = model._as_path(omega, periods)
+    demand = np.asarray(demand, dtype='float64')
+    if demand.ndim == 0:
+        demand = np.full(periods, float(demand))
+    n = len(params['regions'])
+
+    start, end = steady_states(params, [initial[0], tau[-1]], [initial[1], omega[-1]])
+    k0 = np.exp(start[:n])
+    if guess is not None:
+        Y = np.array(guess, dtype='float64')
+    else:
+        # The end steady state, with each region's capital depreciating towards it from the start
+        Y = np.tile(end, (periods, 1))
+        k_end = np.exp(end[:n])
+        decay = (1 - params['delta_period']) ** np.arange(1, periods + 1)
+        Y[:, :n] = np.log(k_end + decay[:, None] * (k0 - k_end))
+
+    def residuals(Z):
+        return _residuals(Z, *_stacked(Z, k0, end, n), tau, omega, params, demand)
+
+    Y, norm, iterations = model._newton(residuals, Y, tol, max_iter)
+    levels = _levels(Y, *_stacked(Y, k0, end, n), tau, omega, params, demand)
+    regions, national = _frames(levels, params, index)
+    return RegionalSolution(regions, national, Y, iterations, norm)
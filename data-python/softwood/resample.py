@@ -0,0 +1,136 @@
+"""
+Annual, quarterly and event-window aggregates of period-indexed series.
+
+Every function takes a DataFrame of series (one column per series, a
+PeriodIndex down the rows) or a single Series, and reduces all of the
+series over all of the groups in one np.ufunc.reduceat pass per
+statistic:
+
+    annual(frame, how='mean')      one row per year
+    quarterly(frame, how='sum')    one row per quarter
+    windows(frame, {'Financial crisis': ('2008', '2009'),
+                    'Recent': ('2020', None)})
+                                   one row per named window; windows
+                                   may overlap or be open-ended
+
+how is one of 'mean', 'sum', 'min', 'max', 'std' or 'count'. Missing
+values are skipped, and a group with fewer than min_count observations
+gives NaN (so partial years can be dropped with min_count=12).
+"""
+
+import numpy as np
+import pandas as pd
+
+HOW = ('mean', 'sum', 'min', 'max', 'std', 'count')
+
+
+def _as_frame(data):
+    if isinstance(data, pd.Series):
+        return data.to_frame(data.name if data.name is not None else 0), True
+    return data, False
+
+
+def _reduce(values, starts, stops, how, min_count=1):
+    """Reduce values[starts[i]:stops[i]] for every window i and every column at once.
+
+    The windows are passed to reduceat as interleaved (start, stop) pairs
+    so they can overlap; only the even results (start to stop) are kept.
+    """
+    if how not in HOW:
+        raise ValueError(f'Unknown aggregate {how!r}; expected one of {HOW}')
+    n, k = values.shape
+    starts = np.asarray(starts, dtype=np.intp)
+    stops = np.asarray(stops, dtype=np.intp)
+    if len(starts) == 0:
+        return np.empty((0, k))
+    # A sentinel row lets a window stop at the end of the data
+    edges = np.minimum(np.column_stack([starts, stops]).ravel(), n)
+    valid = ~np.isnan(values)
+
+    def over(array, ufunc, fill):
+        padded = np.vstack([np.where(valid, array, fill), np.full((1, k), fill)])
+        return ufunc.reduceat(padded, edges, axis=0)[::2]
+
+    count = over(np.ones_like(values), np.add, 0.0)
+    if how == 'count':
+        result = count
+    elif how == 'min':
+        result = over(values, np.minimum, np.inf)
+    elif how == 'max':
+        result = over(values, np.maximum, -np.inf)
+    else:
+        total = over(values, np.add, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            if how == 'sum':
+                result = total
+            elif how == 'mean':
+                result = mean
+            else:
+                squares = over(values * values, np.add, 0.0)
+                result = np.sqrt(np.maximum(squares - count * mean * mean, 0.0) / (count - 1))
+                result[count < 2] = np.nan
+    if how != 'count':
+        result[count < max(min_count, 1)] = np.nan
+
+    # reduceat returns the start row itself for an empty window
+    result[stops <= starts] = 0.0 if how == 'count' else np.nan
+    return result
+
+
+def aggregate(data, freq, how='mean', min_count=1):
+    """Aggregate many series to a lower frequency ('Y', 'Q', ...) in one pass.
+
+    Returns a DataFrame (a Series for a Series) indexed by the periods
+    of the new frequency that have any rows.
+    """
+    frame, squeeze = _as_frame(data)
+    frame = frame.sort_index()
+    target = frame.index.asfreq(freq)
+    n = len(target)
+    if n:
+        starts = np.flatnonzero(np.r_[True, target[1:] != target[:-1]])
+    else:
+        starts = np.array([], dtype=np.intp)
+    stops = np.r_[starts[1:], n]
+    reduced = _reduce(frame.to_numpy(dtype='float64'), starts, stops, how, min_count)
+    index = target[starts]
+    index.name = 'period'
+    result = pd.DataFrame(reduced, index=index, columns=frame.columns)
+    return result.iloc[:, 0] if squeeze else result
+
+
+def annual(data, how='mean', min_count=1):
+    """Aggregate many series to calendar years."""
+    return aggregate(data, 'Y', how=how, min_count=min_count)
+
+
+def quarterly(data, how='mean', min_count=1):
+    """Aggregate many series to calendar quarters."""
+    return aggregate(data, 'Q', how=how, min_count=min_count)
+
+
+def _bound(label, freq, how):
+    """Convert a window bound ('2008', '2006-10', a Period) to a period at freq."""
+    period = label if isinstance(label, pd.Period) else pd.Period(label)
+    return period.asfreq(freq, how=how)
+
+
+def windows(data, spans, how='mean', min_count=1):
+    """Aggregate many series over named, possibly overlapping, windows in one pass.
+
+    spans maps each window name to an inclusive (start, end) pair of
+    period labels; a year label covers the whole year and None leaves
+    that side open. Returns a DataFrame with one row per window (a
+    Series for a Series); windows without data give NaN.
+    """
+    frame, squeeze = _as_frame(data)
+    frame = frame.sort_index()
+    index = frame.index
+    starts, stops = [], []
+    for start, end in spans.values():
+        starts.append(0 if start is None else index.searchsorted(_bound(start, index.freq, 'start'), 'left'))
+        stops.append(len(index) if end is None else index.searchsorted(_bound(end, index.freq, 'end'), 'right'))
+    reduced = _reduce(frame.to_numpy(dtype='float64'), starts, stops, how, min_count)
+    result = pd.DataFrame(reduced, index=pd.Index(list(spans), name='window'), columns=frame.columns)
+    return result.iloc[:, 0] if squeeze else result
@@ -0,0 +1,98 @@
+"""
+Machine-readable results for the graph scripts.
+
+Scripts record what they produced alongside their human-readable prints:
+
+    results.stat('mean_production', np.mean(values), unit='thousand m3')
+    results.output('../images/lumber_output_graph.png')
+    results.warn('2025 is a partial year')
+
+When SOFTWOOD_RESULTS is set (generate_all_graphs.py does this) the
+results, together with the stage timings from softwood.instrument, are
+written to that path as a JSON sidecar when the script exits. The
+orchestrator merges the sidecars into one run manifest, so consumers such
+as table generation or regression checks never need to parse stdout.
+"""
+
+import atexit
+import datetime
+import json
+import os
+import sys
+
+from softwood import instrument
+
+RESULTS_ENV = 'SOFTWOOD_RESULTS'
+
+_outputs = []
+_stats = {}
+_warnings = []
+
+
+def _jsonable(value):
+    """Convert numpy/pandas scalars and containers into plain JSON types."""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if hasattr(value, 'tolist'):  # numpy scalars and arrays
+        return _jsonable(value.tolist())
+    if hasattr(value, 'isoformat'):  # pandas Timestamp
+        return value.isoformat()
+    if isinstance(value, float) and value != value:  # NaN
+        return None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def output(path, kind='figure'):
+    """Record a file written by the script."""
+    _outputs.append({'path': path, 'kind': kind})
+
+
+def stat(name, value, unit=None, period=None):
+    """Record a key statistic under name."""
+    entry = {'value': _jsonable(value)}
+    if unit is not None:
+        entry['unit'] = unit
+    if period is not None:
+        entry['period'] = _jsonable(period)
+    _stats[name] = entry
+
+
+def warn(message):
+    """Record a warning and echo it to stderr."""
+    _warnings.append(message)
+    print(f"Warning: {message}", file=sys.stderr)
+
+
+def reset():
+    """Forget everything recorded so far, before the next script run in the same process."""
+    _outputs.clear()
+    _stats.clear()
+    _warnings.clear()
+
+
+def collect():
+    """Return everything recorded so far as a dict."""
+    return {
+        'script': os.path.relpath(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+        'outputs': list(_outputs),
+        'stats': dict(_stats),
+        'warnings': list(_warnings),
+        'timings': instrument.report(),
+    }
+
+
+def _write_results():
+    path = os.environ.get(RESULTS_ENV)
+    if not path:
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(collect(), f, indent=2)
+
+
+atexit.register(_write_results)
@@ -0,0 +1,90 @@
+"""
+Revenue and cost decomposition of the sawmill principal statistics.
+
+decomposition() reads every line of sawmill-revenue/1610011701-eng.csv
+(statcan.read_table) into one year x line-item matrix and derives, for
+all years at once:
+
+    lines        the published lines plus other revenue, other expenses
+                 and value added (goods revenue less materials), in dollars
+    margins      operating margin (revenue less expenses) and gross margin
+                 (value added over goods revenue), in percent
+    cost_shares  each expense line as a percent of total expenses
+    growth       year-over-year percent change of every line
+    alpha        capital share of income, 1 - wages / value added
+
+alpha feeds the sawmill firm's Cobb-Douglas calibration (the capital
+share in Y = A K^alpha L^(1 - alpha)); calibrate_alpha() averages it over
+the years, since the single-year share swings with lumber prices.
+Suppressed cells ('F') are NaN; the quality letters stay in flags, and
+caution() lists the lines published with an E ("use with caution").
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from softwood import statcan
+
+DATA_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REVENUE_PATH = os.path.join(DATA_ROOT, 'sawmill-revenue', '1610011701-eng.csv')
+
+Decomposition = namedtuple('Decomposition', ['lines', 'margins', 'cost_shares', 'growth', 'alpha', 'flags'])
+
+# Short names of the published lines
+LINES = {
+    'Total revenue': 'total_revenue',
+    'Revenue from goods manufactured': 'goods_revenue',
+    'Total expenses': 'total_expenses',
+    'Total salaries and wages, direct and indirect labour': 'wages',
+    'Cost of materials and supplies': 'materials',
+}
+EXPENSES = ['wages', 'materials', 'other_expenses']
+
+
+def decomposition(path=REVENUE_PATH):
+    """Return the Decomposition namedtuple for the sawmill table (see the module docstring)."""
+    table = statcan.read_table(path)
+    years = table.values.columns.year
+    lines = table.values.T.rename(columns=LINES)
+    lines.index = pd.Index(years, name='year')
+    flags = table.flags.T.rename(columns=LINES)
+    flags.index = lines.index
+    lines.columns.name = None
+    flags.columns.name = None
+
+    # Derived lines, computed for every year at once
+    lines['other_revenue'] = lines['total_revenue'] - lines['goods_revenue']
+    lines['other_expenses'] = lines['total_expenses'] - lines['wages'] - lines['materials']
+    lines['value_added'] = lines['goods_revenue'] - lines['materials']
+
+    margins = pd.DataFrame({
+        'operating_margin': (lines['total_revenue'] - lines['total_expenses']) / lines['total_revenue'] * 100,
+        'gross_margin': lines['value_added'] / lines['goods_revenue'] * 100,
+    })
+    cost_shares = lines[EXPENSES].div(lines['total_expenses'], axis=0) * 100
+    with np.errstate(invalid='ignore', divide='ignore'):
+        growth = (lines / lines.shift(1) - 1) * 100
+    alpha = (1 - lines['wages'] / lines['value_added']).rename('alpha')
+    return Decomposition(lines, margins, cost_shares, growth, alpha, flags)
+
+
+def calibrate_alpha(decomp, start=None, end=None):
+    """Average capital share of income over the years with data (optionally start to end)."""
+    alpha = decomp.alpha.dropna()
+    if start is not None:
+        alpha = alpha[alpha.index >= int(start)]
+    if end is not None:
+        alpha = alpha[alpha.index <= int(end)]
+    if alpha.empty:
+        raise ValueError('No years with both wages and value added to calibrate alpha')
+    return float(alpha.mean())
+
+
+def caution(decomp):
+    """Return the labels of the published lines with any cell flagged E (use with caution)."""
+    flagged = decomp.flags.apply(lambda column: column.astype(str).str.contains('E', regex=False).any())
+    labels = {name: label for label, name in LINES.items()}
+    return [labels[name] for name in flagged.index[flagged]]
@@ -0,0 +1,207 @@
+"""
+Declarative schemas for the source tables.
+
+The scripts rely on each table keeping its shape from one release to the
+next: the same row dimension in the header row, the same units row, a
+contiguous run of periods covering the years the figures plot, each
+period spanning the same columns, and the rows the scripts look up by
+name. A schema records those expectations per table ID, e.g.
+
+    '16-10-0018-01': {
+        'path': 'exports/1610001801-eng.csv',
+        'frequency': 'Annual',
+        'row_dimension': 'Canadian lumber exports by mode of transportation',
+        'units': 'Cubic metres',
+        'covers': ('2000', '2024'),
+        'series': ['Total lumber exports', 'Rail', 'Truck', 'Water'],
+        'rows': ['Canada'],
+    }
+
+check() compares a schema with the metadata statcan.read_metadata()
+takes from the preamble and header lines, plus the first cell of each
+data row when a schema lists required rows, so a table that has shifted
+is rejected before its data block is parsed. statcan.read_table() checks
+every table that has a schema, refresh.py checks downloads before they
+replace the local copy, and generate_all_graphs.py checks every table
+before running any script.
+"""
+
+import re
+
+import pandas as pd
+
+SCHEMAS = {
+    '34-10-0158-01': {
+        'path': 'canada-housing-starts/3410015801-eng.csv',
+        'frequency': 'Monthly',
+        'row_dimension': 'Geography',
+        'units': 'Units',
+        'covers': ('2005-07', '2025-01'),
+        'rows': ['Canada'],
+    },
+    '14-10-0202-01': {
+        'path': 'employment/1410020201-eng.csv',
+        'frequency': 'Annual',
+        'row_dimension': 'North American Industry Classification System (NAICS)',
+        'units': 'Persons',
+        'dimensions': {'Geography': 'Canada', 'Type of employee': 'All employees'},
+        'covers': ('2004', '2024'),
+        'rows': ['Sawmills and wood preservation  [3211]'],
+    },
+    '16-10-0018-01': {
+        'path': 'exports/1610001801-eng.csv',
+        'frequency': 'Annual',
+        'row_dimension': 'Canadian lumber exports by mode of transportation',
+        'units': 'Cubic metres',
+        'covers': ('2000', '2024'),
+        'series': ['Total lumber exports', 'Rail', 'Truck', 'Water'],
+        'rows': ['Canada'],
+    },
+    '36-10-0434-03': {
+        'path': 'gdp/3610043403-eng.csv',
+        'frequency': 'Annual',
+        'row_dimension': 'North American Industry Classification System (NAICS)',
+        'units': 'Dollars',
+        'dimensions': {'Prices': 'Chained (2017) dollars', 'Geography': 'Canada'},
+        'covers': ('2007', '2024'),
+        'rows': ['All industries  [T001]', 'Agriculture, forestry, fishing and hunting  [11]',
+                 'Construction  [23]'],
+    },
+    '16-10-0017-01': {
+        'path': 'lumber-output/1610001701-eng.csv',
+        'frequency': 'Monthly',
+        'row_dimension': 'North American Product Classification System (NAPCS)',
+        'units': 'Cubic metres',
+        'dimensions': {'Geography': 'Canada'},
+        'covers': ('2019-01', '2025-06'),
+        'rows': ['Total softwood and hardwood, production'],
+    },
+    '16-10-0045-01': {
+        'path': 'lumber-output/1610004501-eng.csv',
+        'frequency': 'Monthly',
+        'row_dimension': 'Standard Classification of Goods (SCG)',
+        'units': 'Cubic metres',
+        'dimensions': {'Geography': 'Canada'},
+        'covers': ('2004-01', '2018-12'),
+        'rows': ['Total softwood and hardwood, production'],
+    },
+    '18-10-0266-01': {
+        'path': 'prices/1810026601-eng.csv',
+        'frequency': 'Monthly',
+        'row_dimension': 'North American Product Classification System (NAPCS)',
+        'units': 'Index, 202001=100',
+        'dimensions': {'Geography': 'Canada'},
+        'covers': ('2003-01', '2025-06'),
+        'rows': ['Softwood lumber (except tongue and groove and other edge worked lumber)  [24112]',
+                 'Fabricated steel plate and other fabricated structural metal  [46611]',
+                 'Ready-mixed concrete  [46512]'],
+    },
+    '16-10-0117-01': {
+        'path': 'sawmill-revenue/1610011701-eng.csv',
+        'frequency': 'Annual',
+        'row_dimension': 'Principal statistics',
+        'units': 'Dollars',
+        'dimensions': {'Geography': 'Canada',
+                       'North American Industry Classification System (NAICS)':
+                           'Sawmills (except shingle and shake mills)  [321111]'},
+        'covers': ('2013', '2023'),
+        'rows': ['Total revenue', 'Revenue from goods manufactured',
+                 'Total salaries and wages, direct and indirect labour',
+                 'Cost of materials and supplies'],
+    },
+    'HOUST': {
+        'path': 'housing-starts/HOUST.csv',
+        'columns': ['observation_date', 'HOUST'],
+    },
+}
+
+_FOOTNOTES = re.compile(r'(\s+\d+)+$')
+_FIRST_CELL = re.compile(r'^(?:"((?:[^"]|"")*)"|([^,]*))')
+
+
+class SchemaError(ValueError):
+    """A source table does not match its declared schema."""
+
+
+def _row_labels(path, first_data_row):
+    """Return the first cell of every data row, without parsing the rest of the line."""
+    labels = []
+    with open(path, encoding='utf-8-sig') as f:
+        for i, line in enumerate(f):
+            if i < first_data_row:
+                continue
+            if not line.strip().strip(','):
+                break
+            match = _FIRST_CELL.match(line)
+            label = match.group(1).replace('""', '"') if match.group(1) is not None else match.group(2)
+            labels.append(label.strip())
+    return labels
+
+
+def problems(meta, schema, check_rows=True):
+    """Return a list of the ways a table's metadata departs from its schema."""
+    found = []
+
+    def expect(key, actual, expected):
+        if actual != expected:
+            found.append(f'{key}: expected {expected!r}, found {actual!r}')
+
+    for key in ('frequency', 'row_dimension', 'units'):
+        if key in schema:
+            expect(key, meta.get(key), schema[key])
+    for name, value in schema.get('dimensions', {}).items():
+        expect(f'dimension {name!r}', meta.get('dimensions', {}).get(name), value)
+
+    if 'covers' in schema:
+        first, last = meta.get('first_period'), meta.get('last_period')
+        if first is None:
+            found.append('header row has no periods')
+        else:
+            start = pd.Period(schema['covers'][0], freq=first.freq)
+            end = pd.Period(schema['covers'][1], freq=first.freq)
+            if first > start or last < end:
+                found.append(f'periods: expected to cover {start} to {end}, found {first} to {last}')
+        if meta.get('period_gaps'):
+            found.append(f"periods: {meta['period_gaps']} missing between {first} and {last}")
+
+    series = schema.get('series')
+    expect('columns per period', meta.get('period_stride'), len(series) if series else 1)
+    if series:
+        expect('series', meta.get('series'), series)
+
+    if check_rows and schema.get('rows') and meta.get('path'):
+        labels = {_FOOTNOTES.sub('', label) for label in _row_labels(meta['path'], meta['first_data_row'])}
+        missing = [row for row in schema['rows'] if row not in labels]
+        if missing:
+            found.append(f'rows not found: {missing}')
+    return found
+
+
+def check(meta, table_id=None, check_rows=True):
+    """Raise SchemaError if a table's metadata does not match its schema.
+
+    The schema is looked up by the table ID in the metadata; table_id
+    additionally asserts which table the file is expected to be. Tables
+    without a schema pass.
+    """
+    if table_id is not None and meta.get('table_id') != table_id:
+        raise SchemaError(f"{meta.get('path')}: expected table {table_id}, found {meta.get('table_id')}")
+    schema = SCHEMAS.get(meta.get('table_id'))
+    if schema is None:
+        return
+    found = problems(meta, schema, check_rows=check_rows)
+    if found:
+        raise SchemaError(f"{meta.get('path')} ({meta.get('table_id')}) does not match its schema:\n  "
+                          + '\n  '.join(found))
+
+
+def check_series(path, series_id):
+    """Raise SchemaError if a FRED series file does not have its declared columns."""
+    schema = SCHEMAS.get(series_id)
+    if schema is None:
+        return
+    with open(path, encoding='utf-8-sig') as f:
+        columns = f.readline().strip().split(',')
+    if columns != schema['columns']:
+        raise SchemaError(f"{path} ({series_id}) does not match its schema:\n  "
+                          f"columns: expected {schema['columns']!r}, found {columns!r}")
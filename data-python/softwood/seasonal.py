@@ -0,0 +1,325 @@
+"""
+Seasonal adjustment and trend extraction for monthly series.
+
+Every function takes a DataFrame of series (one column per series, a
+monthly PeriodIndex down the rows) and filters all of them at once; a
+single Series is accepted too and the components come back as Series.
+
+    decompose(frame, method='x11')  trend, seasonal, irregular and
+                                    seasonally adjusted components
+    hp_filter(frame, lamb=129600)   Hodrick-Prescott trend and cycle
+    hamilton_filter(frame, h=24)    Hamilton (2018) regression trend and cycle
+
+decompose() supports:
+  'x11'        the X-11 filter sequence at the core of X-13ARIMA-SEATS
+               (2x12 trend, 3x3 and 3x5 seasonal moving averages, 13-term
+               Henderson trend), without the RegARIMA pre-adjustment or
+               extreme-value replacement
+  'stl'        STL via statsmodels when it is installed, else 'x11'
+  'classical'  2x12 moving-average trend and mean seasonal factors
+
+Results are cached per series hash (softwood/cache.py): the cache name
+holds the series name, the filter and a hash of the series' values and
+the filter settings, so scripts that need the same cyclical component
+(e.g. for the model calibration) do not refilter it on every run, and
+series that share a name (a full series and its holdout, or slices of
+a panel) or filter settings that differ each keep their own entry.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from softwood import cache, lazy
+
+ndimage = lazy.module('scipy.ndimage')
+sparse = lazy.module('scipy.sparse')
+linalg = lazy.module('scipy.sparse.linalg')
+
+try:
+    from statsmodels.tsa.seasonal import STL
+except ImportError:
+    STL = None
+
+PERIOD = 12
+HP_LAMBDA_MONTHLY = 129600
+
+
+def _as_frame(data):
+    if isinstance(data, pd.Series):
+        return data.to_frame(data.name if data.name is not None else 0), True
+    return data, False
+
+
+def _restore(components, squeeze):
+    if squeeze:
+        return {name: frame.iloc[:, 0] for name, frame in components.items()}
+    return components
+
+
+def _series_key(series, method, params):
+    """Return (cache name, data hash) for one series filtered with method and params."""
+    digest = hashlib.sha1()
+    digest.update(cache.frame_hash(series).encode('ascii'))
+    digest.update(json.dumps([method, params], sort_keys=True, default=str).encode('utf-8'))
+    digest = digest.hexdigest()
+    return f'seasonal-{method}-{cache.slug(series.name)}-{digest[:16]}', digest
+
+
+def _cached_batch(frame, method, params, names, compute, use_cache=True):
+    """Return the components of every column, computing only the uncached ones in one batch.
+
+    compute(frame) returns a dict of component name -> DataFrame shaped like frame.
+    """
+    results = {name: pd.DataFrame(index=frame.index, columns=frame.columns, dtype='float64') for name in names}
+    pending = []
+    keys = {}
+    for column in frame.columns:
+        keys[column] = _series_key(frame[column], method, params)
+        stored = cache.read(keys[column][0]) if use_cache else None
+        if stored is None:
+            pending.append(column)
+            continue
+        for name in names:
+            results[name][column] = stored[name].to_numpy()
+
+    if pending:
+        computed = compute(frame[pending])
+        for column in pending:
+            for name in names:
+                results[name][column] = computed[name][column].to_numpy()
+            if use_cache:
+                cache.write(keys[column][0], pd.DataFrame({name: computed[name][column] for name in names}),
+                            meta={'method': method, 'params': params, 'series': str(column),
+                                  'data_hash': keys[column][1]})
+    return results
+
+
+def _weighted_ma(values, weights, axis=0):
+    """Centred weighted moving average along axis, renormalising the weights at the ends and gaps."""
+    mask = ~np.isnan(values)
+    filled = np.where(mask, values, 0.0)
+    numerator = ndimage.convolve1d(filled, weights, axis=axis, mode='constant')
+    denominator = ndimage.convolve1d(mask.astype('float64'), weights, axis=axis, mode='constant')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = numerator / denominator
+    out[~mask] = np.nan
+    return out
+
+
+def _centred_ma(values, period=PERIOD):
+    """2 x period centred moving average (full window only; NaN at the ends)."""
+    weights = np.r_[0.5, np.ones(period - 1), 0.5] / period
+    mask = ~np.isnan(values)
+    filled = np.where(mask, values, 0.0)
+    out = ndimage.convolve1d(filled, weights, axis=0, mode='constant')
+    complete = ndimage.convolve1d(mask.astype('float64'), np.ones(len(weights)), axis=0, mode='constant')
+    out[complete < len(weights)] = np.nan
+    return out
+
+
+def _seasonal_ma(si, months, weights, period=PERIOD):
+    """Smooth each calendar month's SI ratios across years with weights, then centre to sum to zero."""
+    seasonal = np.full_like(si, np.nan)
+    for month in range(period):
+        rows = np.flatnonzero(months == month)
+        seasonal[rows] = _weighted_ma(si[rows], weights)
+        # Fill the years without an SI value (the trend's missing ends) from the nearest year
+        block = pd.DataFrame(seasonal[rows]).ffill().bfill().to_numpy()
+        seasonal[rows] = block
+    # Centre the factors so each 12-month window sums to (about) zero
+    centring = _centred_ma(seasonal, period)
+    centring = pd.DataFrame(centring).ffill().bfill().to_numpy()
+    return seasonal - centring
+
+
+def henderson_weights(terms=13):
+    """Return the symmetric Henderson moving-average weights for an odd number of terms."""
+    m = (terms - 1) // 2
+    n = m + 2
+    j = np.arange(-m, m + 1)
+    numerator = 315 * ((n - 1) ** 2 - j ** 2) * (n ** 2 - j ** 2) * ((n + 1) ** 2 - j ** 2) * (3 * n ** 2 - 16 - 11 * j ** 2)
+    denominator = 8 * n * (n ** 2 - 1) * (4 * n ** 2 - 1) * (4 * n ** 2 - 9) * (4 * n ** 2 - 25)
+    return numerator / denominator
+
+
+def _months(index, period=PERIOD):
+    """Return the 0-based position of each observation within the seasonal cycle."""
+    if hasattr(index, 'month') and period == PERIOD:
+        return np.asarray(index.month) - 1
+    return np.arange(len(index)) % period
+
+
+def _x11(frame, period=PERIOD):
+    values = frame.to_numpy(dtype='float64')
+    months = _months(frame.index, period)
+
+    # Stage 1: 2x12 trend, 3x3 seasonal factors
+    trend = _centred_ma(values, period)
+    seasonal = _seasonal_ma(values - trend, months, np.convolve(np.ones(3), np.ones(3)) / 9, period)
+    adjusted = values - seasonal
+
+    # Stage 2: Henderson trend of the adjusted series, 3x5 seasonal factors
+    trend = _weighted_ma(adjusted, henderson_weights(13))
+    seasonal = _seasonal_ma(values - trend, months, np.convolve(np.ones(3), np.ones(5)) / 15, period)
+    adjusted = values - seasonal
+    trend = _weighted_ma(adjusted, henderson_weights(13))
+
+    index, columns = frame.index, frame.columns
+    return {
+        'trend': pd.DataFrame(trend, index=index, columns=columns),
+        'seasonal': pd.DataFrame(seasonal, index=index, columns=columns),
+        'irregular': pd.DataFrame(adjusted - trend, index=index, columns=columns),
+        'adjusted': pd.DataFrame(adjusted, index=index, columns=columns),
+    }
+
+
+def _classical(frame, period=PERIOD):
+    values = frame.to_numpy(dtype='float64')
+    months = _months(frame.index, period)
+    trend = _centred_ma(values, period)
+    detrended = pd.DataFrame(values - trend)
+    factors = detrended.groupby(months).mean()
+    # Each month's mean deviation from trend, centred to sum to zero over the year
+    seasonal = (factors - factors.mean()).to_numpy()[months]
+    adjusted = values - seasonal
+    index, columns = frame.index, frame.columns
+    return {
+        'trend': pd.DataFrame(trend, index=index, columns=columns),
+        'seasonal': pd.DataFrame(seasonal, index=index, columns=columns),
+        'irregular': pd.DataFrame(adjusted - trend, index=index, columns=columns),
+        'adjusted': pd.DataFrame(adjusted, index=index, columns=columns),
+    }
+
+
+def _stl(frame, period=PERIOD):
+    parts = {name: pd.DataFrame(index=frame.index, columns=frame.columns, dtype='float64')
+             for name in ('trend', 'seasonal', 'irregular', 'adjusted')}
+    for column in frame.columns:
+        series = frame[column]
+        valid = series.dropna()
+        fit = STL(valid.to_numpy(), period=period, robust=True).fit()
+        rows = series.index.get_indexer(valid.index)
+        parts['trend'].iloc[rows, parts['trend'].columns.get_loc(column)] = fit.trend
+        parts['seasonal'].iloc[rows, parts['seasonal'].columns.get_loc(column)] = fit.seasonal
+        parts['irregular'].iloc[rows, parts['irregular'].columns.get_loc(column)] = fit.resid
+        parts['adjusted'].iloc[rows, parts['adjusted'].columns.get_loc(column)] = valid.to_numpy() - fit.seasonal
+    return parts
+
+
+def decompose(data, method='x11', period=PERIOD, use_cache=True):
+    """Split monthly series into trend, seasonal, irregular and seasonally adjusted parts.
+
+    Additive; take logs first for a multiplicative decomposition. Returns
+    a dict of DataFrames (or Series for a Series input) keyed by
+    'trend', 'seasonal', 'irregular' and 'adjusted'.
+    """
+    frame, squeeze = _as_frame(data)
+    if method == 'stl' and STL is None:
+        method = 'x11'
+    compute = {'x11': _x11, 'classical': _classical, 'stl': _stl}[method]
+    names = ['trend', 'seasonal', 'irregular', 'adjusted']
+    components = _cached_batch(frame, method, {'period': period}, names,
+                               lambda f: compute(f, period), use_cache=use_cache)
+    return _restore(components, squeeze)
+
+
+def _spans(frame):
+    """Group columns by the span between their first and last observation."""
+    groups = {}
+    for column in frame.columns:
+        valid = np.flatnonzero(frame[column].notna().to_numpy())
+        if len(valid):
+            groups.setdefault((valid[0], valid[-1] + 1), []).append(column)
+    return groups
+
+
+def _filled_block(frame, columns, start, stop):
+    """Return columns over rows start:stop with interior gaps linearly interpolated."""
+    return frame[columns].iloc[start:stop].interpolate(limit_area='inside').to_numpy(dtype='float64')
+
+
+def _hp(frame, lamb):
+    trend = pd.DataFrame(np.nan, index=frame.index, columns=frame.columns)
+    for (start, stop), columns in _spans(frame).items():
+        n = stop - start
+        if n < 3:
+            continue
+        # (I + lambda D'D) tau = y with D the second-difference operator;
+        # one sparse factorisation serves every series with this span
+        second = sparse.diags([np.ones(n - 2), -2 * np.ones(n - 2), np.ones(n - 2)], [0, 1, 2], shape=(n - 2, n))
+        system = (sparse.identity(n, format='csc') + lamb * (second.T @ second)).tocsc()
+        solved = linalg.splu(system).solve(_filled_block(frame, columns, start, stop))
+        trend.iloc[start:stop, [trend.columns.get_loc(c) for c in columns]] = solved.reshape(n, len(columns))
+    trend = trend.where(frame.notna())
+    return {'trend': trend, 'cycle': frame - trend}
+
+
+def hp_filter(data, lamb=HP_LAMBDA_MONTHLY, use_cache=True):
+    """Hodrick-Prescott trend and cycle of every series (lambda 129600 for monthly data)."""
+    frame, squeeze = _as_frame(data)
+    components = _cached_batch(frame, 'hp', {'lamb': lamb}, ['trend', 'cycle'],
+                               lambda f: _hp(f, lamb), use_cache=use_cache)
+    return _restore(components, squeeze)
+
+
+def _hamilton(frame, h, p):
+    trend = pd.DataFrame(np.nan, index=frame.index, columns=frame.columns)
+    for (start, stop), columns in _spans(frame).items():
+        y = _filled_block(frame, columns, start, stop).T  # series x time
+        n = y.shape[1]
+        rows = n - h - p + 1
+        if rows <= p + 1:
+            continue
+        # Regress y[t+h] on a constant and y[t], ..., y[t-p+1] for every series in one batch
+        lags = np.stack([y[:, p - 1 - k:p - 1 - k + rows] for k in range(p)], axis=2)
+        X = np.concatenate([np.ones((y.shape[0], rows, 1)), lags], axis=2)
+        target = y[:, p - 1 + h:p - 1 + h + rows]
+        XtX = np.einsum('sti,stj->sij', X, X)
+        Xty = np.einsum('sti,st->si', X, target)
+        beta = np.linalg.solve(XtX, Xty[..., None])[..., 0]
+        fitted = np.einsum('sti,si->st', X, beta)
+        block = np.full((n, len(columns)), np.nan)
+        block[p - 1 + h:] = fitted.T
+        trend.iloc[start:stop, [trend.columns.get_loc(c) for c in columns]] = block
+    trend = trend.where(frame.notna())
+    return {'trend': trend, 'cycle': frame - trend}
+
+
+def hamilton_filter(data, h=24, p=12, use_cache=True):
+    """Hamilton (2018) trend and cycle: the cycle is the error in forecasting y[t+h] from y[t..t-p+1].
+
+    h=24, p=12 are Hamilton's recommendations for monthly data; the first
+    h+p-1 observations of each series have no trend.
+    """
+    frame, squeeze = _as_frame(data)
+    components = _cached_batch(frame, 'hamilton', {'h': h, 'p': p}, ['trend', 'cycle'],
+                               lambda f: _hamilton(f, h, p), use_cache=use_cache)
+    return _restore(components, squeeze)
+
+
+def cycle_summary(series, adjust=True, method='x11', use_cache=True):
+    """Seasonal factors and cyclical components of one positive monthly series, in percent.
+
+    The series is put on a regular monthly index and logged; when adjust
+    is True (the series is not already seasonally adjusted) it is
+    decomposed first and the filters run on the adjusted series. Returns
+    a dict with 'seasonal_factors' (average percent deviation by calendar
+    month, or None), 'adjusted', 'hp_cycle' and 'hamilton_cycle'.
+    """
+    index = pd.period_range(series.index.min(), series.index.max(), freq='M')
+    logged = np.log(series.reindex(index)) * 100
+    logged.name = series.name
+    factors = None
+    if adjust:
+        components = decompose(logged, method=method, use_cache=use_cache)
+        factors = components['seasonal'].groupby(components['seasonal'].index.month).mean()
+        logged = components['adjusted']
+    return {
+        'seasonal_factors': factors,
+        'adjusted': logged,
+        'hp_cycle': hp_filter(logged, use_cache=use_cache)['cycle'],
+        'hamilton_cycle': hamilton_filter(logged, use_cache=use_cache)['cycle'],
+    }
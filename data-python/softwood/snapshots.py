@@ -0,0 +1,85 @@
+"""
+Small fingerprints of rendered figures, for image regression checks.
+
+check_figures.py renders every figure at a low resolution and compares
+it with a stored baseline. Both are reduced to a grayscale thumbnail of
+THUMBNAIL pixels, each the mean of the pixels it covers (one
+np.add.reduceat pass per axis) and rounded to 8 bits so a thumbnail
+saved as PNG reads back exactly. compare() measures:
+
+    mean_diff   mean absolute difference of the thumbnails (0 to 1)
+    max_diff    largest difference of a single thumbnail pixel
+    hash_bits   Hamming distance of the 64-bit difference hashes (dHash:
+                whether each cell of a 9 x 8 reduction is brighter than
+                its neighbour to the left), 0 to 64
+
+Renders at a fixed resolution are deterministic, so an unchanged figure
+scores 0 on all three. A moved series, a new marker or different text
+raises max_diff and mean_diff; the hash changes with the layout (a
+rescaled axis, a missing panel) and ignores small local differences.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from softwood import lazy
+
+image = lazy.module('matplotlib.image')
+
+THUMBNAIL = (96, 128)
+
+Difference = namedtuple('Difference', ['mean_diff', 'max_diff', 'hash_bits'])
+
+
+def read_gray(path):
+    """Read a PNG as a 2-D float array in [0, 1], transparent areas white."""
+    pixels = image.imread(path)
+    if pixels.ndim == 2:
+        return pixels.astype('float64')
+    rgb = pixels[..., :3].astype('float64')
+    if pixels.shape[2] == 4:
+        alpha = pixels[..., 3:4].astype('float64')
+        rgb = rgb * alpha + (1 - alpha)
+    return rgb @ np.array([0.299, 0.587, 0.114])
+
+
+def reduce(pixels, shape):
+    """Shrink a 2-D array to shape by averaging the block each output pixel covers."""
+    if pixels.shape[0] < shape[0] or pixels.shape[1] < shape[1]:
+        raise ValueError(f'Cannot reduce a {pixels.shape} image to {shape}')
+    rows = np.linspace(0, pixels.shape[0], shape[0] + 1).astype(int)[:-1]
+    cols = np.linspace(0, pixels.shape[1], shape[1] + 1).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(pixels, rows, axis=0), cols, axis=1)
+    counts = np.outer(np.diff(np.r_[rows, pixels.shape[0]]), np.diff(np.r_[cols, pixels.shape[1]]))
+    return sums / counts
+
+
+def thumbnail(path, shape=THUMBNAIL):
+    """Return the 8-bit grayscale thumbnail of the PNG at path (floats in [0, 1])."""
+    return np.round(reduce(read_gray(path), shape) * 255) / 255
+
+
+def dhash(pixels):
+    """Return the 64-bit difference hash of an image as a boolean array."""
+    cells = reduce(pixels, (8, 9))
+    return (cells[:, 1:] > cells[:, :-1]).ravel()
+
+
+def compare(a, b):
+    """Return the Difference between two thumbnails of the same shape."""
+    if a.shape != b.shape:
+        raise ValueError(f'Thumbnails differ in shape: {a.shape} and {b.shape}')
+    diff = np.abs(a - b)
+    return Difference(float(diff.mean()), float(diff.max()), int((dhash(a) != dhash(b)).sum()))
+
+
+def read_thumbnail(path):
+    """Read a thumbnail saved by write_thumbnail()."""
+    return np.round(read_gray(path) * 255) / 255
+
+
+def write_thumbnail(path, thumb):
+    """Save a thumbnail as a gray PNG (8 bits a channel, so it reads back exactly)."""
+    levels = np.round(np.clip(thumb, 0, 1) * 255).astype(np.uint8)
+    image.imsave(path, np.repeat(levels[..., None], 3, axis=2))
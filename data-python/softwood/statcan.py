@@ -0,0 +1,319 @@
+"""
+Reader for StatCan "download as displayed" CSV tables.
+
+Every table in this repository follows the same layout:
+
+    "Lumber production, shipments, and stocks by species, monthly (x 1,000) 1 2 3"
+    "Frequency: Monthly"
+    "Table: 16-10-0017-01"
+    "Release date: 2025-11-04"
+    "Geography: Canada, Province or territory"
+    ...
+    "Geography","Canada",,,,                  <- fixed dimensions
+    "NAPCS","April 2014","May 2014",...        <- header row (periods)
+    ,"Cubic metres",,,,                        <- units row
+    "Total softwood and hardwood, production","5,222.4","4,883.0",...
+    ...
+    (blank line, then symbol legend and footnotes)
+
+Some tables span each period over several columns (one per mode of
+transport, say); the header row then leaves the extra columns blank and
+the row below it names them.
+
+read_table() locates the header and units rows from the preamble, reads
+the data block in one read_csv call, parses the period header with
+softwood.periods and splits quality flags from the values for the whole
+block at once ("39,506A" -> 39506.0 and 'A'; ".." -> NaN and '..').
+"""
+
+import csv
+import datetime
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from softwood import schema
+from softwood.periods import detect_format, parse_periods
+
+Table = namedtuple('Table', ['meta', 'values', 'flags', 'units', 'codes'])
+
+# Quality indicators and symbols StatCan attaches to (or puts in place of) values
+QUALITY_FLAGS = ('A', 'B', 'C', 'D', 'E', 'F')
+SYMBOLS = ('..', '...', 'x', 'F', '.')
+
+_VALUE = re.compile(r'^(-?[\d,]*\.?\d+)?\s*([A-Za-z.]*)$')
+_FOOTNOTES = re.compile(r'(\s+\d+)+$')
+_CODE = re.compile(r'\[([^\]]+)\]')
+_META = {'Frequency': 'frequency', 'Table': 'table_id', 'Release date': 'release_date',
+         'Geography': 'geography'}
+
+
+def clean_label(label):
+    """Strip trailing footnote references ("Total softwood, production 4")."""
+    if not isinstance(label, str):
+        return label
+    return _FOOTNOTES.sub('', label.strip())
+
+
+def _is_blank(cells):
+    return all(not c.strip() for c in cells)
+
+
+def _parse_meta_line(cells, meta):
+    text = cells[0] if cells else ''
+    key, sep, value = text.partition(':')
+    if sep and key in _META:
+        value = value.strip()
+        if key == 'Table':
+            # "16-10-0045-01 (formerly CANSIM 303-0064)"
+            meta['table_id'] = value.split()[0]
+            meta['table_note'] = value[len(meta['table_id']):].strip(' ()') or None
+        elif key == 'Release date':
+            meta['release_date'] = datetime.date.fromisoformat(value)
+        else:
+            meta[_META[key]] = value
+        return True
+    return False
+
+
+def read_metadata(path, max_lines=40):
+    """Read the preamble of a StatCan table.
+
+    Returns a dict with the title, frequency, table_id, release_date,
+    fixed dimensions, the row dimension name, the units, and the line
+    numbers of the header row and of the first data row.
+    """
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        lines = []
+        for i, cells in enumerate(csv.reader(f)):
+            if i >= max_lines:
+                break
+            lines.append(cells)
+    return parse_preamble(lines, path)
+
+
+def parse_preamble(lines, path=None):
+    """Parse preamble rows (lists of cells) into the read_metadata() dict.
+
+    Also used on the first few kilobytes of a remote copy of a table, so
+    its release date can be checked without downloading the whole file.
+    """
+    meta = {'path': path, 'title': None, 'dimensions': {}}
+    meta['title'] = clean_label(lines[0][0]) if lines and lines[0] else None
+    header = None
+    for i, cells in enumerate(lines[1:], start=1):
+        if _is_blank(cells) or _parse_meta_line(cells, meta):
+            continue
+        if header is None and len(cells) > 1 and detect_format(cells[1:], sample=5) is not None:
+            header = i
+            break
+        # "Geography","Canada",,, fixes one dimension of the table
+        if len(cells) > 1 and cells[1].strip():
+            meta['dimensions'][clean_label(cells[0])] = clean_label(cells[1])
+    if header is None:
+        raise ValueError(f'No period header row found in the first {len(lines)} lines of {path}')
+
+    meta['header_row'] = header
+    meta['row_dimension'] = clean_label(lines[header][0]) or None
+    meta['spanned'] = _spanned(lines[header])
+    _describe_periods(lines[header][1:], meta)
+    first = header + 1
+    if meta['spanned']:
+        meta['row_dimension'] = clean_label(lines[first][0]) or meta['row_dimension']
+        meta['series'] = [clean_label(c) for c in lines[first][1:1 + meta['period_stride']]]
+        first += 1
+    # Skip label-only rows ("Geography 1 2 3 4") and take the units row
+    units = None
+    while first < len(lines):
+        cells = lines[first]
+        if cells and not cells[0].strip() and len(cells) > 1:
+            units = cells[1].strip() or None
+            first += 1
+            break
+        if cells and cells[0].strip() and _is_blank(cells[1:]):
+            first += 1
+            continue
+        break
+    meta['units'] = units
+    meta['first_data_row'] = first
+    return meta
+
+
+def parse_release(lines):
+    """Return the title, table_id and release_date from the first preamble rows only."""
+    meta = {'title': clean_label(lines[0][0]) if lines and lines[0] else None}
+    for cells in lines[1:10]:
+        _parse_meta_line(cells, meta)
+    return meta
+
+
+def _describe_periods(cells, meta):
+    """Record the first and last period, count, gaps and column stride of a header row."""
+    labels = pd.Series(cells, dtype=object).replace('', np.nan)
+    if meta['spanned']:
+        labels = labels.ffill()
+    parsed = parse_periods(labels)
+    valid = parsed[~parsed.isna()]
+    unique = valid.unique()
+    meta['first_period'] = unique.min() if len(unique) else None
+    meta['last_period'] = unique.max() if len(unique) else None
+    meta['period_count'] = len(unique)
+    meta['period_stride'] = len(valid) // len(unique) if len(unique) else 0
+    if len(unique):
+        expected = (meta['last_period'] - meta['first_period']).n + 1
+        meta['period_gaps'] = expected - len(unique)
+    else:
+        meta['period_gaps'] = 0
+
+
+def _spanned(header_cells):
+    """True if periods span several columns (blank cells between them)."""
+    cells = [c.strip() for c in header_cells[1:]]
+    filled = [i for i, c in enumerate(cells) if c]
+    if len(filled) < 2:
+        return False
+    return any(not c for c in cells[filled[0]:filled[-1]])
+
+
+def _count_data_rows(path, first):
+    """Count rows from `first` up to the blank line that ends the data block."""
+    count = 0
+    with open(path, encoding='utf-8-sig') as f:
+        for i, line in enumerate(f):
+            if i < first:
+                continue
+            if not line.strip().strip(','):
+                break
+            count += 1
+    return count
+
+
+def split_flags(raw):
+    """Split a frame of raw cell strings into (float values, flag strings).
+
+    Works on the whole block at once: "39,506A" gives 39506.0 and 'A',
+    ".." gives NaN and '..', plain numbers get an empty flag.
+    """
+    cells = pd.Series(raw.to_numpy().ravel(), dtype=object).fillna('').astype(str).str.strip()
+    parts = cells.str.extract(_VALUE)
+    numbers = pd.to_numeric(parts[0].str.replace(',', '', regex=False), errors='coerce')
+    flags = parts[1].fillna('')
+    # Cells that are neither a number nor a symbol keep their text as the flag
+    unmatched = parts[0].isna() & parts[1].isna()
+    flags[unmatched] = cells[unmatched]
+    shape = raw.shape
+    values = pd.DataFrame(numbers.to_numpy(dtype='float64').reshape(shape),
+                          index=raw.index, columns=raw.columns)
+    flag_frame = pd.DataFrame(flags.to_numpy(dtype=object).reshape(shape),
+                              index=raw.index, columns=raw.columns)
+    return values, flag_frame
+
+
+def label_codes(labels):
+    """Return the bracketed classification code of each label ('[3211]' -> '3211') or None."""
+    labels = pd.Index(labels)
+    codes = pd.Series(labels.astype(str).str.extract(_CODE, expand=False), index=labels, name='code')
+    return codes.astype(object).where(codes.notna(), None)
+
+
+def validate(path, table_id=None):
+    """Check a table's preamble against its schema (softwood/schema.py) and return its metadata.
+
+    Raises schema.SchemaError if the table has shifted.
+    """
+    meta = read_metadata(path)
+    schema.check(meta, table_id=table_id)
+    return meta
+
+
+def read_table(path, freq=None, validate_schema=True, since=None):
+    """Read a StatCan table into a Table of values, flags, units and codes.
+
+    values is a float DataFrame indexed by the cleaned row labels with a
+    PeriodIndex for columns (a (period, sub-column) MultiIndex for tables
+    that span each period over several columns); flags holds the quality
+    flag or symbol of every cell; codes maps each row label to its
+    classification code ('3211', 'T001', ...) or None. Tables with a
+    schema are checked against it before the data block is read.
+
+    since (a period or period string) keeps only the period columns from
+    then on: the header row picks the columns, so only those are
+    converted and split into values and flags. The meta still describes
+    the whole table (first_period and last_period come from its header).
+    """
+    meta = validate(path) if validate_schema else read_metadata(path)
+    header = pd.read_csv(path, skiprows=meta['header_row'], nrows=1 if meta['spanned'] else 0,
+                         header=None if meta['spanned'] else 0, dtype=str, encoding='utf-8-sig')
+    if meta['spanned']:
+        period_cells = pd.Series(header.iloc[0, 1:].to_numpy(dtype=object)).ffill()
+        sub = pd.read_csv(path, skiprows=meta['header_row'] + 1, nrows=1, header=None,
+                          dtype=str, encoding='utf-8-sig').iloc[0, 1:].to_numpy(dtype=object)
+        periods = parse_periods(period_cells, freq=freq)
+    else:
+        periods = parse_periods(header.columns[1:], freq=freq)
+    keep = ~periods.isna()
+    if since is not None:
+        keep &= periods >= pd.Period(since, freq=periods.freq)
+    if meta['spanned']:
+        columns = pd.MultiIndex.from_arrays([periods[keep], pd.Index(sub[keep]).map(clean_label)],
+                                            names=['period', 'series'])
+    else:
+        columns = periods[keep]
+        columns.name = 'period'
+
+    # The label column and the kept period columns (file column i + 1 for header cell i)
+    n_rows = _count_data_rows(path, meta['first_data_row'])
+    usecols = [0] + (np.flatnonzero(keep) + 1).tolist()
+    raw = pd.read_csv(path, skiprows=meta['first_data_row'], nrows=n_rows, header=None, usecols=usecols,
+                      dtype=str, keep_default_na=False, encoding='utf-8-sig')
+
+    labels = raw.iloc[:, 0].map(clean_label)
+    block = raw.iloc[:, 1:]
+    block.index = pd.Index(labels, name=meta['row_dimension'])
+    block.columns = columns
+    values, flags = split_flags(block)
+
+    codes = label_codes(block.index)
+    meta['n_rows'] = n_rows
+    return Table(meta, values, flags, meta['units'], codes)
+
+
+def _positions(table, pattern, regex=False):
+    labels = table.values.index.to_series()
+    return np.flatnonzero(labels.str.contains(pattern, regex=regex, na=False).to_numpy())
+
+
+def find_row(table, pattern, regex=False):
+    """Return the label of the first row whose label contains pattern."""
+    positions = _positions(table, pattern, regex=regex)
+    if len(positions) == 0:
+        raise KeyError(f"No row matching {pattern!r} in {table.meta['path']}")
+    return table.values.index[positions[0]]
+
+
+def _row_at(table, position, exclude_flags=()):
+    series = table.values.iloc[position]
+    if exclude_flags:
+        series = series.where(~table.flags.iloc[position].isin(list(exclude_flags)))
+    return series
+
+
+def row(table, pattern, regex=False, exclude_flags=()):
+    """Return the first row whose label contains pattern as a period-indexed float Series.
+
+    Cells whose flag is in exclude_flags are set to NaN.
+    """
+    positions = _positions(table, pattern, regex=regex)
+    if len(positions) == 0:
+        raise KeyError(f"No row matching {pattern!r} in {table.meta['path']}")
+    return _row_at(table, positions[0], exclude_flags)
+
+
+def code_row(table, code, exclude_flags=()):
+    """Return the row for a classification code such as '3211' or 'T001'."""
+    positions = np.flatnonzero(table.codes.to_numpy() == code)
+    if len(positions) == 0:
+        raise KeyError(f"No row with code [{code}] in {table.meta['path']}")
+    return _row_at(table, positions[0], exclude_flags)
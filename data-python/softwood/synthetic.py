@@ -0,0 +1,200 @@
+"""
+Synthetic StatCan tables and trade extracts for scale testing.
+
+The bundled tables are small (the largest has a few dozen rows), so the
+parsing, flag splitting and aggregation code never meets the sizes the
+full StatCan downloads reach. statcan_table() writes a table of any
+number of rows and periods in the layout statcan.read_table() reads:
+
+    "Synthetic product price index, by product, monthly 1 2"   title, footnote refs
+    "Frequency: Monthly" / "Table: 99-10-0001-01" / "Release date: ..."
+    "Geography: Canada"
+    "Geography","Canada",,,...                                  fixed dimension
+    "North American Product ...","January 1940","February 1940",...
+    ,"Index, 202001=100",,,...                                  units row
+    "Total, all products 1","101.3","99.8",...                  total rows, footnoted
+    "Product group 0001  [10001]","98.2","97.6A",...            coded rows
+    ...
+    Symbol legend / Footnotes / How to cite
+
+Each row is a random walk around its own level; cells carry quality
+letters (A-E) or stand in for suppressed ('x'), unreliable ('F') or
+missing ('..') values at the given rates, and large levels get thousands
+separators. Products are coded in groups of ten (a 5-digit group and its
+6-digit members), so the codes form a hierarchy for naics.py. With
+series=['Total', 'Rail', ...] every period spans several columns, like
+16-10-0018-01. Rows are drawn and written `chunk` rows at a time, so
+memory stays bounded at 10,000 rows x 1,000 months.
+
+exports_extract() writes a Canadian International Merchandise Trade
+extract in the layout of exports/raw-exports.csv (province x country x
+state rows with a value, quantity and unit price), for one month named
+in the preamble or for several months in a Period column.
+"""
+
+import calendar
+import datetime
+
+import numpy as np
+import pandas as pd
+
+TABLE_ID = '99-10-0001-01'
+ROW_DIMENSION = 'North American Product Classification System (NAPCS)'
+GROUP = 10
+TOTALS = ['Total, all products', 'Total, excluding energy products', 'Total, intermediate goods']
+
+PROVINCES = ['British Columbia', 'Quebec', 'Ontario', 'Alberta', 'New Brunswick', 'Nova Scotia',
+             'Manitoba', 'Saskatchewan', 'Newfoundland and Labrador', 'Prince Edward Island']
+STATES = ['Washington', 'Oregon', 'California', 'Texas', 'Florida', 'New York', 'Michigan',
+          'Illinois', 'Georgia', 'North Carolina', 'Ohio', 'Minnesota', 'Massachusetts', 'Colorado']
+COUNTRIES = ['China', 'Japan', 'South Korea', 'Taiwan', 'United Kingdom', 'India', 'Australia',
+             'Mexico', 'Philippines', 'Viet Nam', 'Germany', 'Pakistan', 'Bermuda', 'Israel']
+EXTRACT_TITLE = '"4407.11 — Lumber, coniferous (softwood), of pine, sawn or chipped lengthwise"'
+
+
+def period_labels(start, periods, freq='M'):
+    """Header labels of periods in StatCan's formats ('January 2017', 'Q1 2017', '2017')."""
+    index = pd.period_range(pd.Period(start, freq=freq), periods=periods, freq=freq)
+    if freq == 'M':
+        return [f'{calendar.month_name[p.month]} {p.year}' for p in index]
+    if freq == 'Q':
+        return [f'Q{p.quarter} {p.year}' for p in index]
+    if freq in ('Y', 'A'):
+        return [str(p.year) for p in index]
+    raise ValueError(f"Unsupported frequency {freq!r}; expected 'M', 'Q' or 'Y'")
+
+
+def row_labels(rows, totals=2):
+    """Return (labels, codes): `totals` footnoted total rows (at most 3), then products coded in groups."""
+    labels = [f'{label} {i + 1}' for i, label in enumerate(TOTALS[:totals])]
+    codes = [None] * len(labels)
+    for i in range(rows - len(labels)):
+        group, member = divmod(i, GROUP)
+        code = f'{10001 + group}' + (f'{member}' if member else '')
+        if member == 0:
+            labels.append(f'Product group {group + 1:04d}  [{code}]')
+        else:
+            labels.append(f'Product {group + 1:04d}-{member}  [{code}]')
+        codes.append(code)
+    return labels, codes
+
+
+def _format_row(values, flags):
+    """Format one row of values and flag codes as the quoted cells of a data row."""
+    cells = []
+    for value, flag in zip(values.tolist(), flags.tolist()):
+        if flag < 0:
+            cells.append(('..', 'x', 'F')[-flag - 1])
+        elif abs(value) >= 1000:
+            cells.append(f'{value:,.1f}' + ' ABCDE'[flag].strip())
+        else:
+            cells.append(f'{value:.1f}' + ' ABCDE'[flag].strip())
+    return '"' + '","'.join(cells) + '"'
+
+
+def _walks(rng, rows, columns, large):
+    """Random walks (rows x columns) around levels near 100, or 1,000-100,000 when large."""
+    levels = rng.lognormal(np.log(20_000 if large else 100), 1.0 if large else 0.2, rows)
+    steps = rng.normal(0, 0.02, (rows, columns)).cumsum(axis=1)
+    return levels[:, None] * np.exp(steps - steps.mean(axis=1, keepdims=True))
+
+
+def _flags(rng, rows, columns, flag_rate, missing_rate):
+    """Flag codes per cell: 0 none, 1-5 quality letters A-E, -1 '..', -2 'x', -3 'F'."""
+    draw = rng.random((rows, columns))
+    flags = np.zeros((rows, columns), dtype=np.int8)
+    flags[draw < flag_rate] = rng.integers(1, 6, (draw < flag_rate).sum())
+    missing = draw > 1 - missing_rate
+    flags[missing] = rng.choice(np.array([-1, -2, -3], dtype=np.int8), missing.sum(), p=[0.6, 0.3, 0.1])
+    return flags
+
+
+def statcan_table(path, rows=10_000, periods=1_000, start='1940-01', freq='M', series=None,
+                  table_id=TABLE_ID, units='Index, 202001=100', large=False, flag_rate=0.05,
+                  missing_rate=0.05, release_date=None, seed=0, chunk=500):
+    """Write a synthetic StatCan table to path and return its metadata (see the module docstring).
+
+    rows counts every data row (two of them totals); periods the columns
+    of each series. large=True gives levels in the thousands, written
+    with separators ('12,345.6'). The random draws are made `chunk` rows
+    at a time, so the output depends on the seed and the chunk size.
+    """
+    rng = np.random.default_rng(seed)
+    labels, codes = row_labels(rows)
+    width = periods * (len(series) if series else 1)
+    frequency = {'M': 'Monthly', 'Q': 'Quarterly', 'Y': 'Annual', 'A': 'Annual'}[freq]
+    release_date = release_date or datetime.date.today().isoformat()
+    blanks = ',' * (width - 1)
+    headers = period_labels(start, periods, freq)
+
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write(f'"Synthetic product price index, by product, {frequency.lower()} 1 2"\n')
+        f.write(f'"Frequency: {frequency}"\n"Table: {table_id}"\n"Release date: {release_date}"\n')
+        f.write('"Geography: Canada"\n""\n""\n\n')
+        if series:
+            f.write(',' + ','.join(f'"{h}"' + ',' * (len(series) - 1) for h in headers) + '\n')
+            f.write(f'"{ROW_DIMENSION}",' + ','.join(','.join(f'"{s}"' for s in series) for _ in headers) + '\n')
+            f.write('"Geography 1 2"\n')
+        else:
+            f.write(f'"Geography","Canada"{blanks}\n')
+            f.write(f'"{ROW_DIMENSION}",' + ','.join(f'"{h}"' for h in headers) + '\n')
+        f.write(f',"{units}"{blanks}\n')
+        for first in range(0, rows, chunk):
+            count = min(chunk, rows - first)
+            values = _walks(rng, count, width, large)
+            flags = _flags(rng, count, width, flag_rate, missing_rate)
+            f.write(''.join(f'"{labels[first + i]}",{_format_row(values[i], flags[i])}\n'
+                            for i in range(count)))
+        f.write('\nSymbol legend:\n.., not available for a specific reference period\n'
+                'x, suppressed to meet the confidentiality requirements of the Statistics Act\n'
+                'E, use with caution\nF, too unreliable to be published\n\n\n')
+        f.write('Footnotes:\n1,"Synthetic table generated for scale testing."\n'
+                '2,"Values are random walks; flags and symbols are drawn at random."\n\n\n')
+        f.write(f'"How to cite: Statistics Canada. Table {table_id}  Synthetic product price index"\n')
+    return {'path': path, 'table_id': table_id, 'rows': rows, 'periods': periods, 'columns': width,
+            'labels': labels, 'codes': codes}
+
+
+def exports_extract(path, rows=1_000_000, months=None, us_share=0.7, seed=0, chunk=250_000):
+    """Write a synthetic trade extract to path; returns the months it covers.
+
+    months is a month ('2017-01') named in the preamble, or a list or
+    range of months written in a Period column (default: the one month
+    2017-01). About us_share of the rows go to US states, the rest to
+    other countries.
+    """
+    rng = np.random.default_rng(seed)
+    if months is None or isinstance(months, str):
+        months = pd.PeriodIndex([months or '2017-01'], freq='M')
+        single = True
+    else:
+        months = pd.PeriodIndex(months, freq='M')
+        single = False
+    names = [f'{calendar.month_name[m.month]} {m.year}' for m in months]
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write(f'{EXTRACT_TITLE},,,,,,\n')
+        f.write(f'Domestic exports by province and trade partner — {names[0] if single else "monthly"},,,,,,\n')
+        f.write(',,,,,,\n')
+        period = '' if single else 'Period,'
+        f.write(f'Province,Country,State,{period}Value ($),Quantity,Average unit price,Unit of measure\n')
+        for first in range(0, rows, chunk):
+            count = min(chunk, rows - first)
+            us = rng.random(count) < us_share
+            quantity = rng.lognormal(5, 1.5, count).round().astype(np.int64) + 1
+            price = rng.normal(450, 120, count).clip(100, None)
+            frame = pd.DataFrame({
+                'Province': np.array(PROVINCES)[rng.integers(0, len(PROVINCES), count)],
+                'Country': np.where(us, 'United States', np.array(COUNTRIES)[rng.integers(0, len(COUNTRIES), count)]),
+                'State': np.where(us, np.array(STATES)[rng.integers(0, len(STATES), count)], 'N/A'),
+            })
+            if not single:
+                frame['Period'] = np.array(names)[rng.integers(0, len(names), count)]
+            frame['Value ($)'] = (quantity * price).round().astype(np.int64)
+            frame['Quantity'] = quantity
+            frame['Average unit price'] = price.round().astype(np.int64)
+            frame['Unit of measure'] = 'Volume in cubic metres'
+            frame.to_csv(f, header=False, index=False)
+        f.write(',,,,,,\n,,,,,,\n')
+        f.write('How to cite: Statistics Canada. Canadian International Merchandise Trade Web Application,,,,,,\n')
+        f.write(f'Accessed date: {datetime.date.today().isoformat()},,,,,,\n')
+    return months
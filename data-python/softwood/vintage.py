@@ -0,0 +1,152 @@
+"""
+Real-time vintages of the StatCan tables: every release, kept.
+
+StatCan revises published cells (flagged 'r') and replaces tables (the
+archived 16-10-0045-01 by 16-10-0017-01), but a download only holds the
+latest values. The refresh cache (softwood/refresh.py) already keeps
+every release of a table as one append-only part holding only the cells
+it added or revised, tagged with the release date in the table's
+preamble:
+
+    "Release date: 2025-11-04"
+
+This module reads those parts back by release. A store is one table ID,
+a list of IDs, or a name in STORES for tables whose rows continue each
+other, such as an archived table and its successor; their releases are
+interleaved by date.
+
+as_of(store, date) reads only the parts released on or before date and
+keeps the latest version of each cell, so it returns the table as it
+could have been downloaded then (a statcan.Table whose meta describes
+the releases read). With fill=True a cell a later release left blank
+keeps its last published value, which is how the successor table is
+spliced onto the archived one. history() lays out one row's values by
+period x release (the usual real-time data matrix), for backtesting
+forecasts and calibrations on the data available at the time.
+refresh.compact() drops the earlier releases of a table.
+"""
+
+import datetime
+
+import pandas as pd
+
+from softwood import cache, refresh
+
+# Named stores: tables whose rows continue each other, oldest first
+STORES = {
+    'lumber-output': ['16-10-0045-01', '16-10-0017-01'],
+}
+COLUMNS = ['release_date', 'table_id', 'path', 'first_period', 'last_period', 'added', 'revised']
+
+
+def tables(store):
+    """Return the table IDs of a store (a name in STORES, a table ID or a list of IDs)."""
+    if isinstance(store, str):
+        return list(STORES.get(store, [store]))
+    return list(store)
+
+
+def _date(date):
+    """ISO date string for a date, datetime, Timestamp or string (None is today)."""
+    if date is None:
+        return datetime.date.today().isoformat()
+    return pd.Timestamp(date).date().isoformat()
+
+
+def _entries(store):
+    return [refresh.find_entry(table_id) for table_id in tables(store)]
+
+
+def _parts(store, date=None):
+    """Return [(part, cells, table meta)] for the store's releases up to date, in release order."""
+    found = []
+    for entry in _entries(store):
+        name = refresh.cache_name(entry)
+        manifest = cache.read_manifest(name)
+        if manifest is None:
+            raise KeyError(f"Table {entry['id']} is not cached; sync({store!r}) first")
+        selected = cache.read_parts(name, lambda part: date is None or part['release_date'] <= date)
+        found.extend((dict(part, table_id=entry['id'], path=part.get('path', entry['path'])), cells,
+                      manifest['meta']) for part, cells in selected)
+    # Stable, so a table's parts keep their order within one release date
+    return sorted(found, key=lambda item: item[0]['release_date'])
+
+
+def _latest(frame):
+    return frame[~frame.index.duplicated(keep='last')]
+
+
+def sync(store):
+    """Bring the cached releases of every table in a store up to date; returns releases(store).
+
+    A release is appended to its table's cache (refresh.sync_cache()) the
+    first time its file is seen, so the call is cheap when nothing changed.
+    """
+    for entry in _entries(store):
+        refresh.sync_cache(entry)
+    return releases(store)
+
+
+def releases(store):
+    """Return the recorded releases of a store as a DataFrame (oldest first).
+
+    Each release names its table, file, the periods it covers and the
+    cells it added to and revised in its table.
+    """
+    rows = []
+    for entry in _entries(store):
+        manifest = cache.read_manifest(refresh.cache_name(entry))
+        for part in (manifest or {}).get('parts', []):
+            rows.append(dict({c: part.get(c) for c in COLUMNS}, table_id=entry['id'],
+                             path=part.get('path', entry['path'])))
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    return frame.sort_values('release_date', kind='stable').reset_index(drop=True)
+
+
+def as_of(store, date=None, fill=False):
+    """Return the store's table as published on date (default today) as a statcan.Table.
+
+    Only the parts released on or before date are read. fill=True keeps
+    the last published value of cells a later release left blank. The
+    Table's meta describes the releases read: the table_id, path and
+    release_date of the latest one, the first_period and last_period of
+    the cells returned, and the as_of date.
+    """
+    date = _date(date)
+    parts = _parts(store, date)
+    if not parts:
+        raise KeyError(f'No release of {store!r} on or before {date}')
+    cells = pd.concat([cells for _, cells, _ in parts])
+    if fill:
+        cells = cells[cells['value'].notna()]
+    cells = _latest(cells)
+    part, _, table_meta = parts[-1]
+    found = pd.PeriodIndex(cells.index.get_level_values('period'), freq=table_meta['freq'])
+    meta = dict(table_meta, table_id=part['table_id'], release_date=part['release_date'], as_of=date,
+                first_period=str(found.min()), last_period=str(found.max()))
+    return refresh.wide_table(cells, meta, part['path'])
+
+
+def history(store, label, fill=True):
+    """Return one row's values as a period x release matrix (the real-time data matrix).
+
+    Each column is the row as published in that release; with fill=True
+    cells a release did not touch carry the earlier release's value.
+    """
+    parts = _parts(store)
+    if not parts:
+        raise KeyError(f'No release of {store!r}')
+    frames = []
+    for part, cells, _ in parts:
+        cells = cells.reset_index()
+        frames.append(cells.loc[cells['label'] == label, ['period', 'value']].assign(release=part['release_date']))
+    cells = pd.concat(frames)
+    if cells.empty:
+        raise KeyError(f'No row {label!r} in {store!r}')
+    cells['period'] = pd.PeriodIndex(cells['period'], freq=parts[-1][2]['freq'])
+    matrix = cells.pivot_table(index='period', columns='release', values='value', aggfunc='last', dropna=False)
+    matrix = matrix.reindex(columns=sorted({part['release_date'] for part, _, _ in parts}))
+    if fill:
+        matrix = matrix.ffill(axis=1)
+    matrix.columns.name = 'release'
+    return matrix
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Write synthetic StatCan tables and trade extracts for scale testing.
+
+Generates a monthly table (10,000 products x 1,000 months by default),
+an annual table whose periods span several columns, and a multi-month
+trade extract (softwood/synthetic.py) into a scratch folder, so the
+parsing and aggregation code can be stressed offline. With --bench the
+loaders are timed on the generated files:
+
+    python synthetic_data.py --out /tmp/synthetic --bench
+    python synthetic_data.py --rows 1000 --periods 240 --extract-rows 100000 --bench
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from softwood import exports, naics, statcan, synthetic
+
+
+def timed(label, func, *args, **kwargs):
+    """Call func, print how long it took and return its result."""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"  {label:<52}{time.perf_counter() - started:8.2f}s")
+    return result
+
+
+def main():
+    """Generate the synthetic files and optionally time the loaders on them."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--out', default=os.path.join(tempfile.gettempdir(), 'softwood-synthetic'),
+                        help='folder to write to (default: softwood-synthetic/ in the temp folder)')
+    parser.add_argument('--rows', type=int, default=10_000, help='rows of the monthly table')
+    parser.add_argument('--periods', type=int, default=1_000, help='months of the monthly table')
+    parser.add_argument('--extract-rows', type=int, default=1_000_000, help='rows of the trade extract')
+    parser.add_argument('--extract-months', type=int, default=12, help='months in the trade extract')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bench', action='store_true', help='time the loaders on the generated files')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    monthly = os.path.join(args.out, '9910000101-eng.csv')
+    annual = os.path.join(args.out, '9910000201-eng.csv')
+    extract = os.path.join(args.out, 'raw-exports-synthetic.csv')
+    months = pd.period_range('2017-01', periods=args.extract_months, freq='M')
+
+    print("Writing:")
+    timed(f"{monthly} ({args.rows:,} x {args.periods:,})", synthetic.statcan_table, monthly,
+          rows=args.rows, periods=args.periods, large=True, seed=args.seed)
+    timed(f"{annual} (spanned)", synthetic.statcan_table, annual, rows=max(args.rows // 10, 3),
+          periods=max(args.periods // 12, 1), start='1940', freq='Y', series=['Total', 'Rail', 'Truck', 'Water'],
+          table_id='99-10-0002-01', units='Cubic metres', large=True, seed=args.seed + 1)
+    timed(f"{extract} ({args.extract_rows:,} rows)", synthetic.exports_extract, extract,
+          rows=args.extract_rows, months=months, seed=args.seed + 2)
+    for path in (monthly, annual, extract):
+        print(f"  {path}: {os.path.getsize(path) / 1e6:,.1f} MB")
+
+    if args.bench:
+        print("\nLoading:")
+        timed('statcan.read_metadata (monthly)', statcan.read_metadata, monthly)
+        table = timed('statcan.read_table (monthly)', statcan.read_table, monthly)
+        timed('statcan.read_table (annual, spanned)', statcan.read_table, annual)
+        timed('naics.build (monthly codes)', naics.build, table.codes)
+        timed('exports.aggregate_extract', exports.aggregate_extract, extract)
+        cells = table.values.size
+        print(f"\n{cells:,} cells in the monthly table, "
+              f"{(table.flags != '').to_numpy().mean():.1%} flagged")
+
+
+if __name__ == '__main__':
+    main()